@@ -0,0 +1,290 @@
+"""Mergeable aggregates over a query result, built one page at a time
+
+Each stored page is summarized into a ResultAggregates partial (counts, sums,
+a DOC histogram and quantile sketch, acres by region and farm, and a per-day
+histogram of datalastupdated) and merged into the running total for the
+result, so the totals never have to be recomputed from the rows.
+"""
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+DOC_BIN_WIDTH = 10
+STALE_THRESHOLDS_DAYS = (7, 30, 90)
+
+
+def find_column(columns, *names):
+    """First column whose name equals one of names (case-insensitive), else one containing it"""
+    lowered = {str(c).lower(): c for c in columns}
+    for name in names:
+        if name.lower() in lowered:
+            return lowered[name.lower()]
+    for name in names:
+        for low, col in lowered.items():
+            if name.lower() in low:
+                return col
+    return None
+
+
+def _add_counts(target, keys, counts):
+    for key, count in zip(keys, counts):
+        target[key] = target.get(key, 0) + int(count)
+
+
+def _merge_counts(target, other):
+    for key, count in other.items():
+        target[key] = target.get(key, 0) + count
+
+
+def _remove_counts(target, other):
+    for key, count in other.items():
+        left = target.get(key, 0) - count
+        if left > 0:
+            target[key] = left
+        else:
+            target.pop(key, None)
+
+
+class QuantileSketch:
+    """DDSketch-style quantile sketch: log-spaced buckets with bounded relative error
+
+    Any quantile is within relative_accuracy of the true value, and two
+    sketches with the same accuracy merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}  # bucket index -> count
+        self.negative = {}  # bucket index of -value -> count
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.zeros += int((values == 0).sum())
+        for sign, bins in ((1, self.positive), (-1, self.negative)):
+            side = values[values * sign > 0] * sign
+            if len(side):
+                keys, counts = np.unique(np.ceil(np.log(side) / self._log_gamma).astype(np.int64),
+                                         return_counts=True)
+                _add_counts(bins, keys.tolist(), counts)
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        _merge_counts(self.positive, other.positive)
+        _merge_counts(self.negative, other.negative)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def remove(self, other):
+        """Undo merge(other) for values that were added before"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot remove a sketch with different accuracy")
+        _remove_counts(self.positive, other.positive)
+        _remove_counts(self.negative, other.negative)
+        self.zeros = max(0, self.zeros - other.zeros)
+        self.count = max(0, self.count - other.count)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def _value(self, key):
+        # Midpoint (in relative terms) of the bucket (gamma^(key-1), gamma^key]
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def to_dict(self):
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "positive": {str(k): v for k, v in self.positive.items()},
+            "negative": {str(k): v for k, v in self.negative.items()},
+            "zeros": self.zeros,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["relative_accuracy"])
+        sketch.positive = {int(k): v for k, v in data["positive"].items()}
+        sketch.negative = {int(k): v for k, v in data["negative"].items()}
+        sketch.zeros = data["zeros"]
+        sketch.count = data["count"]
+        return sketch
+
+
+class ResultAggregates:
+    """Counts, sums, histograms and a DOC sketch that merge across pages"""
+
+    def __init__(self):
+        self.rows = 0
+        self.acres = 0.0
+        self.doc_sum = 0.0
+        self.doc_bins = {}  # bin start -> count
+        self.doc = QuantileSketch()
+        self.regions = {}  # region -> [ponds, acres]
+        self.farms = {}  # farm -> [ponds, acres]
+        self.updated_days = {}  # "YYYY-MM-DD" of datalastupdated -> ponds
+        self.never_updated = 0
+
+    @classmethod
+    def from_frame(cls, df):
+        """Partial aggregates of one page of rows"""
+        agg = cls()
+        agg.rows = len(df)
+        if not len(df):
+            return agg
+        columns = df.columns
+
+        acres_col = find_column(columns, "acres", "acre")
+        acres = pd.to_numeric(df[acres_col], errors="coerce") if acres_col else pd.Series(np.nan, index=df.index)
+        agg.acres = float(acres.sum())
+
+        doc_col = find_column(columns, "DOC")
+        if doc_col is not None:
+            doc = pd.to_numeric(df[doc_col], errors="coerce").dropna()
+            agg.doc_sum = float(doc.sum())
+            agg.doc.add(doc.to_numpy())
+            bins = (np.floor(doc.to_numpy() / DOC_BIN_WIDTH) * DOC_BIN_WIDTH).astype(np.int64)
+            keys, counts = np.unique(bins, return_counts=True)
+            _add_counts(agg.doc_bins, keys.tolist(), counts)
+
+        for names, target in ((("region",), agg.regions), (("farmName", "farmId", "farm"), agg.farms)):
+            col = find_column(columns, *names)
+            if col is None:
+                continue
+            grouped = pd.DataFrame({"key": df[col].astype("string").fillna("(unknown)"), "acres": acres})
+            summary = grouped.groupby("key", sort=False)["acres"].agg(["size", "sum"])
+            for key, (ponds, total) in zip(summary.index, summary.to_numpy()):
+                entry = target.setdefault(str(key), [0, 0.0])
+                entry[0] += int(ponds)
+                entry[1] += float(total)
+
+        updated_col = find_column(columns, "datalastupdated")
+        if updated_col is not None:
+            updated = pd.to_datetime(df[updated_col], errors="coerce")
+            agg.never_updated = int(updated.isna().sum())
+            days = updated.dropna().dt.strftime("%Y-%m-%d")
+            counts = days.value_counts(sort=False)
+            _add_counts(agg.updated_days, counts.index.tolist(), counts.to_numpy())
+        return agg
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.acres += other.acres
+        self.doc_sum += other.doc_sum
+        _merge_counts(self.doc_bins, other.doc_bins)
+        self.doc.merge(other.doc)
+        for mine, theirs in ((self.regions, other.regions), (self.farms, other.farms)):
+            for key, (ponds, acres) in theirs.items():
+                entry = mine.setdefault(key, [0, 0.0])
+                entry[0] += ponds
+                entry[1] += acres
+        _merge_counts(self.updated_days, other.updated_days)
+        self.never_updated += other.never_updated
+        return self
+
+    def remove(self, other):
+        """Take out the partial aggregates of rows that were merged before
+
+        Used when stored rows are replaced or dropped, so a changed pond
+        costs its own rows rather than a rebuild of the totals.
+        """
+        self.rows -= other.rows
+        self.acres -= other.acres
+        self.doc_sum -= other.doc_sum
+        _remove_counts(self.doc_bins, other.doc_bins)
+        self.doc.remove(other.doc)
+        for mine, theirs in ((self.regions, other.regions), (self.farms, other.farms)):
+            for key, (ponds, acres) in theirs.items():
+                entry = mine.get(key)
+                if entry is None:
+                    continue
+                entry[0] -= ponds
+                entry[1] -= acres
+                if entry[0] <= 0:
+                    del mine[key]
+        _remove_counts(self.updated_days, other.updated_days)
+        self.never_updated -= other.never_updated
+        return self
+
+    def doc_quantiles(self, qs=(0.5, 0.9, 0.99)):
+        return {q: self.doc.quantile(q) for q in qs}
+
+    def doc_mean(self):
+        return self.doc_sum / self.doc.count if self.doc.count else None
+
+    def doc_histogram(self):
+        """Ponds per DOC bin as a DataFrame indexed by bin label"""
+        keys = sorted(self.doc_bins)
+        return pd.DataFrame(
+            {"ponds": [self.doc_bins[k] for k in keys]},
+            index=pd.Index([f"{k}-{k + DOC_BIN_WIDTH - 1}" for k in keys], name="DOC"),
+        )
+
+    def breakdown(self, by="region", top=None):
+        """Ponds and acres per region (by="region") or farm, largest acreage first"""
+        groups = self.regions if by == "region" else self.farms
+        frame = pd.DataFrame(
+            [(key, ponds, acres) for key, (ponds, acres) in groups.items()],
+            columns=[by, "ponds", "acres"],
+        ).sort_values("acres", ascending=False)
+        return (frame.head(top) if top else frame).set_index(by)
+
+    def stale_counts(self, now=None, thresholds=STALE_THRESHOLDS_DAYS):
+        """Ponds whose datalastupdated is older than each threshold in days"""
+        today = (now or datetime.now()).date()
+        counts = {}
+        for days in thresholds:
+            cutoff = (today - timedelta(days=days)).isoformat()
+            counts[days] = sum(n for day, n in self.updated_days.items() if day < cutoff)
+        return counts
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "acres": self.acres,
+            "doc_sum": self.doc_sum,
+            "doc_bins": {str(k): v for k, v in self.doc_bins.items()},
+            "doc": self.doc.to_dict(),
+            "regions": self.regions,
+            "farms": self.farms,
+            "updated_days": self.updated_days,
+            "never_updated": self.never_updated,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        agg = cls()
+        agg.rows = data["rows"]
+        agg.acres = data["acres"]
+        agg.doc_sum = data["doc_sum"]
+        agg.doc_bins = {int(k): v for k, v in data["doc_bins"].items()}
+        agg.doc = QuantileSketch.from_dict(data["doc"])
+        agg.regions = data["regions"]
+        agg.farms = data["farms"]
+        agg.updated_days = data["updated_days"]
+        agg.never_updated = data["never_updated"]
+        return agg
@@ -1,7 +1,25 @@
 import streamlit as st
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# Standard library only; pandas and requests are imported where first needed
+# so a fresh process draws the page without waiting on them
+from assistant import Assistant, ChatHistory, make_backend
+
+
+@st.cache_resource
+def get_feedback_spool():
+    """Process-wide feedback spool; its thread sends the records in the background"""
+    from feedback import FeedbackSpool
+    return FeedbackSpool()
+
+
+@st.cache_resource
+def get_assistant():
+    """Process-wide assistant; backend replies stream from its worker threads"""
+    return Assistant(make_backend(), ThreadPoolExecutor(max_workers=4, thread_name_prefix="assistant"))
+
+
 st.set_page_config(page_title="AquaExchange Dashboard", layout="wide")
 col2, col3 = st.columns([1, 5])
 with col2:
@@ -16,6 +34,7 @@ st.divider()
 query = st.text_input("Search", placeholder="e.g. ponds with > 80 DOC")
 
 if st.button("🔄 Fetch Data"):
+    import pandas as pd
     st.session_state.df = pd.DataFrame({
         "Pond": ["Pond A", "Pond B"],
         "DOC": [90, 85],
@@ -98,6 +117,7 @@ function handleEmojiClick(emojiIndex) {
 """, height=0)
 
 # Handle emoji selection in Python
+selected_emoji = None
 if 'selected_feedback' in st.session_state:
     selected_emoji = st.session_state.selected_feedback
     if selected_emoji in ["🙂","😃"]:
@@ -107,7 +127,9 @@ if 'selected_feedback' in st.session_state:
 
 # Feedback submission
 feedback_comment = st.text_input("", placeholder="Optional comment...", label_visibility="collapsed")
-if st.button("Submit Feedback", use_container_width=True):
+if st.button("Submit Feedback", width="stretch"):
+    # Only spooled here; the endpoint is called from a background thread
+    get_feedback_spool().submit(query, rating=selected_emoji, comment=feedback_comment, app="dashboard")
     st.success(
         f"Feedback submitted: {selected_emoji or 'No emoji'} with comment: {feedback_comment}"
     )
@@ -132,18 +154,23 @@ if st.session_state.get("show_ai"):
         st.caption("Ask any pond or farm-related question!")
 
         if "chat_history" not in st.session_state:
-            st.session_state.chat_history = []
+            st.session_state.chat_history = ChatHistory(max_messages=12)
+        history = st.session_state.chat_history
+
+        # Only the recent messages are kept; older ones live on as a summary
+        if history.folded:
+            st.caption(f"{history.folded} earlier messages summarized")
+        for chat in history.messages:
+            with st.chat_message(chat["role"]):
+                st.markdown(chat["content"])
 
         user_message = st.text_input("Ask a question:", key="chat_input")
 
-        if st.button("Send"):
-            # dummy reply
-            ai_reply = f"🤖: You asked '{user_message}'. I'll connect to GPT soon!"
-            st.session_state.chat_history.append({"role": "user", "content": user_message})
-            st.session_state.chat_history.append({"role": "ai", "content": ai_reply})
-
-        for chat in st.session_state.chat_history:
-            if chat["role"] == "user":
-                st.write(f"👤 {chat['content']}")
-            else:
-                st.write(chat["content"])
\ No newline at end of file
+        if st.button("Send") and user_message.strip():
+            with st.chat_message("user"):
+                st.markdown(user_message)
+            reply = get_assistant().reply(user_message, history, st.session_state.get("df"))
+            with st.chat_message("assistant"):
+                st.write_stream(reply)
+            history.append("user", user_message)
+            history.append("assistant", reply.text)
@@ -0,0 +1,211 @@
+"""Sidebar assistant: pluggable chat backends, answers from loaded data, bounded history
+
+Questions that are aggregates over the pond data already loaded ("how many
+ponds above 90 DOC", "average acres of ponds over 80 doc") are answered from
+the DataFrame by data_answers with no remote call. Anything else goes to a
+backend, which streams its reply from a worker thread so the sidebar shows
+it token by token. Backends are looked up by name in BACKENDS
+(ASSISTANT_BACKEND picks one); a backend is any object with
+stream(messages) yielding text chunks.
+
+Only the standard library is imported up front: pandas comes with the first
+loaded data and requests with the first remote backend, so a session that
+never asks anything doesn't pay for them.
+"""
+import json
+import logging
+import os
+import queue
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+ASSISTANT_BACKEND = os.environ.get("ASSISTANT_BACKEND", "stub")
+ASSISTANT_URL = os.environ.get("ASSISTANT_URL", "https://api.openai.com/v1/chat/completions")
+ASSISTANT_MODEL = os.environ.get("ASSISTANT_MODEL", "gpt-4o-mini")
+
+SYSTEM_PROMPT = (
+    "You are the AquaExchange assistant. Answer questions about shrimp and fish ponds, "
+    "farms and the pond data the user has loaded. Be brief. If the data needed isn't "
+    "loaded, say which search would fetch it."
+)
+
+
+class ChatHistory:
+    """Recent chat messages plus a running summary of older ones
+
+    Only the last max_messages are kept verbatim; older ones are folded into
+    a summary of at most max_summary_chars, so the rendered history and the
+    prompt stay the same size however long the session runs.
+    """
+
+    def __init__(self, max_messages=12, max_summary_chars=1500):
+        self.max_messages = max_messages
+        self.max_summary_chars = max_summary_chars
+        self.messages = []  # [{"role": "user" | "assistant", "content"}]
+        self.summary = ""
+        self.folded = 0
+
+    def append(self, role, content):
+        self.messages.append({"role": role, "content": content})
+        while len(self.messages) > self.max_messages:
+            self._fold(self.messages.pop(0))
+
+    def prompt(self, system, context=None):
+        """Chat messages for a backend: system prompt, data context, summary and recent messages"""
+        parts = [system]
+        if context:
+            parts.append(context)
+        if self.summary:
+            parts.append(f"Earlier in this conversation: {self.summary}")
+        return [{"role": "system", "content": "\n\n".join(parts)}] + list(self.messages)
+
+    def _fold(self, message):
+        # Extractive rather than model-written: folding happens on the script
+        # thread and must not wait on a backend
+        content = " ".join(message["content"].split())
+        if message["role"] == "user":
+            note = f"User asked: {_clip(content, 120)}"
+        else:
+            first_sentence = re.split(r"(?<=[.!?])\s", content, maxsplit=1)[0]
+            note = f"Assistant answered: {_clip(first_sentence, 160)}"
+        self.summary = f"{self.summary} {note}".strip() if self.summary else note
+        if len(self.summary) > self.max_summary_chars:
+            # Drop the oldest notes first
+            cut = self.summary.find(" User asked: ", len(self.summary) - self.max_summary_chars)
+            self.summary = self.summary[cut + 1:] if cut >= 0 else self.summary[-self.max_summary_chars:]
+        self.folded += 1
+
+
+def _clip(text, limit):
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+class ReplyStream:
+    """A reply produced on a worker thread; iterate to receive its chunks as they arrive
+
+    The full text so far is in .text; a failure ends the stream with a short
+    error note and sets .error.
+    """
+
+    _DONE = object()
+
+    def __init__(self, chunks=None, executor=None, text=None):
+        self.text = ""
+        self.error = None
+        self._queue = queue.Queue()
+        if text is not None:
+            self._queue.put(text)
+            self._queue.put(self._DONE)
+        else:
+            executor.submit(self._produce, chunks)
+
+    def _produce(self, chunks):
+        try:
+            for chunk in chunks():
+                if chunk:
+                    self._queue.put(chunk)
+        except Exception as e:
+            self.error = str(e)
+            logger.warning("Assistant reply failed: %s", e)
+            self._queue.put(f"\n\n_(The assistant is unavailable right now: {e})_")
+        finally:
+            self._queue.put(self._DONE)
+
+    def __iter__(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is self._DONE:
+                return
+            self.text += chunk
+            yield chunk
+
+
+class StubBackend:
+    """Local backend for development and tests; streams a canned reply word by word"""
+
+    def __init__(self, delay=0.03):
+        self.delay = delay
+
+    def stream(self, messages):
+        question = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        reply = (f"🤖 You asked '{question}'. This is the local test assistant; set ASSISTANT_BACKEND=openai "
+                 "to connect a model. Counts, totals and averages over the loaded ponds are answered "
+                 "from the data directly.")
+        for word in re.findall(r"\S+\s*", reply):
+            time.sleep(self.delay)
+            yield word
+
+
+class ChatCompletionsBackend:
+    """OpenAI-compatible /chat/completions endpoint, streamed as server-sent events"""
+
+    def __init__(self, url=ASSISTANT_URL, model=ASSISTANT_MODEL, api_key=None, timeout=(5, 60)):
+        self.url = url
+        self.model = model
+        self.api_key = api_key or os.environ.get("ASSISTANT_API_KEY") or os.environ.get("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("ASSISTANT_API_KEY is not set")
+        self.timeout = timeout
+        import requests
+        self.session = requests.Session()
+
+    def stream(self, messages):
+        response = self.session.post(
+            self.url,
+            json={"model": self.model, "messages": messages, "stream": True},
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=self.timeout,
+            stream=True,
+        )
+        with response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                choices = json.loads(data).get("choices") or [{}]
+                yield (choices[0].get("delta") or {}).get("content") or ""
+
+
+BACKENDS = {
+    "stub": StubBackend,
+    "openai": ChatCompletionsBackend,
+}
+
+
+def make_backend(name=ASSISTANT_BACKEND):
+    """Backend registered under name, falling back to the stub when it can't be set up"""
+    try:
+        return BACKENDS[name]()
+    except (KeyError, ValueError) as e:
+        logger.warning("Assistant backend %r unavailable (%s); using the local stub", name, e)
+        return StubBackend()
+
+
+class Assistant:
+    """Answers from the loaded data when it can, else streams a backend reply from executor"""
+
+    def __init__(self, backend, executor):
+        self.backend = backend
+        self._executor = executor
+
+    def reply(self, question, history, df=None):
+        """ReplyStream answering question; history is read, not updated"""
+        context = "No pond data is loaded."
+        if df is not None:
+            # Not imported before: with a DataFrame loaded, pandas already is
+            from data_answers import answer_from_frame, data_context
+            try:
+                answer = answer_from_frame(question, df)
+            except Exception as e:  # An odd column type shouldn't break the chat
+                logger.warning("Could not answer %r from the loaded data: %s", question, e)
+                answer = None
+            if answer is not None:
+                return ReplyStream(text=answer)
+            context = data_context(df)
+        messages = history.prompt(SYSTEM_PROMPT, context) + [{"role": "user", "content": question}]
+        return ReplyStream(lambda: self.backend.stream(messages), self._executor)
@@ -0,0 +1,154 @@
+"""Run a file of pond queries headlessly and write one Parquet file per query
+
+For nightly reports without a browser. Each line of the queries file is
+either a plain question or a JSON object with "query" and optionally "name"
+and "appliedFilters"; blank lines and lines starting with # are skipped:
+
+    # nightly.txt
+    ponds with > 80 doc but not done any harvest
+    {"name": "late-harvest", "query": "ponds with > 120 doc"}
+
+Queries run --concurrency at a time, each following pagination to the last
+page with --page-workers parallel page requests, and a timing summary is
+printed at the end:
+
+    python batch_queries.py nightly.txt --out reports/ --concurrency 4
+    PONDS_API_URL=http://127.0.0.1:8800/api/getFarmPonds python batch_queries.py nightly.txt
+
+Exits with status 1 if any query failed.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# One JSON line per span would drown the summary
+os.environ.setdefault("PERF_LOG_LEVEL", "WARNING")
+
+from export import export_all  # noqa: E402
+from http_client import PondsClient  # noqa: E402
+from perf import PERF  # noqa: E402
+from ponds_core import request_ponds_page  # noqa: E402
+from transport import TRANSPORT_HEADERS  # noqa: E402
+
+SUMMARY_STAGES = ("http_round_trip", "stream_decode", "arrow_decode", "date_parse")
+
+
+def read_queries(path):
+    """[{"name", "query", "applied_filters"}] from a queries file, names made unique"""
+    queries = []
+    names = set()
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: invalid JSON: {e}") from None
+                if not entry.get("query"):
+                    raise ValueError(f"{path}:{number}: missing \"query\"")
+            else:
+                entry = {"query": line}
+            name = _slug(entry.get("name") or entry["query"]) or f"query-{number}"
+            unique = name
+            suffix = 2
+            while unique in names:
+                unique = f"{name}-{suffix}"
+                suffix += 1
+            names.add(unique)
+            queries.append({"name": unique, "query": entry["query"],
+                            "applied_filters": entry.get("appliedFilters")})
+    return queries
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-")[:60]
+
+
+def run_query(fetch_page, entry, out_dir, page_size, page_workers):
+    """Fetch every page of one query into out_dir/<name>.parquet; returns a summary dict"""
+    path = os.path.join(out_dir, f"{entry['name']}.parquet")
+    started = time.perf_counter()
+    try:
+        _, rows = export_all(fetch_page, entry["query"], path, fmt="parquet",
+                             applied_filters=entry["applied_filters"], page_size=page_size,
+                             max_workers=page_workers)
+        error = None
+    except Exception as e:
+        rows = 0
+        error = str(e)
+    seconds = time.perf_counter() - started
+    return {
+        "name": entry["name"],
+        "query": entry["query"],
+        "path": None if error else path,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_s": rows / seconds if seconds else 0.0,
+        "mib": os.path.getsize(path) / 2 ** 20 if not error else 0.0,
+        "error": error,
+    }
+
+
+def print_summary(results, wall_seconds, client):
+    print(f"{'query':<48} {'rows':>9} {'seconds':>8} {'rows/s':>10} {'MiB':>7}  status")
+    for r in results:
+        status = "ok" if r["error"] is None else f"FAILED: {r['error']}"
+        print(f"{r['name'][:48]:<48} {r['rows']:>9,} {r['seconds']:>8.2f} {r['rows_per_s']:>10,.0f} "
+              f"{r['mib']:>7.2f}  {status}")
+    rows = sum(r["rows"] for r in results)
+    failed = sum(r["error"] is not None for r in results)
+    print(f"\n{len(results)} queries ({failed} failed), {rows:,} rows in {wall_seconds:.2f}s "
+          f"({rows / wall_seconds if wall_seconds else 0:,.0f} rows/s)")
+    stats = client.stats.snapshot()
+    print(f"API: {stats['requests']} requests, {stats['retries']} retries, {stats['failures']} failures")
+    for stage in PERF.summary():
+        if stage["stage"] in SUMMARY_STAGES:
+            print(f"  {stage['stage']:<16} x{stage['count']:<5} p50 {stage['p50_ms']:>8.1f} ms  "
+                  f"p95 {stage['p95_ms']:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", help="file with one query per line")
+    parser.add_argument("--out", default="reports", help="directory for the Parquet files")
+    parser.add_argument("--concurrency", type=int, default=4, help="queries running at once")
+    parser.add_argument("--page-workers", type=int, default=2, help="parallel page requests per query")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--url", help="API endpoint, defaults to PONDS_API_URL")
+    parser.add_argument("--transport", choices=list(TRANSPORT_HEADERS), help="defaults to PONDS_TRANSPORT")
+    parser.add_argument("--summary-json", help="also write the per-query summary to this file")
+    args = parser.parse_args()
+
+    try:
+        queries = read_queries(args.queries)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    os.makedirs(args.out, exist_ok=True)
+
+    client = PondsClient(pool_size=max(1, args.concurrency * args.page_workers))
+    fetch_page = partial(request_ponds_page, client, url=args.url, transport=args.transport)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency), thread_name_prefix="batch-query") as pool:
+        results = list(pool.map(
+            lambda entry: run_query(fetch_page, entry, args.out, args.page_size, args.page_workers),
+            queries
+        ))
+    print_summary(results, time.perf_counter() - started, client)
+
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if any(r["error"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
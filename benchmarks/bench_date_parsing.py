@@ -0,0 +1,106 @@
+"""Compare format='mixed' date parsing with the DateSchemaRegistry on synthetic pages
+
+cold includes format inference on a fresh registry, warm reuses formats
+inferred from an earlier page. diffs counts values where the two paths
+disagree; format='mixed' with dayfirst=True swaps day and month in ISO
+strings such as 2023-10-11T00:07:00.000Z, which the registry parses as ISO.
+
+Run from the repository root:
+
+    python benchmarks/bench_date_parsing.py
+    python benchmarks/bench_date_parsing.py --sizes 100 1000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from date_schema import DateSchemaRegistry, parse_mixed  # noqa: E402
+
+# Shapes seen in /api/getFarmPonds responses
+COLUMN_FORMATS = {
+    "datalastupdated": "%d-%m-%Y %H:%M:%S",
+    "feedlastupdated": "%Y-%m-%dT%H:%M:%S.000Z",
+    "nettinglastupdatedat": "%d/%m/%Y",
+}
+# Occasional off-format values; the feed column stays timezone-aware because
+# format='mixed' refuses to mix aware and naive values in one column
+ODD_FORMATS = {
+    "datalastupdated": "%d %b %Y",
+    "feedlastupdated": "%d/%m/%Y %H:%M:%S+00:00",
+    "nettinglastupdatedat": "%d %b %Y",
+}
+
+
+def make_page(rows, seed=0, odd_ratio=0.01):
+    """Synthetic page of date strings, with a few nulls and off-format values"""
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    data = {}
+    for col, fmt in COLUMN_FORMATS.items():
+        values = []
+        for _ in range(rows):
+            roll = rng.random()
+            ts = start + timedelta(minutes=rng.randrange(2 * 365 * 24 * 60))
+            if roll < odd_ratio / 2:
+                values.append(None)
+            elif roll < odd_ratio:
+                values.append(ts.strftime(ODD_FORMATS[col]))
+            else:
+                values.append(ts.strftime(fmt))
+        data[col] = values
+    return pd.DataFrame(data)
+
+
+def time_it(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'mixed (s)':>11} {'cold (s)':>10} {'warm (s)':>10} {'speedup':>8}  {'diffs':>6}")
+    for rows in args.sizes:
+        page = make_page(rows)
+
+        def run_mixed():
+            return {col: parse_mixed(page[col]) for col in COLUMN_FORMATS}
+
+        def run_cold():
+            registry = DateSchemaRegistry()
+            return {col: registry.parse(col, page[col]) for col in COLUMN_FORMATS}
+
+        warm_registry = DateSchemaRegistry()
+        for col in COLUMN_FORMATS:
+            warm_registry.parse(col, page[col].head(64))
+
+        def run_warm():
+            return {col: warm_registry.parse(col, page[col]) for col in COLUMN_FORMATS}
+
+        mixed = time_it(run_mixed, args.repeat)
+        cold = time_it(run_cold, args.repeat)
+        warm = time_it(run_warm, args.repeat)
+
+        expected, actual = run_mixed(), run_warm()
+        diffs = sum(
+            int(((expected[col] != actual[col]) & ~(expected[col].isna() & actual[col].isna())).sum())
+            for col in COLUMN_FORMATS
+        )
+        print(f"{rows:>8} {mixed:>11.4f} {cold:>10.4f} {warm:>10.4f} {mixed / warm:>7.1f}x  {diffs:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""End-to-end fetch-to-DataFrame benchmark against the local stub server
+
+For each dataset size a fresh stub_server.py is started in a subprocess (so
+its JSON encoding doesn't share our GIL) and the page fetch the dashboard
+uses, ponds_core.request_ponds_page, is driven through a PondsClient:
+
+  sessions  --sessions concurrent users each page through --pages pages of
+            --per-page rows from a random offset; reports per-page p50/p95
+  full      one export-style pass over every row with --workers threads and
+            pages of --page-size; reports rows/s
+  peak MiB  tracemalloc peak while the sessions workload runs again
+
+Run from the repository root:
+
+    python benchmarks/bench_fetch.py
+    python benchmarks/bench_fetch.py --sizes 1000 10000 --sessions 16 --latency-ms 50
+    python benchmarks/bench_fetch.py --url http://127.0.0.1:8800/api/getFarmPonds --sizes 10000
+
+With --url the sizes are only labels; the server decides how many rows exist.
+--json writes the results for comparison between runs.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# One JSON line per span would swamp the output
+os.environ.setdefault("PERF_LOG_LEVEL", "WARNING")
+
+from http_client import PondsClient  # noqa: E402
+from ponds_core import request_ponds_page  # noqa: E402
+
+QUERY = "all ponds"
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def start_stub(rows, latency_ms, jitter_ms, error_rate):
+    """Run stub_server.py on a free port; returns (process, url)"""
+    # Unbuffered, so the ready line arrives through the pipe without PYTHONUNBUFFERED
+    proc = subprocess.Popen(
+        [sys.executable, "-u", os.path.join(ROOT, "stub_server.py"), "--port", "0", "--rows", str(rows),
+         "--latency-ms", str(latency_ms), "--jitter-ms", str(jitter_ms), "--error-rate", str(error_rate)],
+        stdout=subprocess.PIPE, text=True, cwd=ROOT,
+    )
+    line = proc.stdout.readline()
+    if not line.startswith("Serving"):
+        proc.kill()
+        raise RuntimeError(f"stub server failed to start: {line!r}")
+    return proc, line.split(" on ", 1)[1].strip()
+
+
+def run_sessions(client, url, total_rows, sessions, pages, per_page):
+    """Simulated users paging concurrently; returns (per-page latencies, rows, seconds)"""
+    latencies = []
+    rows = [0]
+    lock = threading.Lock()
+    last_start = max(0, total_rows - pages * per_page)
+
+    def session(seed):
+        rng = random.Random(seed)
+        skip = rng.randrange(0, last_start + 1, per_page)
+        for page in range(pages):
+            started = time.perf_counter()
+            df = request_ponds_page(client, QUERY, skip=skip + page * per_page or None, limit=per_page,
+                                    total_count=total_rows, url=url)[0]
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                rows[0] += len(df)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(session, range(sessions)))
+    return latencies, rows[0], time.perf_counter() - started
+
+
+def run_full(client, url, total_rows, workers, page_size):
+    """Fetch every row once, export-style; returns (rows, seconds)"""
+    def fetch(skip):
+        return len(request_ponds_page(client, QUERY, skip=skip or None, limit=page_size,
+                                      total_count=total_rows, url=url)[0])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        rows = sum(pool.map(fetch, range(0, total_rows, page_size)))
+    return rows, time.perf_counter() - started
+
+
+def bench_size(url, rows, args):
+    client = PondsClient(pool_size=max(args.sessions, args.workers))
+    # Warm the connection pool and the date format registry
+    request_ponds_page(client, QUERY, limit=args.per_page, url=url)
+
+    latencies, _, _ = run_sessions(client, url, rows, args.sessions, args.pages, args.per_page)
+    full_rows, full_seconds = run_full(client, url, rows, args.workers, args.page_size)
+
+    tracemalloc.start()
+    run_sessions(client, url, rows, args.sessions, args.pages, args.per_page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = client.stats.snapshot()
+    return {
+        "rows": rows,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "full_rows": full_rows,
+        "full_s": full_seconds,
+        "rows_per_s": full_rows / full_seconds if full_seconds else 0.0,
+        "peak_mib": peak / 2 ** 20,
+        "retries": stats["retries"],
+        "failures": stats["failures"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--url", help="benchmark an already running server instead of starting stubs")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent simulated users")
+    parser.add_argument("--pages", type=int, default=10, help="pages each user walks through")
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4, help="threads for the full pass")
+    parser.add_argument("--page-size", type=int, default=500, help="page size for the full pass")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.pages} pages of {args.per_page}; "
+          f"full pass {args.workers} workers x {args.page_size} rows")
+    print(f"{'rows':>9} {'p50 ms':>8} {'p95 ms':>8} {'full s':>8} {'rows/s':>10} {'peak MiB':>9} {'retries':>8} {'failed':>7}")
+    results = []
+    for rows in args.sizes:
+        proc = None
+        try:
+            if args.url:
+                url = args.url
+            else:
+                proc, url = start_stub(rows, args.latency_ms, args.jitter_ms, args.error_rate)
+            r = bench_size(url, rows, args)
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+        results.append(r)
+        print(f"{r['rows']:>9} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['full_s']:>8.2f} "
+              f"{r['rows_per_s']:>10,.0f} {r['peak_mib']:>9.1f} {r['retries']:>8} {r['failures']:>7}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
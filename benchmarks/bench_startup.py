@@ -0,0 +1,165 @@
+"""Cold-start report: import cost and first script run of the dashboards
+
+Every repeat starts a fresh interpreter (python -X importtime) that imports
+Streamlit, then runs an app twice through streamlit.testing's AppTest, as
+the first and the next session of a newly started process would. Reported
+per app, as medians over --repeats:
+
+  first run    the first script run, including the app's own imports
+  next run     a rerun with every import and process-wide cache in place
+  imports      the packages imported from then on (the background warm-up
+               included), by cumulative time
+  startup      the once-per-process stages recorded in startup.STARTUP,
+               including the background warm-up
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --apps farm_ponds_app.py --repeats 5 --json startup.json
+    python benchmarks/bench_startup.py --max-first-run-ms 1500   # exit 1 above this
+
+No API is called: the apps only fetch on request, and the warm-up's
+connection goes to a closed local port.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = "bench-startup: app run starts"
+
+
+def child(app):
+    """Runs in the fresh interpreter; prints one JSON line of timings"""
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    started = time.perf_counter()
+    import streamlit  # noqa: F401
+    from streamlit.testing.v1 import AppTest
+    streamlit_ms = (time.perf_counter() - started) * 1000
+
+    print(MARKER, file=sys.stderr, flush=True)
+    at = AppTest.from_file(os.path.join(ROOT, app), default_timeout=120)
+    started = time.perf_counter()
+    at.run()
+    first_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    at.run()
+    next_ms = (time.perf_counter() - started) * 1000
+
+    for thread in threading.enumerate():
+        if thread.name == "startup-warmup":
+            thread.join(30)
+    startup = sys.modules.get("startup")
+    print(json.dumps({
+        "streamlit_ms": streamlit_ms,
+        "first_run_ms": first_ms,
+        "next_run_ms": next_ms,
+        "exceptions": [str(e.value) for e in at.exception],
+        "startup": {row["stage"]: row["ms"] for row in startup.STARTUP.rows()} if startup else {},
+    }))
+
+
+def parse_importtime(stderr):
+    """{top-level package: cumulative ms} of the modules imported after MARKER"""
+    packages = defaultdict(float)
+    seen_marker = False
+    for line in stderr.splitlines():
+        if line.startswith(MARKER):
+            seen_marker = True
+            continue
+        if not seen_marker or not line.startswith("import time:"):
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            cumulative = int(cumulative)
+        except ValueError:
+            continue  # the header line
+        if name.startswith("  "):
+            continue  # Counted in the module that imported it
+        packages[name.strip().split(".")[0]] += cumulative / 1000
+    return packages
+
+
+def run_once(app):
+    env = dict(os.environ)
+    env.update({
+        "PERF_LOG_LEVEL": "WARNING",
+        "PONDS_API_URL": "http://127.0.0.1:9/api/getFarmPonds",
+        "FEEDBACK_SPOOL_DIR": os.path.join(tempfile.gettempdir(), "aqua_feedback_bench"),
+    })
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child", app],
+        capture_output=True, text=True, env=env, cwd=ROOT, timeout=300,
+    )
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode or not lines:
+        raise RuntimeError(f"{app} failed to start:\n{proc.stderr[-2000:]}")
+    result = json.loads(lines[-1])
+    result["imports"] = parse_importtime(proc.stderr)
+    return result
+
+
+def summarize(app, runs, top):
+    median = statistics.median
+    imports = defaultdict(list)
+    for run in runs:
+        for package, ms in run["imports"].items():
+            imports[package].append(ms)
+    stages = defaultdict(list)
+    for run in runs:
+        for stage, ms in run["startup"].items():
+            stages[stage].append(ms)
+    return {
+        "app": app,
+        "repeats": len(runs),
+        "streamlit_ms": median(r["streamlit_ms"] for r in runs),
+        "first_run_ms": median(r["first_run_ms"] for r in runs),
+        "next_run_ms": median(r["next_run_ms"] for r in runs),
+        "imports_ms": dict(sorted(((p, median(v)) for p, v in imports.items()), key=lambda item: -item[1])[:top]),
+        "startup_ms": {stage: median(v) for stage, v in stages.items()},
+        "exceptions": sorted({e for r in runs for e in r["exceptions"]}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", nargs="+", default=["farm_ponds_app.py", "app.py"])
+    parser.add_argument("--repeats", type=int, default=3, help="fresh processes per app")
+    parser.add_argument("--top", type=int, default=8, help="packages listed under imports")
+    parser.add_argument("--max-first-run-ms", type=float, help="exit 1 if an app's median first run is slower")
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+
+    results = []
+    for app in args.apps:
+        r = summarize(app, [run_once(app) for _ in range(args.repeats)], args.top)
+        results.append(r)
+        print(f"{app}: first run {r['first_run_ms']:.0f} ms, next run {r['next_run_ms']:.0f} ms "
+              f"(import streamlit {r['streamlit_ms']:.0f} ms, median of {r['repeats']})")
+        print("  imports:  " + ", ".join(f"{p} {ms:.0f} ms" for p, ms in r["imports_ms"].items()))
+        if r["startup_ms"]:
+            print("  startup:  " + ", ".join(f"{s} {ms:.0f} ms" for s, ms in r["startup_ms"].items()))
+        for error in r["exceptions"]:
+            print(f"  exception: {error}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+    if args.max_first_run_ms and any(r["first_run_ms"] > args.max_first_run_ms for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
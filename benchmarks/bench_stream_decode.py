@@ -0,0 +1,80 @@
+"""Compare PondsStreamDecoder with json.loads + DataFrame on response bodies
+
+Bodies come from the stub server's dataset. nested rows carry a small
+object per row, which stops the decoder's buffer cuts from always landing
+on row boundaries. The decoder is fed the body in --read-bytes pieces, as
+ponds_core reads it. Times are the best of --repeat.
+
+Run from the repository root:
+
+    python benchmarks/bench_stream_decode.py
+    python benchmarks/bench_stream_decode.py --sizes 100 500 --repeat 50
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stream_decode import PondsStreamDecoder, iter_chunks  # noqa: E402
+from stub_server import PondDataset  # noqa: E402
+
+
+def make_body(rows, nested=False):
+    page = PondDataset(rows).frame(np.arange(rows))
+    records = json.loads(page.to_json(orient="records"))
+    if nested:
+        for i, record in enumerate(records):
+            record["lastReading"] = {"ph": 7.5, "do": {"mgL": 5 + i % 3}}
+    body = {"data": records, "cypher": "MATCH (p:Pond) RETURN p", "totalCount": rows, "totalAcres": 1.0}
+    return json.dumps(body).encode("utf-8")
+
+
+def plain(body):
+    return pd.DataFrame(json.loads(body)["data"])
+
+
+def streamed(body, read_bytes, chunk_rows):
+    decoder = PondsStreamDecoder(chunk_rows=chunk_rows)
+    pieces = (body[i:i + read_bytes] for i in range(0, len(body), read_bytes))
+    chunks = list(iter_chunks(pieces, decoder))
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+
+def time_it(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 5000, 50000])
+    parser.add_argument("--read-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--chunk-rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'rows are':>8} {'KiB':>8} {'json.loads ms':>14} {'decoder ms':>11} {'ratio':>6}")
+    for rows in args.sizes:
+        for nested in (False, True):
+            body = make_body(rows, nested)
+            repeat = max(3, args.repeat * 500 // max(rows, 500))
+            expected = plain(body)
+            pd.testing.assert_frame_equal(streamed(body, args.read_bytes, args.chunk_rows), expected)
+            loads = time_it(lambda: plain(body), repeat)
+            decoder = time_it(lambda: streamed(body, args.read_bytes, args.chunk_rows), repeat)
+            print(f"{rows:>7} {'nested' if nested else 'flat':>8} {len(body) / 1024:>8.0f} {loads * 1000:>14.2f} "
+                  f"{decoder * 1000:>11.2f} {decoder / loads:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
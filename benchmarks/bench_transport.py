@@ -0,0 +1,95 @@
+"""Bytes on the wire and decode time per transport format
+
+Starts one stub_server.py subprocess and fetches the same pages through
+ponds_core.request_ponds_page with each transport (json, gzip, arrow),
+reporting per page size the median wire bytes, decode and end-to-end time.
+
+Run from the repository root:
+
+    python benchmarks/bench_transport.py
+    python benchmarks/bench_transport.py --page-sizes 100 5000 --latency-ms 80
+    python benchmarks/bench_transport.py --url http://127.0.0.1:8800/api/getFarmPonds
+
+Against a server without Arrow support the arrow row shows the JSON fallback.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("PERF_LOG_LEVEL", "WARNING")
+
+from bench_fetch import QUERY, start_stub  # noqa: E402
+from http_client import PondsClient  # noqa: E402
+from perf import PERF  # noqa: E402
+from ponds_core import request_ponds_page  # noqa: E402
+from transport import TRANSPORT_HEADERS  # noqa: E402
+
+
+def bench_transport(client, url, transport, page_size, repeats):
+    totals, decodes, wire = [], [], []
+    for i in range(repeats):
+        PERF.reset()
+        started = time.perf_counter()
+        df = request_ponds_page(client, QUERY, skip=i * page_size or None, limit=page_size, url=url,
+                                transport=transport)[0]
+        totals.append(time.perf_counter() - started)
+        for row in PERF.summary():
+            if row["stage"] in ("stream_decode", "arrow_decode"):
+                decodes.append(row["p50_ms"])
+                wire.append(row["last_wire_bytes"] or 0)
+                stage = row["stage"]
+    return {
+        "transport": transport,
+        "page_size": page_size,
+        "rows": len(df),
+        "decoded_as": stage.split("_")[0],
+        "wire_kib": statistics.median(wire) / 1024,
+        "decode_ms": statistics.median(decodes),
+        "total_ms": statistics.median(totals) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="ponds in the stub dataset")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--transports", nargs="+", default=list(TRANSPORT_HEADERS), choices=list(TRANSPORT_HEADERS))
+    parser.add_argument("--repeats", type=int, default=5, help="pages fetched per combination")
+    parser.add_argument("--url", help="benchmark an already running server instead of starting a stub")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    proc = None
+    if args.url:
+        url = args.url
+    else:
+        proc, url = start_stub(args.rows, args.latency_ms, 0, 0.0)
+    results = []
+    try:
+        client = PondsClient()
+        request_ponds_page(client, QUERY, limit=10, url=url)  # warm the pool and date formats
+        print(f"{'transport':>9} {'page':>6} {'decoded':>8} {'wire KiB':>9} {'decode ms':>10} {'total ms':>9}")
+        for page_size in args.page_sizes:
+            for transport in args.transports:
+                r = bench_transport(client, url, transport, page_size, args.repeats)
+                results.append(r)
+                print(f"{r['transport']:>9} {r['page_size']:>6} {r['decoded_as']:>8} {r['wire_kib']:>9.1f} "
+                      f"{r['decode_ms']:>10.2f} {r['total_ms']:>9.2f}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
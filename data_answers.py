@@ -0,0 +1,127 @@
+"""Answers to aggregate questions computed from the pond data already loaded
+
+"how many ponds above 90 DOC" or "average acres of ponds over 80 doc" is
+normalized with canonical_query, its conditions are evaluated with
+filter_engine and the aggregate is taken over the DataFrame, with no remote
+call. A question is only answered here when every word of it is accounted
+for; "count ponds in Andhra" or "how many ponds with doc 90" go to the
+backend rather than being answered as if the unread words weren't there.
+"""
+import re
+
+import pandas as pd
+
+from filter_engine import UnsupportedFilter, filter_mask, resolve_column
+from translation_cache import canonical_query
+
+# Question words -> pandas aggregate, longest phrases first
+AGGREGATES = [
+    ("how many", "count"), ("number of", "count"), ("count", "count"),
+    ("average", "mean"), ("avg", "mean"), ("mean", "mean"),
+    ("total", "sum"), ("sum", "sum"),
+    ("maximum", "max"), ("highest", "max"), ("largest", "max"), ("max", "max"),
+    ("minimum", "min"), ("lowest", "min"), ("smallest", "min"), ("min", "min"),
+]
+AGGREGATE_WORDS = {word for phrase, _ in AGGREGATES for word in canonical_query(phrase).split()}
+AGGREGATE_NAMES = {"mean": "Average", "sum": "Total", "max": "Highest", "min": "Lowest"}
+
+# Words a question may carry besides its aggregate, target column and conditions
+SUBJECT_WORDS = {"and", "pond", "ponds", "loaded", "data", "currently", "do", "i", "we", "my", "our",
+                 "these", "those", "value"}
+
+# canonical_query drops these, but a question with them asks for ponds, not a number
+POND_QUESTION_WORDS = ("which", "who", "whose")
+
+# Said in questions but not spelled as comparisons by canonical_query
+EXTRA_COMPARISONS = [(r"\bover\b", "above"), (r"\bunder\b", "below")]
+
+COMPARISON = r"(>=|<=|!=|[<>=])"
+NUMBER = r"(-?\d+(?:\.\d+)?)"
+
+
+def _column(word, df):
+    """Column of df named word (or its singular), else None"""
+    for name in (word, word[:-1] if word.endswith("s") else None):
+        if name:
+            try:
+                return resolve_column(name, df.columns)
+            except UnsupportedFilter:
+                pass
+    return None
+
+
+def _conditions(text, df):
+    """appliedFilters-style conditions like "doc > 90" or "> 90 doc" in canonical text, and their spans"""
+    filters = []
+    taken = []  # Spans already used, so "doc > 90 acres" isn't read twice
+    patterns = (
+        (rf"(?P<field>[a-z_]\w*) {COMPARISON} {NUMBER}", 2),
+        (rf"{COMPARISON} {NUMBER} (?P<field>[a-z_]\w*)", 1),
+    )
+    for pattern, op_group in patterns:
+        for match in re.finditer(pattern, text):
+            if any(start < match.end() and match.start() < end for start, end in taken):
+                continue
+            col = _column(match.group("field"), df)
+            if col is None or not pd.api.types.is_numeric_dtype(df[col]):
+                continue
+            value = float(match.group(op_group + 1))
+            filters.append({"field": col, "operator": match.group(op_group), "value": value})
+            taken.append(match.span())
+    return filters, taken
+
+
+def answer_from_frame(question, df):
+    """Answer a count/sum/average/min/max question from df, or None when it isn't one
+
+    None too when a word of the question is neither the aggregate, the
+    column aggregated, a condition nor one of SUBJECT_WORDS.
+    """
+    if df is None or not len(df.columns):
+        return None
+    lowered = f" {str(question).lower()} "
+    how = next((agg for phrase, agg in AGGREGATES if f" {phrase} " in lowered), None)
+    if how is None or any(f" {word} " in lowered for word in POND_QUESTION_WORDS):
+        return None
+    for pattern, phrase in EXTRA_COMPARISONS:
+        lowered = re.sub(pattern, phrase, lowered)
+    text = canonical_query(lowered)
+    filters, spans = _conditions(text, df)
+    target = None
+    for word in re.finditer(r"\S+", text):
+        if any(start <= word.start() < end for start, end in spans):
+            continue
+        if word.group() in AGGREGATE_WORDS or word.group() in SUBJECT_WORDS:
+            continue
+        col = _column(word.group(), df) if how != "count" and target is None else None
+        if col is None or not pd.api.types.is_numeric_dtype(df[col]):
+            return None  # A word we can't account for, e.g. a region or an unsupported condition
+        # The first numeric column named outside the conditions is the one aggregated
+        target = col
+    if how != "count" and target is None:
+        return None
+
+    mask = filter_mask(df, filters)
+    matched = int(mask.sum())
+    where = " and ".join(f"{f['field']} {f['operator']} {f['value']:g}" for f in filters)
+    if how == "count":
+        if not where:
+            return f"There are **{len(df):,}** ponds in the loaded data."
+        return f"**{matched:,}** of the {len(df):,} loaded ponds have {where}."
+    if not matched:
+        return f"None of the {len(df):,} loaded ponds have {where}." if where else "No ponds are loaded."
+    value = float(getattr(pd.to_numeric(df.loc[mask, target], errors="coerce"), how)())
+    shown = f"{value:,.0f}" if value.is_integer() else f"{value:,.2f}"
+    return f"{AGGREGATE_NAMES[how]} {target} of the {matched:,} matching ponds " \
+           f"(of {len(df):,} loaded{', ' + where if where else ''}): **{shown}**."
+
+
+def data_context(df):
+    """Short description of the loaded data for the prompt"""
+    lines = [f"The user has {len(df):,} ponds loaded with columns: {', '.join(map(str, df.columns))}."]
+    numeric = df.select_dtypes("number")
+    if len(numeric.columns) and len(df):
+        stats = numeric.agg(["min", "mean", "max"]).round(2)
+        for col in stats.columns:
+            lines.append(f"{col}: min {stats.at['min', col]}, mean {stats.at['mean', col]}, max {stats.at['max', col]}")
+    return "\n".join(lines)
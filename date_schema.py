@@ -0,0 +1,130 @@
+"""Per-column datetime format inference so pages parse on pandas' fixed-format path"""
+import threading
+
+import pandas as pd
+
+# Day-first formats come before month-first ones, matching dayfirst=True
+CANDIDATE_FORMATS = [
+    "ISO8601",
+    "%d-%m-%Y %H:%M:%S",
+    "%d-%m-%Y %H:%M",
+    "%d-%m-%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+    "%d-%m-%Y %I:%M:%S %p",
+    "%d/%m/%Y %I:%M:%S %p",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y",
+]
+
+
+def parse_mixed(values):
+    """The original per-element guessing path, kept as the fallback"""
+    return pd.to_datetime(values, dayfirst=True, errors='coerce', format='mixed')
+
+
+class DateSchemaRegistry:
+    """Remembers the concrete datetime format of each column
+
+    The format is inferred once from a sample of the column and reused for
+    every later page. Values that don't match it fall back to parse_mixed, and
+    a column whose values mostly stop matching is re-inferred.
+    """
+
+    def __init__(self, sample_size=64, min_match_ratio=0.9, drift_ratio=0.5):
+        self.sample_size = sample_size
+        self.min_match_ratio = min_match_ratio
+        self.drift_ratio = drift_ratio
+        self._formats = {}  # column -> format, or None when no single format fits
+        self._lock = threading.Lock()
+
+    def format_for(self, column):
+        with self._lock:
+            return self._formats.get(column)
+
+    def forget(self, column=None):
+        with self._lock:
+            if column is None:
+                self._formats.clear()
+            else:
+                self._formats.pop(column, None)
+
+    def infer_format(self, values):
+        """Pick the candidate format that parses the largest share of a sample"""
+        sample = values.dropna()
+        sample = sample[sample.astype(str).str.strip() != ""].head(self.sample_size)
+        if sample.empty:
+            return None
+        best, best_matches = None, 0
+        for fmt in CANDIDATE_FORMATS:
+            try:
+                matches = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+            except (ValueError, TypeError):
+                continue
+            if matches > best_matches:
+                best, best_matches = fmt, matches
+                if matches == len(sample):
+                    break
+        if best_matches < self.min_match_ratio * len(sample):
+            return None
+        return best
+
+    def parse(self, column, values):
+        """Convert one column of strings to datetimes"""
+        if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+            return parse_mixed(values)
+
+        with self._lock:
+            known = column in self._formats
+            fmt = self._formats.get(column)
+        if not known:
+            fmt = self.infer_format(values)
+            with self._lock:
+                self._formats[column] = fmt
+        if fmt is None:
+            return parse_mixed(values)
+
+        try:
+            parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+        except (ValueError, TypeError):
+            self.forget(column)
+            return parse_mixed(values)
+
+        failed = parsed.isna() & values.notna() & (values.astype(str).str.strip() != "")
+        n_failed = int(failed.sum())
+        if n_failed:
+            if n_failed > self.drift_ratio * len(values):
+                # The source changed format; infer again on the next page
+                self.forget(column)
+            fallback = parse_mixed(values[failed])
+            parsed = _merge_fallback(parsed, fallback, failed)
+        return parsed
+
+    def parse_frame(self, df, columns):
+        """Convert the given columns of df in place"""
+        for col in columns:
+            df[col] = self.parse(col, df[col])
+        return df
+
+
+def _merge_fallback(parsed, fallback, mask):
+    # Keep the fixed-format result's timezone awareness so the column stays one dtype
+    parsed_tz = getattr(parsed.dt, "tz", None)
+    if pd.api.types.is_datetime64_any_dtype(fallback):
+        fallback_tz = getattr(fallback.dt, "tz", None)
+        if parsed_tz is not None and fallback_tz is None:
+            fallback = fallback.dt.tz_localize(parsed_tz)
+        elif parsed_tz is None and fallback_tz is not None:
+            fallback = fallback.dt.tz_convert(None)
+    else:
+        fallback = pd.to_datetime(fallback, errors='coerce', utc=parsed_tz is not None)
+    parsed = parsed.copy()
+    parsed[mask] = fallback
+    return parsed
+
+
+# Shared by every page fetch in the process, including prefetch and export workers
+DATE_SCHEMAS = DateSchemaRegistry()
@@ -0,0 +1,256 @@
+"""Background delta sync of query results using last-updated timestamps
+
+Instead of downloading a whole result again, a subscription asks the API for
+the ponds changed after the newest datalastupdated/feedlastupdated it has
+seen, and the changed rows are merged into the cached pages and the stored
+result by pond key. One DeltaSync per process polls every watched result on
+its own thread, so sessions showing the same query share one poll, the
+script thread never waits on it, and a failing API is retried with
+exponential backoff.
+
+This needs the API to accept updatedSince and answer with only the ponds
+updated after it, plus the ids of ponds that left the result as
+removedIds. A server that ignores updatedSince is detected on the first
+page of a poll (DeltaUnsupported) and its results aren't polled again.
+"""
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics import find_column
+from http_client import backoff_delay
+from page_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+UPDATED_COLUMNS = ("datalastupdated", "feedlastupdated")
+KEY_COLUMNS = ("pondId", "pond_id", "pondID", "id")
+
+
+def pond_key(columns):
+    """The column identifying a pond, or None"""
+    return next((c for c in KEY_COLUMNS if c in columns), None)
+
+
+class DeltaUnsupported(Exception):
+    """The API answered a delta request with ponds that didn't change, i.e. it ignores updatedSince"""
+
+
+def last_updates(df):
+    """Latest datalastupdated/feedlastupdated of each row as naive UTC Timestamps, or None without those columns
+
+    NaT where a row has neither.
+    """
+    columns = []
+    for name in UPDATED_COLUMNS:
+        col = find_column(df.columns, name)
+        if col is None:
+            continue
+        values = df[col]
+        if not pd.api.types.is_datetime64_any_dtype(values):
+            values = pd.to_datetime(values, errors="coerce", utc=True)
+        if getattr(values.dt, "tz", None) is not None:
+            values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+        columns.append(values.astype("datetime64[ns]"))
+    if not columns:
+        return None
+    return columns[0] if len(columns) == 1 else pd.concat(columns, axis=1).max(axis=1)
+
+
+def newest_update(frames):
+    """Latest datalastupdated/feedlastupdated value in any of frames, as a naive UTC Timestamp"""
+    newest = None
+    for df in frames:
+        if df is None or not len(df):
+            continue
+        updates = last_updates(df)
+        latest = updates.max() if updates is not None else None
+        if pd.notna(latest) and (newest is None or latest > newest):
+            newest = latest
+    return newest
+
+
+def changed_rows(df, since):
+    """Rows of a delta response updated after since (an ISO timestamp)
+
+    A server that supports updatedSince may also return ponds updated at
+    since exactly, which are dropped. Raises DeltaUnsupported when it
+    returned ponds updated before since, or with no update time at all.
+    """
+    if not len(df):
+        return df
+    since = pd.Timestamp(since)
+    if since.tzinfo is not None:
+        since = since.tz_convert("UTC").tz_localize(None)
+    updates = last_updates(df)
+    if updates is None:
+        raise DeltaUnsupported("the API's rows carry no datalastupdated or feedlastupdated")
+    older = int((updates.isna() | (updates < since)).sum())
+    if older:
+        raise DeltaUnsupported(f"the API returned {older:,} ponds not updated since {since}, "
+                               "so it doesn't support updatedSince")
+    return df[(updates > since).to_numpy()]
+
+
+def merge_changes(df, changes, removed_ids, key):
+    """df with the rows of changed ponds replaced in place and removed ponds dropped
+
+    Returns a new frame (df is shared with the page cache and never
+    modified); ponds in changes that df doesn't hold are not added.
+    """
+    if key is None or key not in df.columns or not len(df):
+        return df
+    keys = df[key]
+    changed = changes.drop_duplicates(key, keep="last").set_index(key) if len(changes) else None
+    hit = keys.isin(changed.index).to_numpy() if changed is not None else None
+    gone = keys.isin(list(removed_ids)).to_numpy() if removed_ids else None
+    if (hit is None or not hit.any()) and (gone is None or not gone.any()):
+        return df
+
+    positions = pd.RangeIndex(len(df))
+    keep = np.ones(len(df), dtype=bool)
+    if hit is not None:
+        keep &= ~hit
+    if gone is not None:
+        keep &= ~gone
+    parts = [df[keep].set_axis(positions[keep])]
+    if hit is not None and hit.any():
+        updated = changed.loc[keys[hit].to_numpy()].reset_index().reindex(columns=df.columns)
+        parts.append(updated.set_axis(positions[hit]))
+    return pd.concat(parts).sort_index().reset_index(drop=True)
+
+
+class DeltaSubscription:
+    """Polling state of one query result"""
+
+    def __init__(self, query, applied_filters, since, interval):
+        self.query = query
+        self.applied_filters = applied_filters
+        self.since = since
+        self.interval = interval
+        self.next_due = time.monotonic() + interval
+        self.watched_at = time.monotonic()
+        self.polling = False
+        self.failures = 0
+        self.last_error = None
+        self.last_checked = None  # wall-clock time of the last successful poll
+        # Bumped every time changes were merged; sessions compare it with the
+        # version they last showed
+        self.version = 0
+        self.total_count = None
+        self.total_acres = None
+        self.rows_changed = 0
+        self.rows_removed = 0
+        self.unsupported = None  # Why polling stopped for good, see DeltaUnsupported
+
+    def retry_in(self):
+        return max(0.0, self.next_due - time.monotonic())
+
+
+class DeltaSync:
+    """Process-wide scheduler polling watched results for changed ponds
+
+    fetch_changes(query, applied_filters, updated_since) returns
+    (changes DataFrame, removed pond ids, total_count, total_acres) for the
+    ponds changed after updated_since, and raises DeltaUnsupported when the
+    API can't answer that; the subscription then stops polling. apply_changes(subscription, changes,
+    removed_ids, total_count, total_acres) merges them into the caches and
+    returns how many held ponds it dropped. Both run on executor threads and must not touch Streamlit.
+    """
+
+    def __init__(self, fetch_changes, apply_changes, executor, interval=30, max_interval=600, idle_seconds=300):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.idle_seconds = idle_seconds
+        self._fetch_changes = fetch_changes
+        self._apply_changes = apply_changes
+        self._executor = executor
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def watch(self, query, applied_filters, since=None):
+        """Subscription for a result, created on first call; call again to keep it alive
+
+        Results nobody has watched for idle_seconds are dropped.
+        """
+        key = (normalize_query(query), json.dumps(applied_filters or [], sort_keys=True, default=str))
+        with self._lock:
+            subscription = self._subscriptions.get(key)
+            if subscription is None:
+                subscription = DeltaSubscription(query, applied_filters, since, self.interval)
+                self._subscriptions[key] = subscription
+                self._wake.set()
+            elif since is not None and (subscription.since is None or since > subscription.since):
+                subscription.since = since
+            subscription.watched_at = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="delta-sync", daemon=True)
+                self._thread.start()
+        return subscription
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            due = []
+            with self._lock:
+                for key, subscription in list(self._subscriptions.items()):
+                    if now - subscription.watched_at > self.idle_seconds and not subscription.polling:
+                        del self._subscriptions[key]
+                    elif subscription.unsupported is not None:
+                        continue
+                    elif not subscription.polling and subscription.next_due <= now:
+                        subscription.polling = True
+                        due.append(subscription)
+                pending = [s.next_due - now for s in self._subscriptions.values()
+                           if not s.polling and s.unsupported is None]
+            for subscription in due:
+                self._executor.submit(self._poll, subscription)
+            self._wake.wait(timeout=min([self.interval] + [max(0.1, p) for p in pending]))
+
+    def _poll(self, subscription):
+        try:
+            if subscription.since is None:
+                # Nothing held yet to compare against; wait for a first fetch
+                delay = subscription.interval
+            else:
+                changes, removed_ids, total_count, total_acres = self._fetch_changes(
+                    subscription.query, subscription.applied_filters, subscription.since.isoformat()
+                )
+                if len(changes) or removed_ids:
+                    dropped = self._apply_changes(subscription, changes, removed_ids, total_count, total_acres)
+                    subscription.rows_changed += len(changes)
+                    subscription.rows_removed += dropped or 0
+                    subscription.total_count = total_count
+                    subscription.total_acres = total_acres
+                    subscription.version += 1
+                newest = newest_update([changes])
+                if newest is not None and newest > subscription.since:
+                    subscription.since = newest
+                subscription.failures = 0
+                subscription.last_error = None
+                subscription.last_checked = time.time()
+                delay = subscription.interval
+        except DeltaUnsupported as e:
+            subscription.unsupported = str(e)
+            logger.warning("Delta sync of %r stopped: %s", subscription.query, e)
+            delay = 0
+        except Exception as e:
+            subscription.failures += 1
+            subscription.last_error = str(e)
+            delay = backoff_delay(subscription.interval, subscription.failures, self.max_interval)
+            logger.warning("Delta sync of %r failed (%d in a row), retrying in %.0fs: %s",
+                           subscription.query, subscription.failures, delay, e)
+        finally:
+            subscription.polling = False
+        subscription.next_due = time.monotonic() + delay
+        self._wake.set()
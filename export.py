@@ -0,0 +1,312 @@
+"""Full-result export that streams every page of a query to CSV or Parquet"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from page_cache import normalize_query
+from perf import PERF
+from ponds_core import iter_result_pages
+
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "aqua_exports")
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+def frame_digest(df):
+    """Content hash of a DataFrame (values and column names, not the index)"""
+    h = hashlib.sha1()
+    h.update(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    if len(df):
+        for _, values in df.items():
+            try:
+                h.update(pd.util.hash_pandas_object(values, index=False).values.tobytes())
+            except TypeError:
+                # Lists or dicts in the cells, which pandas can't hash
+                h.update(json.dumps(values.tolist(), sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+class EncodedFrameCache:
+    """Small LRU of encoded DataFrames keyed by content hash
+
+    Lets download buttons encode lazily and only once per distinct page.
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def csv_bytes(self, df):
+        key = ("csv", frame_digest(df))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        with PERF.span("csv_encode", rows=len(df)) as span:
+            data = df.to_csv(index=False).encode("utf-8")
+            span["bytes"] = len(data)
+        with self._lock:
+            self._entries[key] = data
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+
+def export_path(query, applied_filters, total_count, fmt):
+    """Deterministic file path for a full export, so repeat exports reuse it"""
+    key = json.dumps([normalize_query(query), applied_filters or [], total_count, fmt],
+                     sort_keys=True, default=str)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(EXPORT_DIR, f"farm_ponds_{digest}{EXPORT_FORMATS[fmt][1]}")
+
+
+def is_fresh_export(path, max_age_seconds=3600):
+    """True if a finished export exists at path and is recent enough to reuse"""
+    try:
+        return time.time() - os.path.getmtime(path) < max_age_seconds
+    except OSError:
+        return False
+
+
+def read_export(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class _SegmentedSink:
+    """Writes pages to path under the columns seen so far
+
+    A page with columns the file doesn't have yet starts a new segment file
+    under the widened column list (and for Parquet, a page whose values
+    don't fit the column types so far); close() merges the segments into
+    path so no column is dropped. Single-segment exports, the usual case,
+    are written once.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._segments = []
+        self.columns = None
+
+    def write(self, df):
+        new = [c for c in df.columns if c not in (self.columns or ())]
+        if self.columns is None or new:
+            self._start_segment(df, new)
+        self._write(df.reindex(columns=self.columns))
+
+    def _start_segment(self, df, new=()):
+        if self._segments:
+            self._close_segment()
+        self.columns = (self.columns or []) + list(new)
+        segment = self._path if not self._segments else f"{self._path}.{len(self._segments)}"
+        self._segments.append(segment)
+        self._open_segment(segment, df)
+
+    def close(self):
+        if not self._segments:
+            self._write_empty(self._path)
+            return
+        self._close_segment()
+        if len(self._segments) == 1:
+            return
+        merged = self._path + ".merge"
+        try:
+            self._merge(merged)
+            os.replace(merged, self._path)
+        finally:
+            for path in self._segments[1:] + [merged]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def abort(self):
+        try:
+            if self._segments:
+                self._close_segment()
+        finally:
+            for path in self._segments + [self._path]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+class _CsvSink(_SegmentedSink):
+    def _open_segment(self, path, df):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._header = True
+
+    def _write(self, df):
+        df.to_csv(self._file, header=self._header, index=False)
+        self._header = False
+
+    def _close_segment(self):
+        self._file.close()
+
+    def _write_empty(self, path):
+        open(path, "w").close()
+
+    def _merge(self, merged):
+        with open(merged, "w", encoding="utf-8", newline="") as out:
+            header = True
+            for segment in self._segments:
+                # As text, so values are written back exactly as they were
+                for chunk in pd.read_csv(segment, dtype=str, keep_default_na=False, chunksize=50_000):
+                    chunk.reindex(columns=self.columns, fill_value="").to_csv(out, header=header, index=False)
+                    header = False
+
+
+class _ParquetSink(_SegmentedSink):
+    """Parquet segments with one stable type per column
+
+    Pages come compacted one by one (frame_memory.compact_frame), so the same
+    column can be int8 on one page, int16 on the next and categorical on a
+    third. Integers are written as int64, floats as float64 and categoricals
+    as their values, so pages share a schema; a page that still doesn't fit,
+    e.g. text in a numeric column, starts a segment with the column widened
+    to float64 or string, and the merge casts every segment to that.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._pq = pq
+        self._writer = None
+
+    def _open_segment(self, path, df):
+        table = self._table(df.reindex(columns=self.columns))
+        known = self._writer.schema if self._writer is not None else None
+        self._writer = self._pq.ParquetWriter(path, self._widened(known, table.schema))
+
+    def _write(self, df):
+        table = self._table(df)
+        if self._widened(self._writer.schema, table.schema) != self._writer.schema:
+            self._start_segment(df)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def _close_segment(self):
+        self._writer.close()
+
+    def _write_empty(self, path):
+        # No rows at all: still leave a readable (empty) file
+        self._pq.write_table(self._pa.table({}), path)
+
+    def _merge(self, merged):
+        pa = self._pa
+        schema = self._writer.schema  # The widest, as segments only ever widen
+        with self._pq.ParquetWriter(merged, schema) as writer:
+            for segment in self._segments:
+                for batch in self._pq.ParquetFile(segment).iter_batches():
+                    columns = [
+                        batch.column(f.name).cast(f.type) if f.name in batch.schema.names
+                        else pa.nulls(len(batch), f.type)
+                        for f in schema
+                    ]
+                    writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+    def _table(self, df):
+        """df as an Arrow table in the stable column types; all-null columns are typed null"""
+        pa = self._pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        columns = []
+        for column in table.columns:
+            if column.null_count == len(column):
+                columns.append(pa.nulls(len(column)))
+            else:
+                columns.append(column.cast(self._stable_type(column.type)))
+        return pa.Table.from_arrays(columns, names=table.column_names)
+
+    def _stable_type(self, t):
+        pa = self._pa
+        if pa.types.is_dictionary(t):
+            return self._stable_type(t.value_type)
+        if pa.types.is_integer(t) and t != pa.uint64():
+            return pa.int64()
+        if pa.types.is_floating(t):
+            return pa.float64()
+        if pa.types.is_large_string(t):
+            return pa.string()
+        return t
+
+    def _widened(self, known, schema):
+        """Schema holding the values of both the known schema and a page's"""
+        pa = self._pa
+        if known is None:
+            return schema
+        fields = []
+        for name in schema.names:
+            if name not in known.names:
+                fields.append(schema.field(name))
+                continue
+            old, new = known.field(name).type, schema.field(name).type
+            if old == new or pa.types.is_null(new):
+                fields.append(known.field(name))
+            elif pa.types.is_null(old):
+                fields.append(schema.field(name))
+            elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (old, new)):
+                fields.append(pa.field(name, pa.float64()))
+            else:
+                fields.append(pa.field(name, pa.string()))
+        return pa.schema(fields)
+
+
+def export_all(fetch_page, query, path, fmt="csv", applied_filters=None, total_count=None,
+               total_acres=None, page_size=500, max_workers=4, progress=None):
+    """Fetch every page of a query concurrently and stream them to path in order
+
+    fetch_page has the same signature as the page prefetcher's fetch function.
+    At most 2 * max_workers pages are held in memory at once. progress, if
+    given, is called as progress(rows_written, total_count) on the calling
+    thread. Returns (path, rows_written).
+    """
+    pages = iter_result_pages(fetch_page, query, applied_filters, total_count, total_acres, page_size, max_workers)
+    return _write_pages(pages, path, fmt, progress)
+
+
+def export_result(result, path, fmt="csv", where=None, page_size=5000, progress=None):
+    """Stream the stored rows of a result_store.ResultSet selected by where to path
+
+    where is passed to ResultSet.select, e.g. the boolean mask of a local
+    refinement; rows are read page_size at a time. progress and the return
+    value are as for export_all.
+    """
+    def pages():
+        df, matching = result.select(where, skip=0, limit=page_size)
+        yield df, matching
+        for skip in range(page_size, matching, page_size):
+            yield result.select(where, skip=skip, limit=page_size)[0], matching
+
+    return _write_pages(pages(), path, fmt, progress)
+
+
+def _write_pages(pages, path, fmt, progress):
+    """Write (DataFrame, total_count) pages to path through a unique partial file"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # Unique per export, so sessions exporting the same query don't write to one file
+    fd, partial_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".part", dir=directory)
+    os.close(fd)
+
+    sink = _ParquetSink(partial_path) if fmt == "parquet" else _CsvSink(partial_path)
+    rows = 0
+    try:
+        for df, total_count in pages:
+            if not df.empty:
+                sink.write(df)
+                rows += len(df)
+            if progress:
+                progress(rows, total_count)
+        sink.close()
+    except BaseException:
+        sink.abort()
+        raise
+    os.replace(partial_path, path)
+    return path, rows
@@ -1,9 +1,36 @@
+# Imported first so STARTUP times the imports below on the first run
+from startup import STARTUP, StaticAssets, Warmup, png_thumbnail, process_age
+
 import streamlit as st
-import requests
-import pandas as pd
 from datetime import datetime
-from PIL import Image
 import os
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Standard library only; pandas, pyarrow and requests are imported where first
+# needed, so a fresh process draws the header and search box without them
+from page_cache import PageCache, PagePrefetcher
+from perf import PERF
+from translation_cache import TranslationCache
+
+STARTUP.record_elapsed("app_imports")
+
+logger = logging.getLogger(__name__)
+
+# Auto-refresh asks for the ponds changed since the newest update held every
+# AUTO_REFRESH_SECONDS (backing off up to AUTO_REFRESH_MAX_SECONDS while the
+# API fails); open dashboards look for merged changes every
+# AUTO_REFRESH_CHECK_SECONDS
+AUTO_REFRESH_SECONDS = int(os.environ.get("AUTO_REFRESH_SECONDS", "30"))
+AUTO_REFRESH_MAX_SECONDS = 600
+AUTO_REFRESH_CHECK_SECONDS = 5
+
+# Memory budget for cached pages across all sessions, and the share one
+# session's pages may take before its least recently used ones are evicted
+PAGE_CACHE_MAX_BYTES = int(os.environ.get("PAGE_CACHE_MAX_MB", "256")) * 1024 * 1024
+SESSION_CACHE_MAX_BYTES = int(os.environ.get("SESSION_CACHE_MAX_MB", "32")) * 1024 * 1024
 
 # Set page config
 st.set_page_config(
@@ -13,7 +40,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
+PAGE_CSS = """
 <style>
     .main .block-container {
         padding-top: 2rem;
@@ -23,160 +50,664 @@ st.markdown("""
         margin-top: 1rem;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
+
+LOGO_PATH = "aqualogo.png"
+LOGO_WIDTH = 100
+
+@st.cache_resource
+def get_static_assets():
+    """Static files read once per process"""
+    assets = StaticAssets()
+    assets.load("logo", LOGO_PATH)
+    return assets
+
+
+def load_logo():
+    """PNG bytes of the logo; None if the file is missing
+
+    Passing bytes lets st.image serve the file as is instead of re-encoding
+    a PIL image on every run. Once the warm-up has scaled the 500px file to
+    twice the displayed width, sessions get that much smaller copy.
+    """
+    return get_static_assets().get("logo")
+
+
+def _import_data_layer():
+    """Import the modules the first fetch and the panels after it need"""
+    import delta_sync, export, feedback, filter_engine, frame_memory, result_store  # noqa: E401, F401
+
+
+def _new_http_client():
+    from http_client import PondsClient
+    return PondsClient(pool_size=16, connect_timeout=5, read_timeout=90, max_retries=3)
+
+
+def _connected_http_client():
+    """A new shared HTTP client with a connection to the API already open"""
+    import ponds_core
+    client = _new_http_client()
+    try:
+        client.warm(ponds_core.PONDS_API_URL)
+    except Exception as e:
+        logger.warning("Startup warm-up could not connect to the API: %s", e)
+    return client
+
+
+@st.cache_resource
+def warm_up():
+    """Warm the process up in the background once the first run has drawn the page
+
+    Runs once per process: the thread imports the data layer, builds the
+    shared HTTP client with its API connection open and scales the logo
+    while the first user types a search.
+    """
+    age = process_age()
+    if age is not None:
+        STARTUP.record("process_to_first_page", age)
+    with STARTUP.stage("translation_cache") as fields:
+        fields["entries"] = get_translation_cache().stats()["entries"]
+    assets = get_static_assets()
+    tasks = [("api_connection", _connected_http_client), ("data_layer", _import_data_layer)]
+    if assets.get("logo"):
+        tasks.append(("logo", lambda: assets.put("logo", png_thumbnail(LOGO_PATH, LOGO_WIDTH * 2))))
+    return Warmup(tasks)
+
+
+@st.cache_resource
+def get_http_client():
+    """Process-wide pooled HTTP client shared by every session
+
+    Takes the one the warm-up connected, waiting for it if a fetch comes
+    first, and builds its own if that failed.
+    """
+    return warm_up().result("api_connection") or _new_http_client()
+
+
+@st.cache_resource
+def get_encoded_frame_cache():
+    """Process-wide cache of encoded download files keyed by content hash"""
+    from export import EncodedFrameCache
+    return EncodedFrameCache(max_entries=16)
+
+
+@st.cache_resource
+def get_result_store():
+    """Process-wide on-disk store of fetched results for local sort and filter"""
+    from result_store import ResultStore
+    return ResultStore(max_results=20, ttl_seconds=3600)
+
+
+@st.cache_resource
+def get_feedback_spool():
+    """Process-wide feedback spool; its thread sends the records in the background"""
+    from feedback import FeedbackSpool
+    return FeedbackSpool()
+
+
+@st.cache_resource
+def get_translation_cache():
+    """Process-wide, disk-backed cache of query -> cypher/appliedFilters translations"""
+    return TranslationCache(max_entries=500)
+
+
+def get_page_fetcher():
+    """Uncached page fetch function bound to the shared HTTP client
+
+    Every page it returns is also written to the local result store.
+    """
+    from ponds_core import request_ponds_page
+    from result_store import recording_fetcher
+    return recording_fetcher(partial(request_ponds_page, get_http_client()), get_result_store())
+
+
+@st.cache_resource
+def get_prefetch_executor():
+    """Worker pool shared by every session for background page prefetches"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="pond-prefetch")
+
+
+@st.cache_resource
+def get_backfill_executor():
+    """Worker pool for fetching whole results into the result store
+
+    Kept apart from the prefetch pool so hundreds of queued ranges never
+    delay the next page or an auto-refresh poll.
+    """
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="pond-backfill")
+
+
+@st.cache_resource
+def get_page_prefetcher():
+    """Page cache and prefetcher shared by every session in the process
+
+    Sessions running the same query share cached DataFrames instead of each
+    holding a copy, and identical concurrent requests make one API call.
+    """
+    return PagePrefetcher(
+        PageCache(max_pages=1000, ttl_seconds=300, max_bytes=PAGE_CACHE_MAX_BYTES,
+                  max_owner_bytes=SESSION_CACHE_MAX_BYTES),
+        get_page_fetcher(),
+        executor=get_prefetch_executor(),
+        depth=2
+    )
+
+
+def _merge_pond_changes(prefetcher, store, subscription, changes, removed_ids, total_count, total_acres):
+    """Merge changed ponds into the cached pages and the stored result of a subscription"""
+    from delta_sync import merge_changes, pond_key
+    from frame_memory import compact_frame
+    result = store.open(subscription.query, subscription.applied_filters)
+    key = pond_key(changes.columns) or (pond_key(result.columns()) if result.rows_stored else None)
+    if key is None:
+        logger.warning("Delta sync: no pond key column, can't merge %d changed rows", len(changes))
+        return 0
+
+    def merge_page(page):
+        df, cypher_query, page_count, response_filters, page_acres = page
+        # Merged pages mix categoricals from different pages, which come back as text
+        return (compact_frame(merge_changes(df, changes, removed_ids, key)), cypher_query,
+                page_count if total_count is None else total_count, response_filters,
+                total_acres or page_acres)
+
+    with PERF.span("delta_merge", rows=len(changes), removed=len(removed_ids)) as span:
+        span["pages"] = prefetcher.update_pages(subscription.query, subscription.applied_filters, merge_page)
+        dropped = result.apply_changes(changes, removed_ids, key, total_count, total_acres)
+        span["dropped"] = dropped
+    return dropped
+
+
+@st.cache_resource
+def get_delta_sync():
+    """Process-wide auto-refresh scheduler; sessions watching the same result share its polls"""
+    from delta_sync import DeltaSync
+    from ponds_core import request_ponds_changes
+    return DeltaSync(
+        partial(request_ponds_changes, get_http_client()),
+        partial(_merge_pond_changes, get_page_prefetcher(), get_result_store()),
+        executor=get_prefetch_executor(),
+        interval=AUTO_REFRESH_SECONDS,
+        max_interval=AUTO_REFRESH_MAX_SECONDS
+    )
+
+
+def _session_id():
+    """Stable id of this browser session, used to account its cached pages"""
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
 
 def fetch_ponds_data(query_params, skip=None, limit=None, applied_filters=None, total_count=None, total_acres=None):
     """Fetch data from the farm ponds API with pagination support"""
-    url = "https://ax-ai-reports-912635809422.asia-south1.run.app/api/getFarmPonds"
-    
     try:
-        # Create the payload with the query parameters and pagination
-        try:
-            payload = {
-                "query": query_params
-            }
-            if total_count:
-                payload["totalCount"] = total_count
-            if total_acres:
-                payload["totalAcres"] = total_acres
-            
-            # Add appliedFilters only if provided and not empty
-            if applied_filters:
-                payload["appliedFilters"] = applied_filters
-            if skip:
-                payload["skip"] = skip
-            if limit:
-                payload["limit"] = limit
-        except Exception as e:
-            st.error(f"Error creating payload: {str(e)}")
-            return pd.DataFrame(), "", 0, []
-            
-        print(payload)
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Extract the data array, cypher query, total count, and total acres from the response
-        cypher_query = ""
-        response_filters = []
-        
-        if isinstance(data, dict):
-            # Get cypher query
-            if 'cypher' in data:
-                cypher_query = data['cypher']
-            elif 'response' in data and isinstance(data['response'], dict) and 'cypher' in data['response']:
-                cypher_query = data['response']['cypher']
-            
-            # Get total count
-            if 'totalCount' in data:
-                total_count = int(data['totalCount'])
-                st.session_state.total_count = total_count
-            elif 'response' in data and 'totalCount' in data['response']:
-                total_count = int(data['response']['totalCount'])
-                st.session_state.total_count = total_count
-                
-            # Get total acres
-            if 'totalAcres' in data:
-                total_acres = float(data['totalAcres'])
-                st.session_state.total_acres = total_acres
-            elif 'response' in data and 'totalAcres' in data['response']:
-                total_acres = float(data['response']['totalAcres'])
-                st.session_state.total_acres = total_acres
-            
-            # Get applied filters if available
-            if 'appliedFilters' in data and data['appliedFilters']:
-                response_filters = data['appliedFilters']
-                st.session_state.applied_filters = response_filters
-            
-            # Get the data array
-            if 'data' in data:
-                data_array = data['data']
-            elif 'response' in data and 'data' in data['response']:
-                data_array = data['response']['data']
-            else:
-                data_array = []
-        else:
-            data_array = []
-        
-        # Convert to DataFrame
-        if isinstance(data_array, list) and len(data_array) > 0:
-            df = pd.DataFrame(data_array)
-            # Convert date columns to datetime if they exist (exclude 'DOC' as it's an integer)
-            date_columns = [col for col in df.columns 
-                          if any(x in col.lower() for x in ['datalastupdated','feedlastupdated','nettinglastupdatedat']) 
-                          and 'doc' not in col.lower()]
-            for col in date_columns:
-                try:
-                    # First try with dayfirst=True for d-m-Y format
-                    df[col] = pd.to_datetime(df[col], 
-                                          dayfirst=True, 
-                                          errors='coerce',
-                                          format='mixed')
-                except Exception as e:
-                    st.warning(f"Could not convert column '{col}' to datetime: {str(e)}")
-                    continue
-            return df, cypher_query, total_count, response_filters, total_acres if 'total_acres' in locals() else 0
-        return pd.DataFrame(), cypher_query, total_count, response_filters, total_acres if 'total_acres' in locals() else 0
+        df, cypher_query, total_count, response_filters, total_acres = get_page_prefetcher().get(
+            query_params,
+            skip=skip,
+            limit=limit,
+            applied_filters=applied_filters,
+            total_count=total_count,
+            total_acres=total_acres,
+            owner=_session_id()
+        )
     except Exception as e:
+        import pandas as pd
         st.error(f"Error fetching data: {str(e)}")
         return pd.DataFrame(), "", 0, [], 0
 
-def main():
-    # Main app content with logo
-    col1, col2 = st.columns([1, 5])
-    
-    with col1:
-        # Load and display the logo
-        logo_path = "aqualogo.png"
-        if os.path.exists(logo_path):
-            logo = Image.open(logo_path)
-            st.image(logo, width=100)
-    
-    with col2:
-        st.title("🌊 AquaExchange Dashboard")
-        st.markdown("View and filter farm ponds data")
-    
-    # Initialize session state for pagination and feedback
-    if 'page' not in st.session_state:
-        st.session_state.page = 0
-    if 'per_page' not in st.session_state:
-        st.session_state.per_page = 100
-    if 'applied_filters' not in st.session_state:
-        st.session_state.applied_filters = None
-    if 'total_count' not in st.session_state:
-        st.session_state.total_count = None
-    if 'total_acres' not in st.session_state:
-        st.session_state.total_acres = None
-    if 'skip' not in st.session_state:
-        st.session_state.skip = None
-    if 'limit' not in st.session_state:
-        st.session_state.limit = None
-    if 'show_feedback' not in st.session_state:
-        st.session_state.show_feedback = False
-    if 'auto_fetch' not in st.session_state:
-        st.session_state.auto_fetch = False
-    
-    # Default query parameters
-    default_query = 'ponds with > 80 doc but not done any harvest'
-    
-    # Add a text area for query parameters
-    query_params = st.text_area(
-        "Search (ex: ponds with > 80 doc but not done any harvest)",
-        value=default_query,
-        height=100,
-        help="Enter to get the information of pond details"
+    if total_count is not None:
+        st.session_state.total_count = total_count
+    if total_acres:
+        st.session_state.total_acres = total_acres
+    if response_filters:
+        st.session_state.applied_filters = response_filters
+    return df, cypher_query, total_count, response_filters, total_acres
+
+
+def fetch_remaining_pages(query_params, result):
+    """Queue background fetches for the rows of a result not stored or queued yet"""
+    fetch = partial(
+        get_page_fetcher(),
+        query_params,
+        applied_filters=st.session_state.get('applied_filters'),
+        total_count=result.total_count,
+        total_acres=result.total_acres
     )
-    
-    # Add a refresh button
-    col1, col2 = st.columns([1, 5])
-    with col1:
-        if st.button("🔄 Fetch Data"):
-            st.cache_data.clear()
-            st.session_state.page = 0  # Reset to first page on new search
-            st.session_state.applied_filters = None
+    result.fetch_missing(lambda skip, limit: fetch(skip=skip, limit=limit), get_backfill_executor(), 500)
+
+
+def render_analytics_panel(query_params):
+    """Aggregates over every stored row of the current result, merged page by page"""
+    result = get_result_store().open(query_params, st.session_state.get('applied_filters'))
+    if not result.rows_stored:
+        return
+
+    with st.expander(f"📊 Analytics ({result.rows_stored:,} of {result.total_count or 0:,} records)"):
+        if not result.complete:
+            col1, col2 = st.columns([3, 2])
+            with col1:
+                st.caption("Covers the pages fetched so far; each new page is merged in as it arrives.")
+            with col2:
+                if st.button("Fetch remaining pages", key='analytics_fetch_remaining'):
+                    fetch_remaining_pages(query_params, result)
+                    st.info("Fetching the remaining pages. They are counted on the next interaction.")
+
+        with PERF.span("analytics_snapshot", rows=result.rows_stored):
+            aggregates = result.aggregates()
+
+        quantiles = aggregates.doc_quantiles((0.5, 0.9, 0.99))
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            mean = aggregates.doc_mean()
+            st.metric("Mean DOC", f"{mean:.1f}" if mean is not None else "–")
+        for col, q in zip((col2, col3, col4), (0.5, 0.9, 0.99)):
+            with col:
+                value = quantiles[q]
+                st.metric(f"DOC p{int(q * 100)}", f"{value:.0f}" if value is not None else "–",
+                          help="From a quantile sketch, within 1% of the exact value")
+
+        stale = aggregates.stale_counts()
+        columns = st.columns(len(stale) + 1)
+        for col, (days, count) in zip(columns, stale.items()):
+            with col:
+                st.metric(f"Not updated in {days}+ days", f"{count:,}")
+        with columns[-1]:
+            st.metric("No update date", f"{aggregates.never_updated:,}")
+
+        if aggregates.doc_bins:
+            st.caption("Ponds by DOC")
+            st.bar_chart(aggregates.doc_histogram())
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if aggregates.regions:
+                st.caption("Acres by region")
+                st.dataframe(aggregates.breakdown("region"), width="stretch")
+        with col2:
+            if aggregates.farms:
+                st.caption(f"Top farms by acres ({len(aggregates.farms):,} farms)")
+                st.dataframe(aggregates.breakdown("farm", top=20), width="stretch")
+
+
+def _select_rows(result, where, sort_by, ascending, start, stop):
+    return result.select(where, sort_by=sort_by, ascending=ascending, skip=start, limit=stop - start)[0]
+
+
+def render_local_view(query_params):
+    """Sort, filter and page through every stored row of the current result without the API"""
+    from filter_engine import coerce_value
+    result = get_result_store().open(query_params, st.session_state.get('applied_filters'))
+    if not result.rows_stored:
+        return
+
+    with st.expander(f"🗂️ Sort & filter locally ({result.rows_stored:,} of {result.total_count or 0:,} records stored)"):
+        if not result.complete:
+            if st.button("Fetch remaining pages in the background"):
+                fetch_remaining_pages(query_params, result)
+                st.info("Fetching the remaining pages. They appear here on the next interaction.")
+
+        columns = [None] + result.columns()
+        col1, col2, col3, col4, col5 = st.columns([3, 2, 3, 1, 2])
+        with col1:
+            sort_by = st.selectbox("Sort by", columns, format_func=lambda c: c or "(none)", key='local_sort_by')
+        with col2:
+            descending = st.checkbox("Descending", key='local_descending')
+        with col3:
+            filter_column = st.selectbox("Filter", columns, format_func=lambda c: c or "(none)", key='local_filter_column')
+        with col4:
+            filter_op = st.selectbox("Op", [">", ">=", "<", "<=", "==", "!=", "contains"], key='local_filter_op')
+        with col5:
+            filter_value = st.text_input("Value", key='local_filter_value')
+
+        where = None
+        if filter_column and filter_value.strip():
+            where = [(filter_column, filter_op, coerce_value(filter_value))]
+
+        if st.session_state.get('windowed_table'):
+            # Scroll through every matching stored row instead of paging
+            try:
+                _, matching = result.select(where, sort_by=sort_by, ascending=not descending, skip=0, limit=0)
+            except Exception as e:
+                st.error(f"Could not apply the local filter: {str(e)}")
+                return
+            st.caption(f"{matching:,} matching records")
+            if matching:
+                render_table_window(
+                    matching,
+                    partial(_select_rows, result, where, sort_by, not descending),
+                    key='local_window'
+                )
+            return
+
+        per_page = st.session_state.per_page
+        local_page = st.number_input("Page", min_value=1, value=1, step=1, key='local_page')
+        try:
+            page_df, matching = result.select(
+                where,
+                sort_by=sort_by,
+                ascending=not descending,
+                skip=(local_page - 1) * per_page,
+                limit=per_page
+            )
+        except Exception as e:
+            st.error(f"Could not apply the local filter: {str(e)}")
+            return
+
+        st.caption(f"{matching:,} matching records, page {local_page} of {max(1, (matching + per_page - 1) // per_page)}")
+        st.dataframe(page_df, width="stretch", height=400)
+
+
+REFINE_OPERATORS = [">", ">=", "<", "<=", "==", "!=", "between", "in", "not in", "contains", "is null", "is not null"]
+
+
+def apply_local_refinement(query_params, skip):
+    """Evaluate the active filter refinement from stored rows
+
+    Returns (df, total_count, total_acres), or None after dropping the
+    refinement when it can no longer be answered locally.
+    """
+    from filter_engine import UnsupportedFilter, refine
+    refinement = st.session_state.local_refinement
+    result = get_result_store().open(query_params, refinement['base_filters'])
+    try:
+        df, total_count, total_acres = refine(
+            result,
+            refinement['base_filters'],
+            refinement['filters'],
+            skip=skip,
+            limit=st.session_state.per_page
+        )
+    except (UnsupportedFilter, KeyError, ValueError, TypeError) as e:
+        logger.info("Dropping local refinement: %s", e)
+        st.session_state.local_refinement = None
+        st.session_state.total_count = None
+        st.session_state.auto_fetch = True
+        return None
+    st.session_state.total_count = total_count
+    st.session_state.total_acres = total_acres
+    return df, total_count, total_acres
+
+
+def render_filter_refinement(query_params):
+    """Edit the applied filters; tighter filters are evaluated locally from stored rows"""
+    from filter_engine import UnsupportedFilter, edited_value, format_value, parse_filters, refine, with_value
+    refinement = st.session_state.get('local_refinement')
+    base_filters = refinement['base_filters'] if refinement else st.session_state.get('applied_filters')
+    try:
+        conditions = parse_filters(refinement['filters'] if refinement else base_filters)
+    except UnsupportedFilter:
+        return
+    if not conditions:
+        return
+
+    with st.expander("🎚️ Refine filters", expanded=bool(refinement)):
+        edited = []
+        for i, condition in enumerate(conditions):
+            col1, col2, col3 = st.columns([1, 3, 4])
+            with col1:
+                keep = st.checkbox("Keep", value=True, key=f'refine_keep_{i}_{condition.field}')
+            with col2:
+                op = st.selectbox(
+                    str(condition.field),
+                    REFINE_OPERATORS,
+                    index=REFINE_OPERATORS.index(condition.op) if condition.op in REFINE_OPERATORS else 0,
+                    key=f'refine_op_{i}_{condition.field}'
+                )
+            with col3:
+                text = st.text_input("Value", value=format_value(condition.value), key=f'refine_value_{i}_{condition.field}')
+            if keep:
+                edited.append(with_value(condition, op, edited_value(condition, op, text)))
+
+        if st.session_state.get('refinement_note'):
+            st.caption(st.session_state.refinement_note)
+
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            apply_clicked = st.button("Apply filters")
+        with col2:
+            reset_clicked = refinement is not None and st.button("Reset to search results")
+
+        if apply_clicked:
+            result = get_result_store().open(query_params, base_filters)
+            try:
+                refine(result, base_filters, edited, skip=0, limit=1)
+                st.session_state.local_refinement = {'base_filters': base_filters, 'filters': edited}
+                st.session_state.refinement_note = "Evaluated locally from stored results."
+            except UnsupportedFilter as e:
+                # Broader or unmappable filters need the server, which still skips NL translation
+                st.session_state.local_refinement = None
+                st.session_state.applied_filters = edited
+                st.session_state.total_count = None
+                st.session_state.total_acres = None
+                st.session_state.auto_fetch = True
+                st.session_state.refinement_note = f"Sent to the server ({e})."
+            st.session_state.page = 0
+            st.rerun()
+        if reset_clicked:
+            st.session_state.local_refinement = None
+            st.session_state.refinement_note = None
             st.session_state.total_count = None
+            st.session_state.page = 0
             st.session_state.auto_fetch = True
-    
+            st.rerun()
+
+
+def render_performance_panel():
+    """Optional sidebar panel with rolling per-stage timings and cache counters"""
+    if not st.sidebar.toggle("⏱️ Performance", key='show_performance'):
+        return
+    import pandas as pd
+    with st.sidebar:
+        rows = PERF.summary()
+        if rows:
+            st.dataframe(pd.DataFrame(rows).set_index("stage"), width="stretch")
+        else:
+            st.caption("No timings recorded yet.")
+        api_stats = get_http_client().stats.snapshot()
+        page_stats = get_page_prefetcher().stats()
+        st.caption(f"API: {api_stats['requests']} requests, {api_stats['retries']} retries, "
+                   f"{api_stats['failures']} failures")
+        st.caption(f"Page cache: {page_stats['hits']} hits, {page_stats['misses']} misses, "
+                   f"{page_stats['coalesced']} coalesced, {page_stats['pages']} pages, "
+                   f"{page_stats['bytes'] / 1e6:.2f} MB")
+        feedback_stats = get_feedback_spool().stats()
+        if feedback_stats['submitted'] or feedback_stats['pending']:
+            st.caption(f"Feedback: {feedback_stats['sent']} sent, {feedback_stats['pending']} queued, "
+                       f"{feedback_stats['failures']} failed attempts")
+        startup = STARTUP.rows()
+        if startup:
+            st.caption("Startup of this process (once)")
+            st.dataframe(pd.DataFrame(startup).set_index("stage")[["ms", "thread"]], width="stretch")
+        if st.button("Reset timings"):
+            PERF.reset()
+
+
+def render_memory_panel():
+    """Optional sidebar panel with process, page cache and session DataFrame memory"""
+    if not st.sidebar.toggle("🧠 Memory", key='show_memory'):
+        return
+    import pandas as pd
+    from frame_memory import frame_nbytes, process_rss_bytes
+    with st.sidebar:
+        rss = process_rss_bytes()
+        if rss is not None:
+            st.caption(f"Process: {rss / 2**20:.0f} MB resident")
+        page_stats = get_page_prefetcher().stats()
+        st.caption(f"Page cache: {page_stats['bytes'] / 2**20:.1f} / {PAGE_CACHE_MAX_BYTES / 2**20:.0f} MB, "
+                   f"{page_stats['pages']} pages held by {page_stats['owners']} sessions")
+        pages, held = get_page_prefetcher().cache.owner_stats(_session_id())
+        st.caption(f"This session: {pages} pages, {held / 2**20:.1f} / {SESSION_CACHE_MAX_BYTES / 2**20:.0f} MB")
+        frames = [
+            {"name": name, "rows": len(value), "MB": frame_nbytes(value) / 2**20,
+             "categorical": sum(isinstance(dtype, pd.CategoricalDtype) for dtype in value.dtypes)}
+            for name, value in st.session_state.items() if isinstance(value, pd.DataFrame)
+        ]
+        if frames:
+            st.dataframe(pd.DataFrame(frames).set_index("name"), width="stretch")
+
+
+FEEDBACK_RATINGS = ["👍 Relevant", "👎 Not Relevant", "🤔 Partially Relevant"]
+
+
+def render_feedback_form(query_params):
+    """Rating and comment on the current result, spooled and sent in the background"""
+    st.subheader("📝 Provide Feedback")
+    with st.form("feedback_form", clear_on_submit=True):
+        rating = st.radio("How well did the results match your query?", FEEDBACK_RATINGS, horizontal=True)
+        comment = st.text_area(
+            "Additional feedback (optional)",
+            placeholder="Please share any additional comments or suggestions...",
+            height=100
+        )
+        if st.session_state.get('applied_filters'):
+            with st.expander("Applied Filters"):
+                st.json(st.session_state.applied_filters)
+        submitted = st.form_submit_button("Submit Feedback")
+
+    if submitted:
+        try:
+            get_feedback_spool().submit(
+                query_params,
+                applied_filters=st.session_state.get('applied_filters'),
+                rating=rating,
+                comment=comment,
+                app="farm_ponds"
+            )
+        except OSError as e:
+            st.error(f"Could not save your feedback: {str(e)}")
+        else:
+            st.success("Thank you for your feedback! It has been recorded.")
+
+
+PER_PAGE_OPTIONS = [50, 100, 200, 500]
+WINDOWED_PER_PAGE_OPTIONS = [1000, 2000, 5000]
+
+# The windowed table sends TABLE_WINDOW_ROWS rows from the scroll position on:
+# about 16 fit in the 600px table and the rest are buffer to scroll through
+TABLE_WINDOW_ROWS = 100
+
+
+def _go_to_page(page):
+    st.session_state.page = page
+    st.session_state.auto_fetch = True  # Served from the page cache when already seen
+
+
+def _toggle_windowed():
+    # Leaving windowed mode drops back to the largest regular page size
+    if not st.session_state.windowed_table and st.session_state.per_page not in PER_PAGE_OPTIONS:
+        st.session_state.per_page = max(PER_PAGE_OPTIONS)
+        st.session_state.page = 0
+        st.session_state.auto_fetch = True
+
+
+def _page_rows(df, start, stop):
+    return df.iloc[start:stop]
+
+
+@st.fragment
+def render_table_window(total_rows, fetch_rows, key, first_label=1):
+    """Scrollable table that only serializes the rows around a scroll position
+
+    fetch_rows(start, stop) returns rows [start, stop) of the data being
+    browsed. Moving the slider reruns just this fragment, which pulls the
+    next window from the loaded data and sends it to the browser.
+    """
+    import pandas as pd
+    position = 0
+    if total_rows > TABLE_WINDOW_ROWS:
+        position = st.slider(
+            "Scroll to row",
+            min_value=first_label,
+            max_value=first_label + total_rows - 1,
+            key=f'{key}_position'
+        ) - first_label
+    start = min(position, max(0, total_rows - TABLE_WINDOW_ROWS))
+    stop = min(total_rows, start + TABLE_WINDOW_ROWS)
+
+    with PERF.span("table_window", rows=stop - start, total=total_rows):
+        window = fetch_rows(start, stop)
+        window = window.set_axis(pd.RangeIndex(first_label + start, first_label + start + len(window)))
+    with PERF.span("dataframe_render", rows=len(window)):
+        st.dataframe(window, width="stretch", height=600)
+    st.caption(f"Rows {first_label + start:,} - {first_label + stop - 1:,} sent to the browser ({total_rows:,} loaded)")
+
+
+def _newest_update_held(query_params):
+    """Newest datalastupdated/feedlastupdated of the stored result and the page shown"""
+    from delta_sync import UPDATED_COLUMNS, newest_update
+    frames = [st.session_state.get('current_data')]
+    result = get_result_store().open(query_params, st.session_state.get('applied_filters'))
+    if result.rows_stored:
+        columns = [c for c in result.columns() if any(name in c.lower() for name in UPDATED_COLUMNS)]
+        frames.append(result.frame(columns))
+    return newest_update(frames)
+
+
+@st.fragment(run_every=AUTO_REFRESH_CHECK_SECONDS)
+def render_auto_refresh(query_params):
+    """Auto-refresh toggle and its status
+
+    Polling runs on the shared DeltaSync thread. This fragment only checks
+    every few seconds whether changes were merged into the cached pages and
+    stored result since this session last showed them, and reruns the app
+    when they were.
+    """
+    if not st.toggle(
+        "Auto-refresh",
+        key='auto_refresh',
+        help=f"Every {AUTO_REFRESH_SECONDS}s, merge in the ponds changed on the server instead of fetching everything again"
+    ):
+        st.session_state.delta_watch = None
+        return
+    from result_store import result_key
+
+    applied_filters = st.session_state.get('applied_filters')
+    watch_key = result_key(query_params, applied_filters)
+    if st.session_state.get('delta_watch') != watch_key:
+        subscription = get_delta_sync().watch(query_params, applied_filters, since=_newest_update_held(query_params))
+        st.session_state.delta_watch = watch_key
+        st.session_state.delta_version = subscription.version
+    else:
+        subscription = get_delta_sync().watch(query_params, applied_filters)
+
+    if subscription.unsupported:
+        st.caption(f"Auto-refresh is off: {subscription.unsupported}. Use Fetch Data to refresh.")
+        return
+
+    if subscription.version != st.session_state.delta_version:
+        st.session_state.delta_version = subscription.version
+        st.session_state.total_count = subscription.total_count
+        st.session_state.total_acres = subscription.total_acres
+        st.session_state.auto_fetch = True  # The page comes back merged from the page cache
+        st.rerun()
+
+    if subscription.since is None:
+        st.caption("Auto-refresh needs a datalastupdated or feedlastupdated column to look for changes.")
+    elif subscription.last_error:
+        st.caption(f"⚠️ Last check failed, retrying in {subscription.retry_in():.0f}s: {subscription.last_error}")
+    elif subscription.last_checked:
+        st.caption(
+            f"Checked {datetime.now().timestamp() - subscription.last_checked:.0f}s ago; "
+            f"{subscription.rows_changed:,} changed and {subscription.rows_removed:,} removed ponds merged so far"
+        )
+    else:
+        st.caption(f"First check in {subscription.retry_in():.0f}s")
+
+
+def _change_per_page():
+    st.session_state.per_page = st.session_state.per_page_selector
+    st.session_state.page = 0  # Reset to first page when changing page size
+    st.session_state.auto_fetch = True
+
+
+@st.fragment
+def render_results(query_params):
+    """Fetch and show the current page with its metrics and pagination controls
+
+    Runs as a fragment: paging and page-size changes rerun only this function,
+    not the header, search box or the expanders below the table.
+    """
     # Calculate skip based on current page
     skip = st.session_state.page * st.session_state.per_page
     
@@ -187,17 +718,40 @@ def main():
     if st.session_state.per_page != 100:  # Only include if not default
         pagination_params['limit'] = st.session_state.per_page
     
+    # A tightened filter is answered from stored rows without calling the API
+    local_page = None
+    if st.session_state.get('local_refinement'):
+        local_page = apply_local_refinement(query_params, skip)
+
+    if local_page is not None:
+        df, total_count, total_acres = local_page
+        cypher_query = ""
+        st.session_state.auto_fetch = False
     # Only fetch data if auto_fetch is enabled or the Fetch Data button was clicked
-    if st.session_state.auto_fetch and ('feedback_submitted' not in st.session_state or not st.session_state.feedback_submitted):
+    elif st.session_state.auto_fetch:
         with st.spinner('Loading data...'):
             try:
+                # A new search for a question translated before sends the cached
+                # appliedFilters so the server can skip the NL translation
+                request_filters = st.session_state.get('applied_filters')
+                cached_translation = None
+                if not request_filters:
+                    cached_translation = get_translation_cache().get(query_params)
+                    if cached_translation:
+                        request_filters = cached_translation['applied_filters']
+
                 df, cypher_query, total_count, response_filters, total_acres = fetch_ponds_data(
                     query_params,
                     **pagination_params,
                     total_count=st.session_state.get('total_count'),
                     total_acres=st.session_state.get('total_acres'),
-                    applied_filters=st.session_state.get('applied_filters')
+                    applied_filters=request_filters
                 )
+
+                if cached_translation:
+                    cypher_query = cypher_query or cached_translation['cypher']
+                elif not request_filters and response_filters:
+                    get_translation_cache().put(query_params, cypher_query, response_filters)
                 
                 # Store data in session state for later use
                 st.session_state.current_data = df
@@ -207,30 +761,48 @@ def main():
                 # Store applied filters from the response if available
                 if response_filters:
                     st.session_state.applied_filters = response_filters
+                elif request_filters:
+                    st.session_state.applied_filters = request_filters
+
+                # Warm the next pages while the user reads this one
+                get_page_prefetcher().prefetch_after(
+                    query_params,
+                    skip=skip,
+                    limit=st.session_state.per_page,
+                    total_count=total_count,
+                    applied_filters=st.session_state.get('applied_filters'),
+                    total_acres=total_acres,
+                    owner=_session_id()
+                )
                     
                 # Reset the auto_fetch flag after successful fetch
                 if st.session_state.auto_fetch and not st.session_state.get('keep_auto_fetch', False):
                     st.session_state.auto_fetch = False
             except Exception as e:
                 st.error(f"Error loading data: {str(e)}")
-                df = pd.DataFrame()
+                df = None
+                cypher_query = ""
                 total_count = 0
                 total_acres = 0
                 # Reset the auto_fetch flag after error
                 st.session_state.auto_fetch = False
     else:
-        # Use existing data from session state or initialize empty dataframe
-        df = st.session_state.get('current_data', pd.DataFrame())
+        # Use existing data from session state, if any
+        df = st.session_state.get('current_data')
         total_count = st.session_state.get('total_count', 0)
         total_acres = st.session_state.get('total_acres', 0)
         cypher_query = ""
     
+    st.session_state.has_results = df is not None and not df.empty
+
     # Display the Cypher query in an expandable section
     if cypher_query and cypher_query.strip():
         with st.expander("View Generated Cypher Query"):
             st.code(cypher_query, language="cypher")
     
-    if not df.empty:
+    if st.session_state.has_results:
+        import pandas as pd
+
         # Calculate pagination info
         if hasattr(st.session_state, 'total_count') and st.session_state.total_count > 0:
             total_count = st.session_state.total_count
@@ -249,29 +821,55 @@ def main():
             # Handle None value for total_acres
             acres_value = total_acres if total_acres is not None else 0
             st.metric("Total Acres", f"{acres_value:,.2f}")
+        with col3:
+            # Latency of the shared API client; cached pages don't add samples
+            api_stats = get_http_client().stats.snapshot()
+            if api_stats["p95"] is not None:
+                last = api_stats["last"]
+                st.metric(
+                    "API latency (p95)",
+                    f"{api_stats['p95']:.2f}s",
+                    help=(f"Last request {last['latency']:.2f}s with {last['retries']} retries; "
+                          f"{api_stats['requests']} requests, {api_stats['retries']} retries, "
+                          f"{api_stats['failures']} failures in total. Pages are streamed, so "
+                          f"this is the time until the response headers arrive, not the whole download")
+                )
         
         # Add index column based on pagination
         if not df.empty:
-            # Create a new column with 1-based index based on current page and items per page
-            df_display = df.copy()
             start_idx = st.session_state.page * st.session_state.per_page + 1
-            df_display.index = range(start_idx, start_idx + len(df))
             
             # Show the data table with index
-            st.subheader("Ponds Data")
-            st.dataframe(df_display, use_container_width=True, height=600)
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.subheader("Ponds Data")
+            with col2:
+                windowed = st.toggle(
+                    "Windowed table",
+                    key='windowed_table',
+                    on_change=_toggle_windowed,
+                    help="Send only the rows around a scroll position, for pages of thousands of rows"
+                )
+            if windowed:
+                render_table_window(len(df), partial(_page_rows, df), key='page_window', first_label=start_idx)
+            else:
+                # 1-based index for the current page; set_axis shares the data
+                # with the cached page instead of copying it
+                with PERF.span("display_index", rows=len(df)):
+                    df_display = df.set_axis(pd.RangeIndex(start_idx, start_idx + len(df)))
+                with PERF.span("dataframe_render", rows=len(df_display)):
+                    st.dataframe(df_display, width="stretch", height=600)
         
         # Display record count info
         st.caption(f"Showing {total_count:,} records total")
         
-        # Pagination controls with Rows per page selector
+        # Pagination controls with Rows per page selector. Callbacks update the
+        # state before the fragment reruns, so one click is one rerun
         col1, col2, col3, col4 = st.columns([2, 4, 2, 3])
         
         with col1:
             if st.session_state.page > 0:
-                if st.button("⬅️ Previous"):
-                    st.session_state.page = 0  # Reset to first page when changing page size
-                    st.rerun()
+                st.button("⬅️ Previous", on_click=_go_to_page, args=(st.session_state.page - 1,))
         
         # Display pagination info
         st.caption(f"Showing {start_record:,} - {end_record:,} of {total_count:,} records")
@@ -280,114 +878,167 @@ def main():
         
         with col3:
             if (st.session_state.page + 1) * st.session_state.per_page < total_count:
-                if st.button("Next ➡️"):
-                    st.session_state.page += 1
-                    st.rerun()
+                st.button("Next ➡️", on_click=_go_to_page, args=(st.session_state.page + 1,))
         
         with col4:
-            # Rows per page selector
-            new_per_page = st.selectbox(
+            # Rows per page selector; the windowed table makes large pages cheap to show
+            per_page_options = PER_PAGE_OPTIONS + (WINDOWED_PER_PAGE_OPTIONS if windowed else [])
+            st.selectbox(
                 "Rows per page:",
-                options=[50, 100, 200, 500],
-                index=[50, 100, 200, 500].index(st.session_state.per_page) if st.session_state.per_page in [50, 100, 200, 500] else 1,
+                options=per_page_options,
+                index=per_page_options.index(st.session_state.per_page) if st.session_state.per_page in per_page_options else 1,
                 key='per_page_selector',
-                label_visibility="collapsed"
+                label_visibility="collapsed",
+                on_change=_change_per_page
             )
-            if new_per_page != st.session_state.per_page:
-                st.session_state.per_page = new_per_page
-                st.session_state.page = 0  # Reset to first page when changing page size
-                st.rerun()
         
-        # Add download button
-        csv = df.to_csv(index=False).encode('utf-8')
+        # Add download button; the CSV is only encoded when clicked, once per distinct page
         st.download_button(
             label="📥 Download Current Page as CSV",
-            data=csv,
+            data=partial(get_encoded_frame_cache().csv_bytes, df),
             file_name=f"farm_ponds_page_{st.session_state.page + 1}_{datetime.now().strftime('%Y%m%d')}.csv",
             mime='text/csv',
         )
-        
-        # Feedback UI after pagination and download button
-        # st.subheader("📝 Provide Feedback")
-        
-        # # Store form submission state to prevent rerunning API calls
-        # if 'feedback_submitted' not in st.session_state:
-        #     st.session_state.feedback_submitted = False
-            
-        # with st.form("feedback_form"):
-        #     col1, col2 = st.columns([3, 1])
-        #     with col1:
-        #         # Feedback options
-        #         feedback_type = st.radio(
-        #             "How well did the results match your query?",
-        #             ["👍 Relevant", "👎 Not Relevant", "🤔 Partially Relevant"],
-        #             horizontal=True
-        #         )
-            
-        #     # Additional feedback
-        #     feedback_text = st.text_area(
-        #         "Additional feedback (optional)",
-        #         placeholder="Please share any additional comments or suggestions...",
-        #         height=100
-        #     )
-            
-        #     # Display applied filters if any
-        #     if st.session_state.get('applied_filters'):
-        #         with st.expander("Applied Filters"):
-        #             st.json(st.session_state.applied_filters)
-            
-        #     # Submit button
-        #     submitted = st.form_submit_button("Submit Feedback")
-            
-        #     if submitted and not st.session_state.feedback_submitted:
-        #         st.session_state.feedback_submitted = True
-                
-        #         # Prepare feedback data
-        #         feedback_data = {
-        #             "query": query_params,
-        #             "feedback_type": feedback_type,
-        #             "feedback_text": feedback_text,
-        #             "applied_filters": st.session_state.get('applied_filters'),
-        #             "timestamp": datetime.now().isoformat()
-        #         }
-                
-        #         # Store feedback locally for backup
-        #         if 'feedback_history' not in st.session_state:
-        #             st.session_state.feedback_history = []
-        #         st.session_state.feedback_history.append(feedback_data)
-                
-        #         try:
-        #             # Just show success message without making API call
-        #             st.success("Thank you for your feedback! It has been recorded.")
-                    
-        #             # Commented out the problematic API call that causes 500 error
-        #             '''
-        #             feedback_url = "https://us-central1-nextaqua-22991.cloudfunctions.net/storeApiFeedback"
-        #             # Set a timeout to prevent hanging
-        #             response = requests.post(feedback_url, json=feedback_data, timeout=5)
-                    
-        #             if response.status_code == 200:
-        #                 st.success("Thank you for your feedback! It has been submitted successfully.")
-        #             else:
-        #                 st.warning(f"Feedback submission had an issue. Status code: {response.status_code}")
-        #                 st.info("Your feedback has been saved locally as a backup.")
-        #             '''
-        #         except Exception as e:
-        #             st.error(f"Unexpected error: {str(e)}")
-        #             st.info("Your feedback has been saved locally.")
-            
-        #     # Show message if already submitted
-        #     elif submitted and st.session_state.feedback_submitted:
-        #         st.info("Your feedback has already been recorded. Thank you!")
-                
-        # Add a button to reset the feedback form if needed
-        # if st.session_state.feedback_submitted:
-        #     if st.button("Submit another feedback"):
-        #         st.session_state.feedback_submitted = False
-        #         st.rerun()
     else:
         st.warning("No data available or failed to fetch data from the API.")
 
+
+def main():
+    # Main app content with logo
+    col1, col2 = st.columns([1, 5])
+    
+    with col1:
+        logo = load_logo()
+        if logo:
+            st.image(logo, width=LOGO_WIDTH)
+    
+    with col2:
+        st.title("🌊 AquaExchange Dashboard")
+        st.markdown("View and filter farm ponds data")
+
+    # Initialize session state for pagination and feedback
+    if 'page' not in st.session_state:
+        st.session_state.page = 0
+    if 'per_page' not in st.session_state:
+        st.session_state.per_page = 100
+    if 'applied_filters' not in st.session_state:
+        st.session_state.applied_filters = None
+    if 'total_count' not in st.session_state:
+        st.session_state.total_count = None
+    if 'total_acres' not in st.session_state:
+        st.session_state.total_acres = None
+    if 'skip' not in st.session_state:
+        st.session_state.skip = None
+    if 'limit' not in st.session_state:
+        st.session_state.limit = None
+    if 'show_feedback' not in st.session_state:
+        st.session_state.show_feedback = False
+    if 'auto_fetch' not in st.session_state:
+        st.session_state.auto_fetch = False
+    
+    # Default query parameters
+    default_query = 'ponds with > 80 doc but not done any harvest'
+    
+    # Add a text area for query parameters
+    query_params = st.text_area(
+        "Search (ex: ponds with > 80 doc but not done any harvest)",
+        value=default_query,
+        height=100,
+        help="Enter to get the information of pond details"
+    )
+    
+    # Add a refresh button
+    col1, col2 = st.columns([1, 5])
+    with col1:
+        if st.button("🔄 Fetch Data"):
+            # An explicit fetch asks for fresh data, not pages or rows stored by earlier searches
+            get_page_prefetcher().invalidate(query_params)
+            get_result_store().discard(query_params)
+            st.session_state.page = 0  # Reset to first page on new search
+            st.session_state.applied_filters = None
+            st.session_state.total_count = None
+            st.session_state.total_acres = None
+            st.session_state.local_refinement = None
+            st.session_state.refinement_note = None
+            st.session_state.auto_fetch = True
+    with col2:
+        translation_stats = get_translation_cache().stats()
+        if translation_stats['hit_rate'] is not None:
+            st.caption(
+                f"Query translation cache: {translation_stats['hits']} hits, "
+                f"{translation_stats['misses']} misses ({translation_stats['hit_rate']:.0%} hit rate), "
+                f"{translation_stats['entries']} stored"
+            )
+    
+    render_results(query_params)
+
+    # Everything below depends on the result as a whole, not on the page shown
+    if st.session_state.get('has_results'):
+        from export import EXPORT_FORMATS, export_all, export_path, export_result, is_fresh_export, read_export
+        from filter_engine import refinement_mask
+
+        render_auto_refresh(query_params)
+
+        total_count = st.session_state.get('total_count') or 0
+        total_acres = st.session_state.get('total_acres')
+
+        # Export every matching pond, streamed page by page to a file on disk
+        with st.expander("📦 Export all results"):
+            export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True, key='export_format')
+            mime, extension = EXPORT_FORMATS[export_format]
+            # A local refinement is exported from the stored rows it was evaluated
+            # on: the server only knows the base filters, and total_count is the
+            # refined count
+            refinement = st.session_state.get('local_refinement')
+            export_filters = refinement['filters'] if refinement else st.session_state.get('applied_filters')
+            path = export_path(query_params, export_filters, total_count, export_format)
+            if not is_fresh_export(path) and st.button(f"Prepare export of {total_count:,} records"):
+                progress_bar = st.progress(0.0, text="Fetching pages...")
+
+                def report_progress(rows, total):
+                    progress_bar.progress(min(1.0, rows / max(total, 1)), text=f"Exported {rows:,} of {total:,} records")
+
+                try:
+                    if refinement:
+                        result = get_result_store().open(query_params, refinement['base_filters'])
+                        mask = refinement_mask(result, refinement['base_filters'], refinement['filters'])
+                        export_result(result, path, fmt=export_format, where=mask, progress=report_progress)
+                    else:
+                        export_all(
+                            get_page_fetcher(),
+                            query_params,
+                            path,
+                            fmt=export_format,
+                            applied_filters=export_filters,
+                            total_count=total_count,
+                            total_acres=total_acres,
+                            page_size=500,
+                            max_workers=4,
+                            progress=report_progress
+                        )
+                except Exception as e:
+                    st.error(f"Export failed: {str(e)}")
+            if is_fresh_export(path):
+                st.download_button(
+                    label=f"📥 Download all {total_count:,} records",
+                    data=partial(read_export, path),
+                    file_name=f"farm_ponds_all_{datetime.now().strftime('%Y%m%d')}{extension}",
+                    mime=mime,
+                )
+        
+        render_filter_refinement(query_params)
+        render_analytics_panel(query_params)
+        render_local_view(query_params)
+
+        # Feedback after pagination and the downloads
+        render_feedback_form(query_params)
+
+    render_performance_panel()
+    render_memory_panel()
+    STARTUP.record_elapsed("first_run")
+    # Once the page is drawn, so the first run in the process doesn't wait on it
+    warm_up()
+
 if __name__ == "__main__":
     main()
 #password ax@4321
\ No newline at end of file
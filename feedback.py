@@ -0,0 +1,260 @@
+"""Durable, batched submission of user feedback
+
+Submitting feedback only appends a JSON line to a local spool file, so the
+script never waits on the feedback endpoint. A background flusher moves the
+spool aside as a batch file and posts its records in batches, retrying with
+exponential backoff while the endpoint is down. A batch file is deleted only
+after the endpoint accepted it, so records survive failures and restarts; a
+record may be delivered twice if the process dies mid-post, and carries an
+"id" the endpoint can deduplicate on.
+
+The endpoint receives {"feedback": [record, ...]}, each record holding id,
+app, query, appliedFilters, rating, comment and timestamp (UTC ISO 8601).
+"""
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from http_client import PondsClient, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_URL = os.environ.get(
+    "FEEDBACK_URL", "https://us-central1-nextaqua-22991.cloudfunctions.net/storeApiFeedback"
+)
+FEEDBACK_SPOOL_DIR = os.environ.get("FEEDBACK_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "aqua_feedback"))
+
+SPOOL_FILE = "spool.jsonl"
+
+# A batch claimed for sending longer ago than this belonged to a process that died mid-post
+STALE_CLAIM_SECONDS = 300
+
+# Client errors other than these will fail the same way on every retry
+RETRYABLE_CLIENT_STATUSES = {408, 409, 425, 429}
+
+
+class FeedbackSpool:
+    """Append-only feedback spool with a background batch flusher
+
+    Share one per process. Several processes may use the same directory:
+    appends are single O_APPEND writes, and a batch file is claimed by
+    renaming it before it is sent.
+    """
+
+    def __init__(self, directory=FEEDBACK_SPOOL_DIR, url=FEEDBACK_URL, client=None, batch_size=50,
+                 flush_interval=5, max_interval=600, fsync=True):
+        self.directory = directory
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_interval = max_interval
+        self.fsync = fsync
+        # Retries are the flusher's job, spaced out far longer than a request's
+        self._client = client or PondsClient(pool_size=1, connect_timeout=5, read_timeout=15, max_retries=0)
+        self.submitted = 0
+        self.sent = 0
+        self.rejected = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_sent = None  # wall-clock time of the last accepted batch
+        self.retry_at = None  # monotonic time of the next attempt while backing off
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+        if self.pending():
+            self._start()  # Records left by an earlier run
+
+    def submit(self, query, applied_filters=None, rating=None, comment=None, app=None):
+        """Spool one feedback record and return it; never touches the network"""
+        record = {
+            "id": uuid.uuid4().hex,
+            "app": app,
+            "query": query,
+            "appliedFilters": applied_filters,
+            "rating": rating,
+            "comment": comment or "",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        line = (json.dumps(record, default=str, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            fd = os.open(os.path.join(self.directory, SPOOL_FILE), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            self.submitted += 1
+        self._start()
+        self._wake.set()
+        return record
+
+    def pending(self):
+        """Records spooled or batched but not yet accepted by the endpoint"""
+        count = 0
+        for path in self._batch_files(claimed=True) + [os.path.join(self.directory, SPOOL_FILE)]:
+            try:
+                with open(path, "rb") as f:
+                    count += sum(1 for line in f if line.strip())
+            except OSError:
+                pass
+        return count
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "rejected": self.rejected,
+            "pending": self.pending(),
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_sent": self.last_sent,
+            "retry_in": max(0.0, self.retry_at - time.monotonic()) if self.retry_at else None,
+        }
+
+    def flush(self):
+        """Send everything spooled now; returns True when nothing is left to retry"""
+        self._rotate()
+        for path in self._batch_files():
+            if not self._send_file(path):
+                return False
+        return True
+
+    def close(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="feedback-flush", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        self._release_stale_claims()
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                done = self.flush()
+                error = None if done else self.last_error
+            except Exception as e:  # e.g. the spool directory became unwritable
+                done, error = False, str(e)
+            if done:
+                self.failures = 0
+                self.last_error = None
+                self.retry_at = None
+                continue
+            self.failures += 1
+            self.last_error = error
+            delay = backoff_delay(self.flush_interval, self.failures, self.max_interval)
+            self.retry_at = time.monotonic() + delay
+            logger.warning("Sending feedback failed (%d in a row), retrying in %.0fs: %s",
+                           self.failures, delay, error)
+            # Later submissions wait in the spool until the retry
+            self._stop.wait(delay)
+
+    def _rotate(self):
+        """Move the spool aside as a batch file so new records start a fresh spool"""
+        spool = os.path.join(self.directory, SPOOL_FILE)
+        with self._lock:
+            try:
+                if os.path.getsize(spool) == 0:
+                    return
+                os.replace(spool, os.path.join(self.directory, f"batch-{time.time_ns()}-{os.getpid()}.jsonl"))
+            except FileNotFoundError:
+                pass
+
+    def _batch_files(self, claimed=False):
+        patterns = ["batch-*.jsonl"] + (["batch-*.jsonl.sending"] if claimed else [])
+        return sorted(path for pattern in patterns for path in glob.glob(os.path.join(self.directory, pattern)))
+
+    def _release_stale_claims(self):
+        now = time.time()
+        for path in glob.glob(os.path.join(self.directory, "batch-*.jsonl.sending")):
+            try:
+                if now - os.path.getmtime(path) > STALE_CLAIM_SECONDS:
+                    os.replace(path, path[:-len(".sending")])
+            except OSError:
+                pass
+
+    def _send_file(self, path):
+        """Post a batch file's records; the file is gone once True is returned"""
+        claimed = path + ".sending"
+        try:
+            os.replace(path, claimed)
+            os.utime(claimed)  # Claim age, see _release_stale_claims
+        except FileNotFoundError:
+            return True  # Another process claimed it
+        try:
+            records = _read_records(claimed)
+            while records:
+                batch = records[:self.batch_size]
+                if not self._post(batch):
+                    # Keep what wasn't accepted for the next attempt
+                    _write_records(claimed, records)
+                    os.replace(claimed, path)
+                    return False
+                records = records[len(batch):]
+            os.remove(claimed)
+            return True
+        except BaseException:
+            if os.path.exists(claimed):
+                os.replace(claimed, path)
+            raise
+
+    def _post(self, records):
+        try:
+            response = self._client.post(self.url, json={"feedback": records})
+        except Exception as e:
+            self.last_error = str(e)
+            return False
+        status = response.status_code
+        response.close()
+        if status < 400:
+            self.sent += len(records)
+            self.last_sent = time.time()
+            return True
+        if status < 500 and status not in RETRYABLE_CLIENT_STATUSES:
+            # Retrying can't help; set the records aside instead of blocking the ones behind them
+            with open(os.path.join(self.directory, "rejected.jsonl"), "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(r, default=str, ensure_ascii=False) + "\n" for r in records)
+            self.rejected += len(records)
+            logger.error("Feedback endpoint rejected %d records with status %d; kept in rejected.jsonl",
+                         len(records), status)
+            return True
+        self.last_error = f"HTTP {status}"
+        return False
+
+
+def _read_records(path):
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                if line.strip():
+                    logger.warning("Skipping a corrupt feedback record in %s", path)
+    return records
+
+
+def _write_records(path, records):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(r, default=str, ensure_ascii=False) + "\n" for r in records)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,340 @@
+"""Evaluate appliedFilters locally as vectorized pandas masks
+
+The API echoes the structured filters it derived from the natural-language
+query as appliedFilters. When a user tightens those filters, the new result
+is a subset of rows we already hold, so it can be computed here instead of
+going through another NL-to-Cypher translation and graph query.
+"""
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+FIELD_KEYS = ("field", "property", "column", "attribute", "key", "name")
+OPERATOR_KEYS = ("operator", "op", "condition", "comparison")
+VALUE_KEYS = ("value", "values", "threshold")
+
+OPERATOR_ALIASES = {
+    ">": ">", "gt": ">", "greater_than": ">", "greaterthan": ">", "$gt": ">",
+    ">=": ">=", "gte": ">=", "greater_than_or_equal": ">=", "$gte": ">=",
+    "<": "<", "lt": "<", "less_than": "<", "lessthan": "<", "$lt": "<",
+    "<=": "<=", "lte": "<=", "less_than_or_equal": "<=", "$lte": "<=",
+    "=": "==", "==": "==", "eq": "==", "equals": "==", "is": "==", "$eq": "==",
+    "!=": "!=", "<>": "!=", "ne": "!=", "neq": "!=", "not_equals": "!=", "$ne": "!=",
+    "in": "in", "$in": "in",
+    "not in": "not in", "not_in": "not in", "nin": "not in", "$nin": "not in",
+    "between": "between", "range": "between",
+    "contains": "contains", "like": "contains",
+    "is null": "is null", "is_null": "is null", "not exists": "is null",
+    "is not null": "is not null", "is_not_null": "is not null", "exists": "is not null",
+}
+
+Condition = namedtuple("Condition", ["field", "op", "value", "source"])
+
+
+class UnsupportedFilter(ValueError):
+    """A filter that can't be evaluated against the locally held columns"""
+
+
+def _first(d, keys):
+    for k in keys:
+        if k in d:
+            return k
+    return None
+
+
+def _condition_from_dict(item):
+    field_key = _first(item, FIELD_KEYS)
+    if field_key is None:
+        raise UnsupportedFilter(f"No field in filter {item!r}")
+    op_key = _first(item, OPERATOR_KEYS)
+    value_key = _first(item, VALUE_KEYS)
+    if "min" in item or "max" in item:
+        return Condition(item[field_key], "between", (item.get("min"), item.get("max")), item)
+    op = str(item[op_key]).strip().lower() if op_key else "=="
+    if op not in OPERATOR_ALIASES:
+        raise UnsupportedFilter(f"Unknown operator {item[op_key]!r}")
+    op = OPERATOR_ALIASES[op]
+    value = item[value_key] if value_key else None
+    if op == "between" and isinstance(value, (list, tuple)) and len(value) == 2:
+        value = tuple(value)
+    return Condition(item[field_key], op, value, item)
+
+
+def parse_filters(applied_filters):
+    """Normalize appliedFilters into a list of Conditions
+
+    Accepts a list of condition objects ({"field", "operator", "value"} and
+    common spellings of those keys) or a mapping of field to value or to
+    {operator: value}.
+    """
+    if not applied_filters:
+        return []
+    conditions = []
+    if isinstance(applied_filters, dict):
+        for field, spec in applied_filters.items():
+            if isinstance(spec, dict):
+                for op, value in spec.items():
+                    key = str(op).strip().lower()
+                    if key not in OPERATOR_ALIASES:
+                        raise UnsupportedFilter(f"Unknown operator {op!r}")
+                    conditions.append(Condition(field, OPERATOR_ALIASES[key], value, {field: {op: value}}))
+            else:
+                conditions.append(Condition(field, "==", spec, {field: spec}))
+        return conditions
+    if isinstance(applied_filters, list):
+        for item in applied_filters:
+            if not isinstance(item, dict):
+                raise UnsupportedFilter(f"Unsupported filter {item!r}")
+            conditions.append(_condition_from_dict(item))
+        return conditions
+    raise UnsupportedFilter(f"Unsupported appliedFilters {applied_filters!r}")
+
+
+def resolve_column(field, columns):
+    """Match a filter field like 'p.DOC' or 'doc' to a DataFrame column"""
+    name = str(field).split(".")[-1]
+    wanted = re.sub(r"[^a-z0-9]", "", name.lower())
+    for col in columns:
+        if re.sub(r"[^a-z0-9]", "", str(col).lower()) == wanted:
+            return col
+    raise UnsupportedFilter(f"Field {field!r} is not a column of the stored result")
+
+
+def _coerce(values, value):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        ts = pd.Timestamp(value)
+        tz = getattr(values.dt, "tz", None)
+        if tz is not None and ts.tzinfo is None:
+            ts = ts.tz_localize(tz)
+        return ts
+    if pd.api.types.is_numeric_dtype(values) and isinstance(value, str):
+        return float(value)
+    return value
+
+
+def condition_mask(df, condition):
+    """Boolean numpy mask for one Condition over df"""
+    col = resolve_column(condition.field, df.columns)
+    values = df[col]
+    op, value = condition.op, condition.value
+    if op == "is null":
+        return values.isna().to_numpy()
+    if op == "is not null":
+        return values.notna().to_numpy()
+    if op in ("in", "not in"):
+        items = value if isinstance(value, (list, tuple, set)) else [value]
+        mask = values.isin([_coerce(values, v) for v in items]).to_numpy()
+        return ~mask if op == "not in" else mask
+    if op == "contains":
+        return values.astype(str).str.contains(str(value), case=False, regex=False).fillna(False).to_numpy()
+    if op == "between":
+        low, high = value
+        mask = values.notna()
+        if low is not None:
+            mask &= values >= _coerce(values, low)
+        if high is not None:
+            mask &= values <= _coerce(values, high)
+        return mask.fillna(False).to_numpy(dtype=bool)
+    if isinstance(value, str) and not (pd.api.types.is_numeric_dtype(values)
+                                       or pd.api.types.is_datetime64_any_dtype(values)):
+        # Text columns compare case-insensitively, whether object, string or categorical
+        values = values.astype(str).str.lower()
+        value = value.lower()
+    else:
+        value = _coerce(values, value)
+    compare = {
+        ">": values.gt, ">=": values.ge, "<": values.lt, "<=": values.le,
+        "==": values.eq, "!=": values.ne,
+    }[op]
+    return compare(value).fillna(False).to_numpy(dtype=bool)
+
+
+def filter_mask(df, applied_filters):
+    """AND of all conditions in applied_filters as a boolean numpy mask"""
+    return _conditions_mask(df, parse_filters(applied_filters))
+
+
+def filter_columns(applied_filters, columns):
+    """Columns needed to evaluate applied_filters"""
+    return _condition_columns(parse_filters(applied_filters), columns)
+
+
+def _conditions_mask(df, conditions):
+    mask = np.ones(len(df), dtype=bool)
+    for condition in conditions:
+        mask &= condition_mask(df, condition)
+    return mask
+
+
+def _condition_columns(conditions, columns):
+    return sorted({resolve_column(c.field, columns) for c in conditions})
+
+
+def _bounds(condition):
+    op, value = condition.op, condition.value
+    if op == "between":
+        return value
+    if op in (">", ">="):
+        return value, None
+    if op in ("<", "<="):
+        return None, value
+    if op == "==":
+        return value, value
+    return None
+
+
+def _same(a, b):
+    return a.field == b.field and a.op == b.op and a.value == b.value
+
+
+def _implies(new, base):
+    """True if every row passing new also passes base"""
+    if new.field != base.field:
+        return False
+    if _same(new, base):
+        return True
+    if base.op in ("in",) and new.op in ("in", "=="):
+        new_items = new.value if new.op == "in" else [new.value]
+        return set(map(str, new_items)) <= set(map(str, base.value))
+    new_bounds, base_bounds = _bounds(new), _bounds(base)
+    if new_bounds is None or base_bounds is None:
+        return False
+    try:
+        (new_low, new_high), (base_low, base_high) = new_bounds, base_bounds
+        if base_low is not None:
+            if new_low is None or float(new_low) < float(base_low):
+                return False
+            if float(new_low) == float(base_low) and base.op == ">" and new.op not in (">",):
+                return False
+        if base_high is not None:
+            if new_high is None or float(new_high) > float(base_high):
+                return False
+            if float(new_high) == float(base_high) and base.op == "<" and new.op not in ("<",):
+                return False
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def is_refinement(base_filters, new_filters):
+    """True if new_filters select a subset of the rows base_filters select
+
+    Holds when every base condition is implied by some new condition, e.g.
+    DOC > 100 refines DOC > 80, and adding conditions refines too.
+    """
+    try:
+        base, new = parse_filters(base_filters), parse_filters(new_filters)
+    except UnsupportedFilter:
+        return False
+    return _refines(base, new)
+
+
+def _refines(base, new):
+    return all(any(_implies(n, b) for n in new) for b in base)
+
+
+def acres_column(columns):
+    for col in columns:
+        if "acre" in str(col).lower():
+            return col
+    return None
+
+
+def refinement_mask(result, base_filters, new_filters):
+    """Boolean mask over the stored rows of a fully stored result of base_filters selecting new_filters
+
+    result is a result_store.ResultSet. Raises UnsupportedFilter when the
+    refinement needs the server: the stored result is incomplete,
+    new_filters are broader than base_filters, or the field of a new or
+    changed condition isn't a stored column.
+    """
+    if not result.complete:
+        raise UnsupportedFilter("The stored result is incomplete")
+    base, new = parse_filters(base_filters), parse_filters(new_filters)
+    if not _refines(base, new):
+        raise UnsupportedFilter("The new filters are broader than the stored result")
+    # Every stored row already passes the base conditions, so those kept as
+    # they were aren't evaluated, nor need a column (e.g. a harvest condition
+    # on a relationship)
+    conditions = [n for n in new if not any(_same(n, b) for b in base)]
+    frame = result.frame(_condition_columns(conditions, result.columns()))
+    return _conditions_mask(frame, conditions) if conditions else np.ones(result.rows_stored, dtype=bool)
+
+
+def refine(result, base_filters, new_filters, skip=0, limit=100):
+    """Evaluate new_filters over a fully stored result of base_filters
+
+    Returns (page df, total_count, total_acres); raises UnsupportedFilter
+    as refinement_mask does.
+    """
+    mask = refinement_mask(result, base_filters, new_filters)
+    total_count = int(mask.sum())
+    acres = acres_column(result.columns())
+    total_acres = float(pd.to_numeric(result.frame([acres])[acres], errors='coerce')[mask].sum()) if acres else 0.0
+    page, _ = result.select(mask, skip=skip, limit=limit)
+    return page, total_count, total_acres
+
+
+def coerce_value(text):
+    """A filter value typed as text: a number, true/false, null, or the text itself"""
+    text = text.strip()
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    if text.lower() in ("null", "none"):
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    return int(number) if number.is_integer() else number
+
+
+def format_value(value):
+    """A condition's value as text to edit; coerce_value/parse_value read it back"""
+    if isinstance(value, (list, tuple)):
+        return ", ".join("" if v is None else str(v) for v in value)
+    return "" if value is None else str(value)
+
+
+def parse_value(text, op):
+    """The value of an op condition from text, a comma-separated list for between/in/not in"""
+    if op in ("is null", "is not null"):
+        return None
+    if op in _LIST_OPERATORS:
+        items = [coerce_value(part) if part.strip() else None for part in text.split(",")]
+        return tuple(items[:2]) if op == "between" else items
+    return coerce_value(text)
+
+
+_LIST_OPERATORS = ("between", "in", "not in")
+
+
+def edited_value(condition, op, text):
+    """Value of a condition edited to op and text
+
+    Text left as format_value showed it keeps the condition's own value,
+    so e.g. harvestDone == False doesn't come back as the string "False".
+    """
+    if text == format_value(condition.value) and (op in _LIST_OPERATORS) == (condition.op in _LIST_OPERATORS):
+        return condition.value
+    return parse_value(text, op)
+
+
+def with_value(condition, op=None, value=None):
+    """Copy of a condition's original filter object with a new operator or value"""
+    source = dict(condition.source)
+    if len(source) == 1 and not _first(source, FIELD_KEYS):
+        # Mapping-style filter {field: spec}
+        (field, spec), = source.items()
+        return {field: {op or condition.op: value if value is not None else condition.value}}
+    if op is not None:
+        op_key = _first(source, OPERATOR_KEYS) or "operator"
+        source[op_key] = op
+    if value is not None:
+        if "min" in source or "max" in source:
+            source["min"], source["max"] = value
+        else:
+            source[_first(source, VALUE_KEYS) or "value"] = value
+    return source
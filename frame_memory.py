@@ -0,0 +1,88 @@
+"""Memory-lean dtypes for fetched pages and process memory figures for the UI
+
+Pond pages are mostly low-cardinality text (farm, region, species, status)
+and small integers such as DOC. compact_frame stores repeated text as
+categoricals, other text as Arrow-backed strings, and integers in the
+smallest type that holds them, which typically shrinks a page several times.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this many distinct values per row become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+
+def frame_nbytes(df):
+    """Memory held by a DataFrame, counting string contents"""
+    if df is None:
+        return 0
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _compact_column(values):
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(dtype):
+        return None
+    if pd.api.types.is_datetime64_any_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype):
+        return None
+    if pd.api.types.is_integer_dtype(dtype):
+        compact = pd.to_numeric(values, downcast="integer")
+        return compact if compact.dtype != dtype else None
+    if pd.api.types.is_float_dtype(dtype):
+        # Only when nothing is lost: acres with two decimals are not exact in float32
+        if dtype == np.float32:
+            return None
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow.to_numpy(dtype=np.float64), values.to_numpy(dtype=np.float64), equal_nan=True):
+            return narrow
+        return None
+    if pd.api.types.is_object_dtype(dtype):
+        # Columns mixing numbers and text keep their values as they are
+        if pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+            return None
+    elif not pd.api.types.is_string_dtype(dtype):
+        return None
+    if len(values) and values.nunique(dropna=True) <= len(values) * CATEGORY_MAX_RATIO:
+        return values.astype("category")
+    if pd.api.types.is_object_dtype(dtype) or getattr(dtype, "storage", None) != "pyarrow":
+        return values.astype(pd.StringDtype("pyarrow"))
+    return None
+
+
+def compact_frame(df):
+    """df with categoricals for repeated text, Arrow strings and downcast numbers
+
+    Returns a new frame when any column changed (df itself is left alone),
+    else df.
+    """
+    columns = {}
+    for col in df.columns:
+        compact = _compact_column(df[col])
+        if compact is not None:
+            columns[col] = compact
+    if not columns:
+        return df
+    # assign() with keyword arguments would trip on column names that are not identifiers
+    compacted = df.copy(deep=False)
+    for col, values in columns.items():
+        compacted[col] = values
+    return compacted
+
+
+def process_rss_bytes():
+    """Resident memory of this process, or its peak where the current figure isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
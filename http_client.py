@@ -0,0 +1,138 @@
+"""Pooled, retrying HTTP client for the farm ponds API"""
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from perf import percentile
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RequestStats:
+    """Latency and retry counts of the recent requests made by a client
+
+    Latency runs until the response headers arrive, so for stream=True
+    requests it leaves out reading the body.
+    """
+
+    def __init__(self, window=200):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.last = None
+
+    def record(self, url, latency, attempts, status, error=None):
+        with self._lock:
+            self.requests += 1
+            self.retries += attempts - 1
+            if error is not None or status is None or status >= 400:
+                self.failures += 1
+            self._latencies.append(latency)
+            self.last = {
+                "url": url,
+                "latency": latency,
+                "attempts": attempts,
+                "retries": attempts - 1,
+                "status": status,
+                "error": error,
+            }
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "p50": percentile(latencies, 0.50),
+                "p95": percentile(latencies, 0.95),
+                "last": dict(self.last) if self.last else None,
+            }
+
+
+def backoff_delay(interval, failures, max_interval):
+    """Seconds to wait after failures failures in a row: interval doubled per failure, capped and jittered
+
+    The jitter keeps many sessions or servers from retrying in step.
+    """
+    return min(max_interval, interval * 2 ** failures) * random.uniform(0.5, 1.0)
+
+
+class PondsClient:
+    """requests.Session wrapper with keep-alive pooling, timeouts and jittered retries
+
+    Build one per process and share it between sessions and worker threads;
+    requests.Session connection pools are safe to use concurrently.
+    """
+
+    def __init__(self, pool_size=16, connect_timeout=5, read_timeout=90,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = RequestStats()
+
+        self.session = requests.Session()
+        # Retries are handled in post() so they can be counted and jittered
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post(self, url, json=None, **kwargs):
+        """POST with retries on connection errors, timeouts, 429 and 5xx
+
+        Returns the final response; raise_for_status is left to the caller.
+        The response carries the attempt count as response.attempts.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self.session.post(url, json=json, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt > self.max_retries:
+                    self.stats.record(url, time.perf_counter() - started, attempt, None, str(e))
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt <= self.max_retries:
+                delay = self._retry_after(response) or self._backoff(attempt)
+                response.close()
+                time.sleep(delay)
+                continue
+
+            response.attempts = attempt
+            self.stats.record(url, time.perf_counter() - started, attempt, response.status_code)
+            return response
+
+    def warm(self, url):
+        """Open a pooled connection to url's host ahead of the first request
+
+        Pays for DNS, TCP and TLS while nobody is waiting; the response
+        status doesn't matter and the request isn't counted in stats.
+        """
+        self.session.head(url, timeout=self.timeout, allow_redirects=False).close()
+
+    def close(self):
+        self.session.close()
+
+    def _backoff(self, attempt):
+        # Full jitter keeps retrying sessions from hitting the API in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _retry_after(self, response):
+        value = response.headers.get("Retry-After")
+        try:
+            return min(self.backoff_max, max(0.0, float(value)))
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,326 @@
+"""Page cache and background prefetching for farm ponds pagination"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+DEFAULT_LIMIT = 100
+
+
+def normalize_query(query):
+    """Collapse case and whitespace so trivially different queries share cached pages"""
+    return " ".join(str(query or "").lower().split())
+
+
+def page_key(query, applied_filters, skip, limit):
+    """Build the cache key for one page of a query"""
+    filters = json.dumps(applied_filters or [], sort_keys=True, default=str)
+    return (normalize_query(query), filters, int(skip or 0), int(limit or DEFAULT_LIMIT))
+
+
+def value_nbytes(value):
+    """Approximate memory held by a cached page tuple"""
+    df = value[0] if isinstance(value, tuple) and value else value
+    try:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    except AttributeError:
+        return 0
+
+
+class PageCache:
+    """Thread-safe LRU cache of fetched pages with count, memory and TTL eviction
+
+    Pages can be stored and read on behalf of an owner (a session). With
+    max_owner_bytes set, an owner holding more than that drops its least
+    recently used pages; a page no other owner holds is evicted with it.
+    """
+
+    def __init__(self, max_pages=50, ttl_seconds=300, max_bytes=None, max_owner_bytes=None):
+        self.max_pages = max_pages
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_owner_bytes = max_owner_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()  # key -> (stored_at, nbytes, value)
+        self._owners = {}  # owner -> OrderedDict of its keys, least recently used first
+        self._key_owners = {}  # key -> set of owners
+        self._lock = threading.Lock()
+
+    def get(self, key, owner=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, _, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            if owner is not None:
+                self._claim(key, owner)
+            return value
+
+    def put(self, key, value, owner=None):
+        # A page stored under two keys is counted twice, which errs on the safe side
+        nbytes = value_nbytes(value) if self.max_bytes or self.max_owner_bytes else 0
+        with self._lock:
+            # Replacing a page keeps the owners holding it
+            owners = self._key_owners.pop(key, set())
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), nbytes, value)
+            self.nbytes += nbytes
+            if owners:
+                self._key_owners[key] = owners
+            if owner is not None:
+                self._claim(key, owner)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._owners.clear()
+            self._key_owners.clear()
+            self.nbytes = 0
+
+    def discard(self, match):
+        """Drop every cached value whose key satisfies match; returns how many were dropped"""
+        with self._lock:
+            keys = [key for key in self._entries if match(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def owner_stats(self, owner):
+        """(pages, bytes) held for owner"""
+        with self._lock:
+            keys = self._owners.get(owner, ())
+            return len(keys), sum(self._entries[k][1] for k in keys)
+
+    def owners(self):
+        return len(self._owners)
+
+    def update(self, match, transform):
+        """Replace each cached value whose key satisfies match with transform(value)
+
+        Returns the number of values replaced; they count as freshly stored.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if match(key)]
+        replaced = 0
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                self.put(key, transform(value))
+                replaced += 1
+        return replaced
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def _remove(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self.nbytes -= nbytes
+        for owner in self._key_owners.pop(key, ()):
+            keys = self._owners.get(owner)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del self._owners[owner]
+
+    def _claim(self, key, owner):
+        keys = self._owners.setdefault(owner, OrderedDict())
+        keys[key] = None
+        keys.move_to_end(key)
+        self._key_owners.setdefault(key, set()).add(owner)
+        if not self.max_owner_bytes:
+            return
+        held = sum(self._entries[k][1] for k in keys)
+        for old in list(keys):
+            if held <= self.max_owner_bytes:
+                break
+            if old == key:
+                continue  # Never the page being handed out
+            held -= self._entries[old][1]
+            self._release(old, owner)
+
+    def _release(self, key, owner):
+        keys = self._owners[owner]
+        keys.pop(key, None)
+        if not keys:
+            del self._owners[owner]
+        owners = self._key_owners.get(key)
+        owners.discard(owner)
+        if not owners:
+            self._remove(key)
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [k for k, (stored_at, _, _) in self._entries.items() if now - stored_at > self.ttl_seconds]
+        for k in expired:
+            self._remove(k)
+        while len(self._entries) > self.max_pages:
+            self._remove(next(iter(self._entries)))
+        while self.max_bytes and self.nbytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+
+
+class PagePrefetcher:
+    """Serve pages from a PageCache and fetch the following pages in the background
+
+    fetch_page is called as fetch_page(query, skip=, limit=, applied_filters=,
+    total_count=, total_acres=) and must return the
+    (df, cypher, total_count, applied_filters, total_acres) tuple without
+    touching Streamlit, since prefetches run on worker threads.
+
+    One instance can be shared by every session: concurrent requests for the
+    same page, foreground or prefetch, wait on a single in-flight fetch. A
+    request for a page whose prefetch hasn't started yet cancels it and
+    fetches the page itself rather than waiting for the executor.
+    Cached DataFrames are shared between callers and must not be mutated.
+    Passing owner (a session id) counts the pages against that session's
+    budget in the cache. invalidate(query) makes the next requests for a
+    query fetch fresh pages.
+    """
+
+    def __init__(self, cache, fetch_page, executor, depth=2):
+        self.cache = cache
+        self.depth = depth
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._fetch_page = fetch_page
+        self._executor = executor
+        self._inflight = {}  # key -> Future
+        self._generations = {}  # normalized query -> times invalidated
+        self._lock = threading.Lock()
+
+    def get(self, query, skip=None, limit=None, applied_filters=None, total_count=None, total_acres=None,
+            owner=None):
+        """Return a page from the cache, an in-flight fetch, or a new fetch"""
+        key = page_key(query, applied_filters, skip, limit)
+        for attempt in range(2):
+            cached = self.cache.get(key, owner)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+            with self._lock:
+                future = self._inflight.get(key)
+                if future is not None and future.cancel():
+                    # A prefetch still queued behind other work; fetch it now instead
+                    del self._inflight[key]
+                    future = None
+                leader = future is None
+                if leader:
+                    future = Future()
+                    future.set_running_or_notify_cancel()  # So it can't be cancelled as a queued prefetch
+                    self._inflight[key] = future
+                    generation = self._generations.get(key[0], 0)
+
+            if not leader:
+                self.coalesced += 1
+                try:
+                    result = future.result()
+                    self.cache.get(key, owner)  # Count the shared page for this owner too
+                    return result
+                except Exception:
+                    if attempt:
+                        raise
+                    continue  # The shared fetch failed; try once more ourselves
+
+            self.misses += 1
+            try:
+                result = self._fetch_page(query, skip=skip, limit=limit, applied_filters=applied_filters,
+                                          total_count=total_count, total_acres=total_acres)
+                self._store(key, query, skip, limit, result, owner, generation)
+                future.set_result(result)
+                return result
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    if self._inflight.get(key) is future:
+                        del self._inflight[key]
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "pages": len(self.cache),
+            "bytes": self.cache.nbytes,
+            "owners": self.cache.owners(),
+        }
+
+    def prefetch_after(self, query, skip, limit, total_count, applied_filters=None, total_acres=None, owner=None):
+        """Queue background fetches for the pages following skip"""
+        skip = int(skip or 0)
+        limit = int(limit or DEFAULT_LIMIT)
+        for i in range(1, self.depth + 1):
+            next_skip = skip + i * limit
+            if not total_count or next_skip >= total_count:
+                break
+            key = page_key(query, applied_filters, next_skip, limit)
+            with self._lock:
+                if key in self._inflight or key in self.cache:
+                    continue
+                self._inflight[key] = self._executor.submit(
+                    self._prefetch, key, query, next_skip, limit, applied_filters, total_count, total_acres, owner,
+                    self._generations.get(key[0], 0)
+                )
+
+    def invalidate(self, query):
+        """Drop every cached page of a query, whatever its filters
+
+        Fetches of the query already in flight finish for the callers waiting
+        on them, but their pages aren't cached and later requests start new
+        fetches. Returns the number of pages dropped.
+        """
+        query = normalize_query(query)
+        with self._lock:
+            self._generations[query] = self._generations.get(query, 0) + 1
+            for key in [key for key in self._inflight if key[0] == query]:
+                del self._inflight[key]
+        return self.cache.discard(lambda key: key[0] == query)
+
+    def update_pages(self, query, applied_filters, transform):
+        """Apply transform to every cached page tuple of a query
+
+        Pages cached under the unfiltered key of the first request are
+        included. Returns the number of pages replaced.
+        """
+        query = normalize_query(query)
+        filters = {page_key(query, applied_filters, 0, None)[1], page_key(query, None, 0, None)[1]}
+        return self.cache.update(lambda key: key[0] == query and key[1] in filters, transform)
+
+    def _prefetch(self, key, query, skip, limit, applied_filters, total_count, total_acres, owner=None,
+                  generation=0):
+        try:
+            result = self._fetch_page(query, skip=skip, limit=limit, applied_filters=applied_filters,
+                                      total_count=total_count, total_acres=total_acres)
+            self._store(key, query, skip, limit, result, owner, generation)
+            return result
+        finally:
+            with self._lock:
+                # After an invalidation the key may belong to a newer fetch
+                if self._generations.get(key[0], 0) == generation:
+                    self._inflight.pop(key, None)
+
+    def _store(self, key, query, skip, limit, result, owner=None, generation=0):
+        with self._lock:
+            if self._generations.get(key[0], 0) != generation:
+                return  # Fetched before the query was invalidated
+        self.cache.put(key, result, owner)
+        # The first page is requested without filters and answered with them;
+        # later requests for the same page carry the filters, so cache both
+        response_filters = result[3] if len(result) > 3 else None
+        if response_filters:
+            filtered_key = page_key(query, response_filters, skip, limit)
+            if filtered_key != key:
+                self.cache.put(filtered_key, result, owner)
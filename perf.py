@@ -0,0 +1,89 @@
+"""Timing spans for the fetch and render hot path
+
+Each span is emitted as one JSON log line on the "aqua.perf" logger and kept
+in a rolling window per stage for p50/p95 reporting.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("aqua.perf")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(os.environ.get("PERF_LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+
+
+def percentile(values, q):
+    """The q-quantile of sorted values by nearest rank; None if there are none"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class PerfRecorder:
+    """Thread-safe rolling window of span durations per stage"""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._durations = defaultdict(lambda: deque(maxlen=window))
+        self._last = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage, **fields):
+        """Time a block; fields (and any the block adds to the yielded dict) are logged"""
+        started = time.perf_counter()
+        error = None
+        try:
+            yield fields
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            if error:
+                fields["error"] = error
+            self.record(stage, time.perf_counter() - started, **fields)
+
+    def record(self, stage, seconds, **fields):
+        with self._lock:
+            self._durations[stage].append(seconds)
+            self._last[stage] = fields
+        if logger.isEnabledFor(logging.INFO):
+            line = {"event": "span", "stage": stage, "ms": round(seconds * 1000, 3),
+                    "thread": threading.current_thread().name}
+            line.update(fields)
+            logger.info(json.dumps(line, default=str))
+
+    def summary(self):
+        """One row per stage: count, p50/p95 in ms, and the last span's bytes/wire bytes/rows"""
+        with self._lock:
+            stages = {stage: sorted(d) for stage, d in self._durations.items()}
+            last = {stage: dict(f) for stage, f in self._last.items()}
+        rows = []
+        for stage, durations in stages.items():
+            rows.append({
+                "stage": stage,
+                "count": len(durations),
+                "p50_ms": round(percentile(durations, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(durations, 0.95) * 1000, 2),
+                "last_bytes": last[stage].get("bytes"),
+                "last_wire_bytes": last[stage].get("wire_bytes"),
+                "last_rows": last[stage].get("rows"),
+            })
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._last.clear()
+
+
+# Shared by the script thread and the prefetch/export workers
+PERF = PerfRecorder()
@@ -0,0 +1,217 @@
+"""Fetching and decoding /api/getFarmPonds results, with no Streamlit dependency
+
+The dashboard, the batch runner (batch_queries.py) and the benchmarks all go
+through these functions. They run on any thread, take the PondsClient to use
+and raise on request errors instead of reporting them.
+"""
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from date_schema import DATE_SCHEMAS
+from delta_sync import changed_rows
+from frame_memory import compact_frame, frame_nbytes
+from perf import PERF
+from stream_decode import PondsStreamDecoder, iter_chunks
+from transport import TRANSPORT_HEADERS, is_arrow, read_arrow
+
+logger = logging.getLogger(__name__)
+
+# Point at a local stand-in (python stub_server.py) for load tests and benchmarks
+PONDS_API_URL = os.environ.get(
+    "PONDS_API_URL",
+    "https://ax-ai-reports-912635809422.asia-south1.run.app/api/getFarmPonds"
+)
+
+# Wire format to ask for: "arrow" (Arrow IPC, falling back to gzipped JSON),
+# "gzip" or "json"
+PONDS_TRANSPORT = os.environ.get("PONDS_TRANSPORT", "arrow")
+
+# JSON response bodies are read in STREAM_READ_BYTES pieces and decoded into
+# DataFrame chunks of STREAM_CHUNK_ROWS rows, so large pages never hold the raw
+# body and a dict per row at once
+STREAM_READ_BYTES = 64 * 1024
+STREAM_CHUNK_ROWS = 5000
+
+# Delta requests (updatedSince) are paged DELTA_PAGE_ROWS at a time
+DELTA_PAGE_ROWS = 5000
+
+
+def request_ponds_page(client, query_params, skip=None, limit=None, applied_filters=None, total_count=None, total_acres=None, url=None, transport=None):
+    """Fetch and parse one page from the farm ponds API
+
+    Returns (df, cypher, total_count, applied_filters, total_acres). Safe to
+    call from background threads; raises on request errors. client is a
+    PondsClient (the dashboard passes its shared one); url defaults to
+    PONDS_API_URL and transport to PONDS_TRANSPORT.
+    """
+    url = url or PONDS_API_URL
+    transport = transport or PONDS_TRANSPORT
+
+    with PERF.span("payload_build") as span:
+        # Create the payload with the query parameters and pagination
+        payload = {
+            "query": query_params
+        }
+        if total_count:
+            payload["totalCount"] = total_count
+        if total_acres:
+            payload["totalAcres"] = total_acres
+
+        # Add appliedFilters only if provided and not empty
+        if applied_filters:
+            payload["appliedFilters"] = applied_filters
+        if skip:
+            payload["skip"] = skip
+        if limit:
+            payload["limit"] = limit
+        span.update(skip=skip or 0, limit=limit, filters=bool(applied_filters))
+
+    df, meta = post_ponds_query(client, payload, url, transport)
+
+    cypher_query = meta.get("cypher") or ""
+    if meta.get("totalCount") is not None:
+        total_count = int(meta["totalCount"])
+    if meta.get("totalAcres") is not None:
+        total_acres = float(meta["totalAcres"])
+    response_filters = meta.get("appliedFilters") or []
+    total_acres = total_acres or 0
+    return df, cypher_query, total_count, response_filters, total_acres
+
+
+def post_ponds_query(client, payload, url, transport):
+    """POST a request payload and decode the response into (DataFrame, metadata dict)"""
+    with PERF.span("http_round_trip", skip=payload.get("skip") or 0) as span:
+        # stream=True returns once headers arrive; the body is decoded as it is read
+        response = client.post(url, json=payload, headers=TRANSPORT_HEADERS[transport], stream=True)
+        span.update(status=response.status_code, attempts=getattr(response, "attempts", 1))
+    try:
+        response.raise_for_status()
+        if is_arrow(response):
+            with PERF.span("arrow_decode") as span:
+                response.raw.decode_content = True
+                df, meta = read_arrow(response.raw)
+                span.update(wire_bytes=response.raw.tell(), rows=len(df), columns=len(df.columns))
+            chunks = [df] if len(df) else []
+            rows = len(df)
+        else:
+            # Servers without Arrow support answer with JSON (gzip is undone by requests)
+            decoder = PondsStreamDecoder(chunk_rows=STREAM_CHUNK_ROWS)
+            with PERF.span("stream_decode") as span:
+                chunks = list(iter_chunks(response.iter_content(STREAM_READ_BYTES), decoder))
+                span.update(bytes=decoder.bytes, wire_bytes=response.raw.tell(), rows=decoder.rows,
+                            chunks=len(chunks), encoding=response.headers.get("Content-Encoding", "identity"))
+            # Metadata may sit at the top level or under "response"; top level wins
+            meta = decoder.meta()
+            rows = decoder.rows
+    finally:
+        response.close()
+
+    if not chunks:
+        return pd.DataFrame(), meta
+
+    # Convert date columns to datetime if they exist (exclude 'DOC' as it's an integer)
+    with PERF.span("date_parse", rows=rows, chunks=len(chunks)) as span:
+        for chunk in chunks:
+            date_columns = [col for col in chunk.columns
+                          if any(x in col.lower() for x in ['datalastupdated','feedlastupdated','nettinglastupdatedat'])
+                          and 'doc' not in col.lower()]
+            span["columns"] = len(date_columns)
+            for col in date_columns:
+                if pd.api.types.is_datetime64_any_dtype(chunk[col]):
+                    continue  # Already typed by the Arrow payload
+                try:
+                    # Format is inferred once per column (day-first preferred), then
+                    # parsed on the fixed-format path with per-row fallback
+                    chunk[col] = DATE_SCHEMAS.parse(col, chunk[col])
+                except Exception as e:
+                    logger.warning("Could not convert column '%s' to datetime: %s", col, e)
+                    continue
+
+    with PERF.span("dataframe_build", rows=rows) as span:
+        df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+        span.update(columns=len(df.columns))
+
+    # After the concat, since categoricals of chunks with different categories
+    # would concatenate back to plain text
+    with PERF.span("dtype_compact", rows=rows) as span:
+        before = frame_nbytes(df)
+        df = compact_frame(df)
+        span.update(bytes=frame_nbytes(df), bytes_before=before)
+    return df, meta
+
+
+def request_ponds_changes(client, query_params, applied_filters, updated_since, url=None, transport=None):
+    """Ponds of a result changed after updated_since (an ISO timestamp), all pages of them
+
+    Returns (changes DataFrame, removed pond ids, total_count, total_acres);
+    the totals are the server's current ones for the whole result. Like
+    request_ponds_page it runs on worker threads and raises on errors.
+
+    The API must support updatedSince and answer with removedIds. A server
+    that ignores updatedSince would send the whole result, so its first page
+    is checked and DeltaUnsupported raised if it holds unchanged ponds.
+    """
+    url = url or PONDS_API_URL
+    transport = transport or PONDS_TRANSPORT
+    frames = []
+    removed_ids = []
+    total_count = total_acres = None
+    skip = 0
+    while True:
+        payload = {"query": query_params, "updatedSince": updated_since, "limit": DELTA_PAGE_ROWS}
+        if applied_filters:
+            payload["appliedFilters"] = applied_filters
+        if skip:
+            payload["skip"] = skip
+        df, meta = post_ponds_query(client, payload, url, transport)
+        page_rows = len(df)
+        df = changed_rows(df, updated_since)
+        removed_ids.extend(meta.get("removedIds") or [])
+        if meta.get("totalCount") is not None:
+            total_count = int(meta["totalCount"])
+        if meta.get("totalAcres") is not None:
+            total_acres = float(meta["totalAcres"])
+        if len(df):
+            frames.append(df)
+        if page_rows < DELTA_PAGE_ROWS:
+            break
+        skip += DELTA_PAGE_ROWS
+    if not frames:
+        return pd.DataFrame(), removed_ids, total_count, total_acres
+    changes = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    return changes, removed_ids, total_count, total_acres
+
+
+def iter_result_pages(fetch_page, query, applied_filters=None, total_count=None, total_acres=None,
+                      page_size=500, max_workers=4):
+    """Yield (DataFrame, total_count) for every page of a query, in order
+
+    fetch_page is called like request_ponds_page without the client (bind it
+    with functools.partial). The first page settles the total and the
+    filters the server applied; the rest are fetched max_workers at a time,
+    with at most 2 * max_workers pages held in memory.
+    """
+    # The first page tells us the total and the filters the server settled on
+    first, _, total_count, response_filters, total_acres = fetch_page(
+        query, skip=None, limit=page_size, applied_filters=applied_filters,
+        total_count=total_count, total_acres=total_acres
+    )
+    applied_filters = response_filters or applied_filters
+    total_count = int(total_count or len(first))
+    yield first, total_count
+
+    skips = deque(range(page_size, total_count, page_size))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pond-pages") as pool:
+        pending = deque()
+        while skips or pending:
+            while skips and len(pending) < 2 * max_workers:
+                pending.append(pool.submit(
+                    fetch_page, query, skip=skips.popleft(), limit=page_size,
+                    applied_filters=applied_filters, total_count=total_count,
+                    total_acres=total_acres
+                ))
+            yield pending.popleft().result()[0], total_count
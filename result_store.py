@@ -0,0 +1,498 @@
+"""On-disk columnar store of query results for local sort, filter and pagination
+
+Each query result (normalized query + appliedFilters) gets a directory of
+Arrow IPC segment files, one per fetched row range. Segments are read back
+through memory maps, so scanning a 100k-pond result costs page cache rather
+than Python heap, and only the rows of the requested page become a DataFrame.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from analytics import ResultAggregates
+from delta_sync import merge_changes
+from page_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+RESULT_DIR = os.path.join(tempfile.gettempdir(), "aqua_results")
+
+COMPARISONS = {
+    ">": pc.greater,
+    ">=": pc.greater_equal,
+    "<": pc.less,
+    "<=": pc.less_equal,
+    "==": pc.equal,
+    "!=": pc.not_equal,
+}
+
+
+def result_key(query, applied_filters):
+    """Directory name for a query result"""
+    key = json.dumps([normalize_query(query), applied_filters or []], sort_keys=True, default=str)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+def _to_arrow(df):
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columns mixing types (e.g. numbers and strings) are stored as text
+        mixed = {c: df[c].map(lambda v: None if v is None else str(v)) for c in df.columns if df[c].dtype == object}
+        table = pa.Table.from_pandas(df.assign(**mixed), preserve_index=False)
+    # Categorical columns arrive as dictionaries whose values and index width
+    # differ from page to page; store plain values so segments share a schema
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, pc.cast(table.column(i), field.type.value_type))
+    return table
+
+
+def _unify(tables):
+    try:
+        return pa.concat_tables(tables, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Fall back to text for columns whose type differs between segments
+        types = {}
+        for t in tables:
+            for field in t.schema:
+                types.setdefault(field.name, set()).add(field.type)
+        conflicting = {name for name, ts in types.items() if len(ts - {pa.null()}) > 1}
+        recast = []
+        for t in tables:
+            for name in conflicting & set(t.column_names):
+                i = t.schema.get_field_index(name)
+                t = t.set_column(i, name, pc.cast(t[name], pa.string()))
+            recast.append(t)
+        return pa.concat_tables(recast, promote_options="permissive")
+
+
+class ResultSet:
+    """The stored rows of one query result, filled one row range at a time"""
+
+    def __init__(self, path, query="", applied_filters=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._table = None
+        self._order = None  # (table, key, indices) of the last list-filtered select
+        self._aggregates = None
+        self._aggregates_saved_at = 0.0
+        self._fetching = set()  # (skip, limit) ranges queued by fetch_missing
+        os.makedirs(path, exist_ok=True)
+        self.meta = self._load_meta() or {
+            "query": query,
+            "applied_filters": applied_filters or [],
+            "total_count": None,
+            "total_acres": None,
+            "segments": [],  # [start, end, file name], kept sorted by start
+            "updated_at": time.time(),
+        }
+
+    @property
+    def total_count(self):
+        return self.meta["total_count"]
+
+    @property
+    def total_acres(self):
+        return self.meta["total_acres"]
+
+    @property
+    def rows_stored(self):
+        return sum(end - start for start, end, _ in self.meta["segments"])
+
+    @property
+    def complete(self):
+        return self.total_count is not None and self.rows_stored >= self.total_count
+
+    def append(self, skip, df, total_count=None, total_acres=None):
+        """Store the rows of a page fetched at offset skip, skipping rows already held"""
+        skip = int(skip or 0)
+        with self._lock:
+            if total_count is not None and self.total_count not in (None, total_count):
+                # The result changed on the server; start over
+                self._clear_segments()
+            if total_count is not None:
+                self.meta["total_count"] = int(total_count)
+            if total_acres:
+                self.meta["total_acres"] = float(total_acres)
+            if not df.empty:
+                aggregates = self._load_aggregates()
+                for start, end in self._uncovered(skip, skip + len(df)):
+                    rows = df.iloc[start - skip:end - skip]
+                    self.meta["segments"].append([start, end, self._write_segment(start, rows)])
+                    # Only rows not held before reach the aggregates, so refetched
+                    # pages are never counted twice
+                    aggregates.merge(ResultAggregates.from_frame(rows))
+                self.meta["segments"].sort()
+                self._table = None
+                self._save_aggregates()
+            self.meta["updated_at"] = time.time()
+            self._save_meta()
+
+    def apply_changes(self, changes, removed_ids, key, total_count=None, total_acres=None):
+        """Merge ponds changed on the server into the stored rows by pond key
+
+        Changed ponds are replaced where they are and removed ponds dropped,
+        rewriting only the segments that hold them, and the aggregates are
+        adjusted by just those rows. Ponds new to a complete result are
+        appended and the rows renumbered from 0, as the server's offsets have
+        shifted too. A partial result can't place its rows against the new
+        offsets once ponds come or go, so it is cleared and refilled as pages
+        are fetched again. Returns the number of stored rows dropped.
+        """
+        changed_ids = changes[key].tolist() if len(changes) and key in changes.columns else []
+        touched_ids = list(dict.fromkeys(changed_ids + list(removed_ids or [])))
+        with self._lock:
+            complete = self.complete
+            aggregates = self._load_aggregates()
+            rewritten = {}
+            found = set()
+            dropped = 0
+            for i, (_, _, name) in enumerate(self.meta["segments"]):
+                with pa.memory_map(os.path.join(self.path, name), "r") as source:
+                    table = pa.ipc.open_file(source).read_all()
+                    if key not in table.column_names or not touched_ids:
+                        continue
+                    # Checking the key column in Arrow keeps untouched segments
+                    # from ever becoming DataFrames
+                    column = pc.cast(table[key], pa.string())
+                    if not pc.any(pc.is_in(column, value_set=pa.array([str(k) for k in touched_ids]))).as_py():
+                        continue
+                    before = table.to_pandas()
+                keys = before[key]
+                found.update(keys[keys.isin(changed_ids)])
+                after = merge_changes(before, changes, removed_ids, key)
+                aggregates.remove(ResultAggregates.from_frame(before[keys.isin(touched_ids)]))
+                aggregates.merge(ResultAggregates.from_frame(after[after[key].isin(changed_ids)]))
+                dropped += len(before) - len(after)
+                rewritten[i] = after
+
+            added = changes[~changes[key].isin(found)].drop_duplicates(key, keep="last") if changed_ids else changes
+            count_changed = total_count is not None and self.total_count not in (None, total_count)
+            if not complete and (dropped or count_changed):
+                self._clear_segments()
+            else:
+                segments = []
+                for i, (start, end, name) in enumerate(self.meta["segments"]):
+                    if i not in rewritten:
+                        segments.append([start, end, name])
+                        continue
+                    os.remove(os.path.join(self.path, name))
+                    rows = rewritten[i]
+                    if len(rows):
+                        segments.append([start, start + len(rows), self._write_segment(start, rows)])
+                if complete and len(added):
+                    held = sum(end - start for start, end, _ in segments)
+                    segments.append([held, held + len(added), self._write_segment(held, added)])
+                    aggregates.merge(ResultAggregates.from_frame(added))
+                if complete:
+                    cursor = 0
+                    for segment in segments:
+                        segment[0], segment[1] = cursor, cursor + (segment[1] - segment[0])
+                        cursor = segment[1]
+                self.meta["segments"] = segments
+                self._table = None
+                self._order = None
+                self._save_aggregates(min_interval=0)
+            if total_count is not None:
+                self.meta["total_count"] = int(total_count)
+            if total_acres:
+                self.meta["total_acres"] = float(total_acres)
+            self.meta["updated_at"] = time.time()
+            self._save_meta()
+            return dropped
+
+    def missing_ranges(self, page_size):
+        """Row ranges (skip, limit) not stored yet, split into pages"""
+        if self.total_count is None:
+            return []
+        with self._lock:
+            gaps = self._uncovered(0, self.total_count)
+        ranges = []
+        for start, end in gaps:
+            for skip in range(start, end, page_size):
+                ranges.append((skip, min(page_size, end - skip)))
+        return ranges
+
+    def fetch_missing(self, fetch_range, executor, page_size):
+        """Queue fetch_range(skip, limit) on executor for each missing range not queued already
+
+        Ranges stay queued until their fetch finishes, so asking again while
+        a backfill runs doesn't submit them twice. Returns the number queued.
+        """
+        queued = 0
+        for missing in self.missing_ranges(page_size):
+            with self._lock:
+                if missing in self._fetching:
+                    continue
+                self._fetching.add(missing)
+            future = executor.submit(fetch_range, *missing)
+            future.add_done_callback(lambda future, missing=missing: self._fetched(missing, future))
+            queued += 1
+        return queued
+
+    def _fetched(self, missing, future):
+        with self._lock:
+            self._fetching.discard(missing)
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("Could not fetch rows %d-%d: %s", missing[0], sum(missing), future.exception())
+
+    def table(self):
+        """All stored rows as one memory-mapped Arrow table, in row order"""
+        with self._lock:
+            if self._table is None:
+                tables = []
+                for _, _, name in self.meta["segments"]:
+                    source = pa.memory_map(os.path.join(self.path, name), "r")
+                    tables.append(pa.ipc.open_file(source).read_all())
+                self._table = _unify(tables) if tables else pa.table({})
+            return self._table
+
+    def columns(self):
+        return self.table().column_names
+
+    def frame(self, columns=None):
+        """Stored rows as a DataFrame, optionally only some columns"""
+        table = self.table()
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+        return table.to_pandas()
+
+    def select(self, where=None, sort_by=None, ascending=True, skip=0, limit=100):
+        """Filter, sort and slice the stored rows
+
+        where is a list of (column, op, value) conditions joined with AND, op
+        being one of COMPARISONS or "contains", or a boolean array over the
+        stored rows. Returns (page DataFrame, number of matching rows).
+
+        The filtered, sorted row order of the last list-filtered call is kept,
+        so scrolling through one ordering only pays for the rows it takes.
+        """
+        table = self.table()
+        if table.num_rows == 0:
+            return pd.DataFrame(), 0
+
+        key = None
+        if where is None or isinstance(where, list):
+            key = json.dumps([where, sort_by, ascending], default=str)
+        cached = self._order
+        if key is not None and cached is not None and cached[0] is table and cached[1] == key:
+            indices = cached[2]
+        else:
+            indices = self._ordered_indices(table, where, sort_by, ascending)
+            if key is not None:
+                self._order = (table, key, indices)
+        matching = len(indices)
+        page = table.take(indices[skip:skip + limit]).to_pandas()
+        page.index = range(skip + 1, skip + 1 + len(page))
+        return page, matching
+
+    def aggregates(self):
+        """Snapshot of the ResultAggregates over every stored row"""
+        with self._lock:
+            return ResultAggregates.from_dict(self._load_aggregates().to_dict())
+
+    def _load_aggregates(self):
+        if self._aggregates is not None:
+            return self._aggregates
+        try:
+            with open(os.path.join(self.path, "aggregates.json"), encoding="utf-8") as f:
+                aggregates = ResultAggregates.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            aggregates = None
+        if aggregates is None or aggregates.rows != self.rows_stored:
+            # Missing or behind the segments (saves are throttled): rebuild once
+            aggregates = ResultAggregates()
+            for _, _, name in self.meta["segments"]:
+                with pa.memory_map(os.path.join(self.path, name), "r") as source:
+                    aggregates.merge(ResultAggregates.from_frame(pa.ipc.open_file(source).read_all().to_pandas()))
+        self._aggregates = aggregates
+        return aggregates
+
+    def _save_aggregates(self, min_interval=5.0):
+        # The farm breakdown can be large, so write at most every min_interval
+        # seconds and once the result is complete
+        if not self.complete and time.time() - self._aggregates_saved_at < min_interval:
+            return
+        tmp = os.path.join(self.path, "aggregates.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._aggregates.to_dict(), f)
+        os.replace(tmp, os.path.join(self.path, "aggregates.json"))
+        self._aggregates_saved_at = time.time()
+
+    def _write_segment(self, start, rows):
+        """Write a DataFrame as the segment file for rows starting at start; returns its name"""
+        end = start + len(rows)
+        name = f"seg_{start:09d}_{end:09d}.arrow"
+        revision = 0
+        while os.path.exists(os.path.join(self.path, name)):
+            # A rewritten segment can land on the range of one renumbered before
+            revision += 1
+            name = f"seg_{start:09d}_{end:09d}_{revision}.arrow"
+        table = _to_arrow(rows)
+        with pa.OSFile(os.path.join(self.path, name), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        return name
+
+    def _ordered_indices(self, table, where, sort_by, ascending):
+        indices = pa.array(np.arange(table.num_rows, dtype=np.int64))
+        if where is not None:
+            mask = self._mask(table, where)
+            indices = pc.filter(indices, mask)
+        if sort_by and sort_by in table.column_names:
+            keys = table[sort_by].take(indices)
+            order = pc.array_sort_indices(keys, order="ascending" if ascending else "descending",
+                                          null_placement="at_end")
+            indices = indices.take(order)
+        return indices
+
+    def _mask(self, table, where):
+        if not isinstance(where, list):
+            return pa.array(where, type=pa.bool_())
+        mask = pa.array(np.ones(table.num_rows, dtype=bool))
+        for column, op, value in where:
+            if column not in table.column_names:
+                continue
+            values = table[column]
+            if op == "contains":
+                cond = pc.match_substring(pc.cast(values, pa.string()), str(value), ignore_case=True)
+            else:
+                cond = COMPARISONS[op](values, value)
+            mask = pc.and_kleene(mask, pc.fill_null(cond, False))
+        return mask
+
+    def _uncovered(self, start, end):
+        gaps = []
+        cursor = start
+        for seg_start, seg_end, _ in self.meta["segments"]:
+            if seg_end <= cursor:
+                continue
+            if seg_start >= end:
+                break
+            if seg_start > cursor:
+                gaps.append((cursor, seg_start))
+            cursor = max(cursor, seg_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def _clear_segments(self):
+        for _, _, name in self.meta["segments"]:
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+        self.meta["segments"] = []
+        self._table = None
+        self._aggregates = None
+        try:
+            os.remove(os.path.join(self.path, "aggregates.json"))
+        except OSError:
+            pass
+
+    def _load_meta(self):
+        try:
+            with open(os.path.join(self.path, "meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_meta(self):
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, default=str)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+
+class ResultStore:
+    """Directory of ResultSets with count and age eviction"""
+
+    def __init__(self, root=RESULT_DIR, max_results=20, ttl_seconds=3600):
+        self.root = root
+        self.max_results = max_results
+        self.ttl_seconds = ttl_seconds
+        self._open = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def open(self, query, applied_filters):
+        """Return the ResultSet for a query, creating it if needed"""
+        key = result_key(query, applied_filters)
+        with self._lock:
+            result = self._open.get(key)
+            if result is not None and time.time() - result.meta["updated_at"] > self.ttl_seconds:
+                self._drop(key)
+                result = None
+            if result is None:
+                path = os.path.join(self.root, key)
+                result = ResultSet(path, query, applied_filters)
+                if time.time() - result.meta["updated_at"] > self.ttl_seconds:
+                    shutil.rmtree(path, ignore_errors=True)
+                    result = ResultSet(path, query, applied_filters)
+                self._open[key] = result
+                self._evict()
+            return result
+
+    def discard(self, query):
+        """Drop every stored result of a query, whatever its filters; returns how many were dropped
+
+        Stored pages are never overwritten by refetched ones, so this is how
+        a result is refreshed as a whole.
+        """
+        query = normalize_query(query)
+        dropped = 0
+        with self._lock:
+            for name in os.listdir(self.root):
+                try:
+                    with open(os.path.join(self.root, name, "meta.json"), encoding="utf-8") as f:
+                        stored = json.load(f)["query"]
+                except (OSError, ValueError, KeyError):
+                    continue
+                if normalize_query(stored) == query:
+                    self._drop(name)
+                    dropped += 1
+        return dropped
+
+    def record(self, query, skip, result, applied_filters=None):
+        """Store a page tuple as returned by the page fetcher"""
+        df, _, total_count, response_filters, total_acres = result
+        self.open(query, response_filters or applied_filters).append(skip, df, total_count, total_acres)
+
+    def _drop(self, key):
+        self._open.pop(key, None)
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if os.path.isdir(path):
+                entries.append((os.path.getmtime(path), name))
+        entries.sort()
+        for _, name in entries[:max(0, len(entries) - self.max_results)]:
+            self._drop(name)
+
+
+def recording_fetcher(fetch_page, store):
+    """Wrap a page fetch function so every page it returns is added to store"""
+    def fetch(query, skip=None, limit=None, applied_filters=None, total_count=None, total_acres=None):
+        result = fetch_page(query, skip=skip, limit=limit, applied_filters=applied_filters,
+                            total_count=total_count, total_acres=total_acres)
+        try:
+            store.record(query, skip, result, applied_filters)
+        except Exception as e:
+            # The local store is an optimization; never fail a fetch over it
+            logger.warning("Could not store page at skip=%s locally: %s", skip, e)
+        return result
+    return fetch
@@ -0,0 +1,159 @@
+"""Cold-start helpers: boot warm-up, process-wide static assets and a startup timing report
+
+After a scale-to-zero the first session pays for everything done once per
+process. The dashboard's first run imports only what the header and search
+box need and then starts a Warmup thread, which imports the data layer,
+opens the API connection and scales the logo while the user types. Shared
+clients and caches are built on first use. Each step is timed once into
+STARTUP, which the Performance panel and benchmarks/bench_startup.py report.
+"""
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Configures the "aqua.perf" logger startup lines are written to
+import perf  # noqa: F401
+
+logger = logging.getLogger("aqua.perf")
+
+
+def process_age():
+    """Seconds since this process started, or None where /proc isn't available"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesized command name; starttime is field 22
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - started_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupReport:
+    """Durations of this process's one-off startup steps, each recorded once"""
+
+    def __init__(self):
+        self.created = time.perf_counter()
+        self._stages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, **fields):
+        with self._lock:
+            if stage in self._stages:
+                return
+            fields.update(stage=stage, ms=round(seconds * 1000, 3), thread=threading.current_thread().name)
+            self._stages[stage] = fields
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(dict(fields, event="startup"), default=str))
+
+    def record_elapsed(self, stage, **fields):
+        """Record stage as the time since the report was created, i.e. since startup.py was first imported"""
+        self.record(stage, time.perf_counter() - self.created, **fields)
+
+    @contextmanager
+    def stage(self, stage, **fields):
+        """Time a block as stage unless it was recorded before"""
+        started = time.perf_counter()
+        try:
+            yield fields
+        except Exception as e:
+            fields["error"] = type(e).__name__
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - started, **fields)
+
+    def rows(self):
+        with self._lock:
+            return [dict(fields) for fields in self._stages.values()]
+
+
+# One per process, like PERF
+STARTUP = StartupReport()
+
+
+class Warmup:
+    """Runs (name, callable) startup tasks in order on a background thread
+
+    A failing task is recorded with its error and doesn't stop the others.
+    What each task returns is kept for result().
+    """
+
+    def __init__(self, tasks):
+        self._done = threading.Event()
+        self._results = {}
+        self._thread = threading.Thread(target=self._run, args=(list(tasks),), name="startup-warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self, tasks):
+        try:
+            for name, task in tasks:
+                try:
+                    with STARTUP.stage(f"warm:{name}"):
+                        self._results[name] = task()
+                except Exception as e:
+                    logger.warning("Startup warm-up of %s failed: %s", name, e)
+        finally:
+            self._done.set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, name, timeout=None):
+        """What task name returned once the warm-up is done; None if it failed or is still running"""
+        self.wait(timeout)
+        return self._results.get(name)
+
+
+class StaticAssets:
+    """Static files held in memory for the life of the process"""
+
+    def __init__(self):
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def load(self, name, path):
+        """Read path once as name; a missing file is stored as None"""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = None
+        self.put(name, data)
+        return data
+
+    def put(self, name, data):
+        with self._lock:
+            self._assets[name] = data
+
+    def get(self, name):
+        return self._assets.get(name)
+
+
+def png_thumbnail(path, max_width):
+    """PNG bytes of the image at path scaled down to max_width
+
+    Falls back to the file as is when Pillow isn't installed, which is only
+    imported here.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        with open(path, "rb") as f:
+            return f.read()
+    with Image.open(path) as image:
+        if image.width <= max_width:
+            with open(path, "rb") as f:
+                return f.read()
+        image.thumbnail((max_width, max_width * image.height // image.width))
+        out = io.BytesIO()
+        image.save(out, format="PNG")
+    return out.getvalue()
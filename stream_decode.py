@@ -0,0 +1,216 @@
+"""Incremental decoding of /api/getFarmPonds response bodies
+
+The data array is parsed as bytes arrive and turned into DataFrame chunks of
+a fixed number of rows, so the raw body and the full tree of row dicts are
+never held at once. cypher, totalCount, totalAcres, appliedFilters and the
+removedIds of delta responses are picked up along the way, at the top level
+or under "response" like the old response.json() path.
+"""
+import codecs
+import json
+import re
+
+import pandas as pd
+
+META_KEYS = ("cypher", "totalCount", "totalAcres", "appliedFilters", "removedIds")
+_WS = re.compile(r"[ \t\n\r]*")
+# A number or literal is only known to be complete once the character after
+# it has arrived: "3" may be the start of "3.25"
+_CLOSED = ("}", "]", '"')
+_AFTER_VALUE = frozenset(" \t\n\r,]}")
+
+
+class PondsStreamDecoder:
+    """Refillable-buffer JSON parser that yields the data array in row chunks
+
+    Call feed(bytes) as the body arrives and close() at the end; both return
+    the DataFrame chunks completed since the last call (chunk_rows rows
+    each, except the last).
+    meta() gives the response metadata once the body has been consumed.
+    Rows from the first data array found are used; a second one is skipped.
+    """
+
+    def __init__(self, chunk_rows=5000):
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self.bytes = 0
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._text = ""
+        self._state = "start"
+        self._scopes = []  # "top" or "response" for each open object
+        self._key = None
+        self._data_seen = False
+        self._meta = {"top": {}, "response": {}}
+        self._chunk = []
+        self._ready = []
+        self._bulk = True  # False until new bytes arrive, after a failed bulk parse
+
+    def feed(self, data):
+        self.bytes += len(data)
+        self._text += self._utf8.decode(data)
+        self._bulk = True
+        self._parse(eof=False)
+        return self._take()
+
+    def close(self):
+        self._text += self._utf8.decode(b"", final=True)
+        self._parse(eof=True)
+        if self._state not in ("done", "ignore"):
+            raise ValueError("Truncated response body")
+        if self._chunk:
+            self._flush()
+        return self._take()
+
+    def meta(self):
+        """cypher, totalCount, totalAcres, appliedFilters, removedIds; top-level values win"""
+        meta = dict(self._meta["response"])
+        meta.update(self._meta["top"])
+        return meta
+
+    def _parse(self, eof):
+        text = self._text
+        pos = 0
+        end = len(text)
+        while True:
+            pos = _WS.match(text, pos).end()
+            if pos >= end or self._state in ("done", "ignore"):
+                break
+            char = text[pos]
+            state = self._state
+
+            if state == "start":
+                if char != "{":
+                    # Not an object: nothing we know how to read, like response.json()
+                    self._state = "ignore"
+                    break
+                self._scopes.append("top")
+                self._state = "key"
+                pos += 1
+
+            elif state == "key":
+                if char == ",":
+                    pos += 1
+                elif char == "}":
+                    self._scopes.pop()
+                    self._state = "key" if self._scopes else "done"
+                    pos += 1
+                else:
+                    decoded = self._decode(text, pos, eof)
+                    if decoded is None:
+                        break
+                    self._key, pos = decoded
+                    self._state = "colon"
+
+            elif state == "colon":
+                if char != ":":
+                    raise ValueError(f"Expected ':' at offset {pos}")
+                self._state = "value"
+                pos += 1
+
+            elif state == "value":
+                scope = self._scopes[-1]
+                if self._key == "data" and char == "[" and not self._data_seen:
+                    self._data_seen = True
+                    self._state = "array"
+                    pos += 1
+                elif self._key == "response" and char == "{" and scope == "top":
+                    self._scopes.append("response")
+                    self._state = "key"
+                    pos += 1
+                else:
+                    decoded = self._decode(text, pos, eof)
+                    if decoded is None:
+                        break
+                    value, pos = decoded
+                    if self._key in META_KEYS:
+                        self._meta[scope][self._key] = value
+                    self._state = "key"
+
+            elif state == "array":
+                if char == ",":
+                    pos += 1
+                elif char == "]":
+                    self._state = "key"
+                    pos += 1
+                else:
+                    batch_end = self._read_rows(text, pos)
+                    if batch_end != pos:
+                        pos = batch_end
+                        continue
+                    decoded = self._decode(text, pos, eof)
+                    if decoded is None:
+                        break
+                    row, pos = decoded
+                    if isinstance(row, dict):
+                        self._add_rows([row])
+
+        # Drop the consumed prefix so the buffer holds at most one partial value
+        self._text = "" if self._state == "ignore" else text[pos:]
+
+    def _decode(self, text, pos, eof):
+        """(value, end) for the JSON value at pos, or None if more bytes are needed"""
+        try:
+            value, end = self._json.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            return None
+        if not eof and text[end - 1] not in _CLOSED and (end == len(text) or text[end] not in _AFTER_VALUE):
+            return None
+        return value, end
+
+    def _read_rows(self, text, pos):
+        """Decode every complete row in text[pos:] with one json.loads call
+
+        The buffer is cut at its last '}' followed by ', {' or ']', which
+        inside a row only occurs in arrays of objects. If the slice isn't
+        valid JSON, the rest of this buffer goes through the one-at-a-time
+        path: the bulk parse is only tried again once more bytes arrive, so
+        a buffer is never parsed more than twice. Returns the new pos.
+        """
+        if not self._bulk:
+            return pos
+        cut = len(text)
+        while True:
+            cut = text.rfind("}", pos, cut)
+            if cut < 0:
+                return pos
+            after = _WS.match(text, cut + 1).end()
+            if after < len(text) and text[after] == ",":
+                after = _WS.match(text, after + 1).end()
+                if after < len(text) and text[after] == "{":
+                    break
+            elif after < len(text) and text[after] == "]":
+                break
+        try:
+            rows = json.loads(f"[{text[pos:cut + 1]}]")
+        except ValueError:
+            self._bulk = False
+            return pos
+        self._add_rows([row for row in rows if isinstance(row, dict)])
+        return cut + 1
+
+    def _add_rows(self, rows):
+        self._chunk.extend(rows)
+        self.rows += len(rows)
+        while len(self._chunk) >= self.chunk_rows:
+            self._flush(self.chunk_rows)
+
+    def _flush(self, rows=None):
+        # pandas' C row-dict constructor beats appending values column by
+        # column in Python, and only about chunk_rows dicts are alive at a time
+        self._ready.append(pd.DataFrame(self._chunk[:rows]))
+        del self._chunk[:rows]
+
+    def _take(self):
+        ready, self._ready = self._ready, []
+        return ready
+
+
+def iter_chunks(byte_chunks, decoder):
+    """Feed an iterable of byte strings to decoder, yielding DataFrame chunks"""
+    for data in byte_chunks:
+        if data:
+            yield from decoder.feed(data)
+    yield from decoder.close()
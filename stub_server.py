@@ -0,0 +1,296 @@
+"""Local stand-in for the /api/getFarmPonds endpoint
+
+Serves a deterministic synthetic pond dataset with the production response
+shape, honouring skip/limit/totalCount/appliedFilters, with optional injected
+latency and errors. Pages are sent as an Arrow IPC stream when the Accept
+header asks for one, otherwise as JSON, gzipped when Accept-Encoding allows;
+--formats limits which of these it offers. With --changes-per-second random
+ponds are updated as time passes, and requests carrying updatedSince get only
+the ponds changed after it. Point the dashboard or the benchmarks at it with
+
+    python stub_server.py --rows 100000 --latency-ms 80 --error-rate 0.02
+    python stub_server.py --changes-per-second 5
+    PONDS_API_URL=http://127.0.0.1:8800/api/getFarmPonds streamlit run farm_ponds_app.py
+"""
+import argparse
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from filter_engine import UnsupportedFilter, filter_mask
+from transport import ARROW_STREAM_MIME, encode_arrow
+
+API_PATH = "/api/getFarmPonds"
+FORMATS = ("json", "gzip", "arrow")
+GZIP_MIN_BYTES = 1024
+REGIONS = ["Andhra Pradesh", "Tamil Nadu", "Odisha", "West Bengal", "Gujarat"]
+SPECIES = ["Vannamei", "Monodon", "Scampi"]
+STATUSES = ["Active", "Stocked", "Harvest Ready", "Idle"]
+BASE_DATE = pd.Timestamp("2023-01-01")
+
+
+def translate_query(query):
+    """Stand-in for the server's NL-to-filters step, covering the common demo questions"""
+    text = str(query or "").lower()
+    filters = []
+    match = re.search(r"(>=|<=|>|<)\s*(\d+)\s*doc|doc\s*(>=|<=|>|<)\s*(\d+)", text)
+    if match:
+        op = match.group(1) or match.group(3)
+        value = int(match.group(2) or match.group(4))
+        filters.append({"field": "DOC", "operator": op, "value": value})
+    if re.search(r"not done any harvest|no harvest|not harvested", text):
+        filters.append({"field": "harvestDone", "operator": "==", "value": False})
+    return filters
+
+
+def _cypher(filters):
+    where = " AND ".join(
+        f"p.{f['field']} {'=' if f['operator'] == '==' else f['operator']} {json.dumps(f['value'])}" for f in filters
+    )
+    return "MATCH (f:Farm)-[:HAS_POND]->(p:Pond)" + (f" WHERE {where}" if where else "") + " RETURN p"
+
+
+class PondDataset:
+    """Synthetic ponds generated column-wise from a seed; rows are formatted per page"""
+
+    def __init__(self, rows, seed=7):
+        rng = np.random.default_rng(seed)
+        self.rows = rows
+        self.columns = pd.DataFrame({
+            "farmIndex": rng.integers(0, max(1, rows // 8), rows),
+            "region": pd.Categorical.from_codes(rng.integers(0, len(REGIONS), rows), REGIONS),
+            "species": pd.Categorical.from_codes(rng.integers(0, len(SPECIES), rows), SPECIES),
+            "status": pd.Categorical.from_codes(rng.integers(0, len(STATUSES), rows), STATUSES),
+            "DOC": rng.integers(0, 150, rows),
+            "acres": np.round(rng.uniform(0.5, 5.0, rows), 2),
+            "harvestDone": rng.random(rows) < 0.3,
+            "dataSeconds": rng.integers(0, 2 * 365 * 24 * 3600, rows),
+            "feedSeconds": rng.integers(0, 2 * 365 * 24 * 3600, rows),
+            "nettingDays": rng.integers(0, 2 * 365, rows),
+        })
+        self._matches = OrderedDict()
+        self._lock = threading.Lock()
+        self._rng = rng
+
+    def matching(self, applied_filters):
+        """Row indices matching applied_filters, cached per filter set"""
+        key = json.dumps(applied_filters or [], sort_keys=True)
+        with self._lock:
+            if key in self._matches:
+                self._matches.move_to_end(key)
+                return self._matches[key]
+        columns = self.columns
+        indices = np.flatnonzero(filter_mask(columns, applied_filters))
+        with self._lock:
+            if columns is not self.columns:
+                return indices  # Ponds changed meanwhile; don't cache a stale match
+            self._matches[key] = indices
+            while len(self._matches) > 32:
+                self._matches.popitem(last=False)
+        return indices
+
+    def frame(self, indices):
+        """API-shaped rows for the given row indices, dates formatted as strings"""
+        page = self.columns.iloc[indices]
+        data_at = BASE_DATE + pd.to_timedelta(page["dataSeconds"].to_numpy(), unit="s")
+        feed_at = BASE_DATE + pd.to_timedelta(page["feedSeconds"].to_numpy(), unit="s")
+        netting_at = BASE_DATE + pd.to_timedelta(page["nettingDays"].to_numpy(), unit="D")
+        return pd.DataFrame({
+            "pondId": [f"POND-{i:07d}" for i in indices],
+            "pondName": [f"Pond {i % 40 + 1}" for i in indices],
+            "farmId": [f"FARM-{f:06d}" for f in page["farmIndex"]],
+            "farmName": [f"Farm {f}" for f in page["farmIndex"]],
+            "region": page["region"].astype(str).to_numpy(),
+            "species": page["species"].astype(str).to_numpy(),
+            "status": page["status"].astype(str).to_numpy(),
+            "DOC": page["DOC"].to_numpy(),
+            "acres": page["acres"].to_numpy(),
+            "harvestDone": page["harvestDone"].to_numpy(),
+            "datalastupdated": data_at.strftime("%d-%m-%Y %H:%M:%S"),
+            "feedlastupdated": feed_at.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "nettinglastupdatedat": netting_at.strftime("%d/%m/%Y"),
+        })
+
+    def acres(self, indices):
+        return round(float(self.columns["acres"].to_numpy()[indices].sum()), 2)
+
+    def changed_since(self, updated_since):
+        """Indices of ponds whose data or feed was updated after updated_since"""
+        seconds = (pd.Timestamp(updated_since).tz_localize(None) - BASE_DATE).total_seconds()
+        columns = self.columns
+        return np.flatnonzero((columns["dataSeconds"].to_numpy() > seconds)
+                              | (columns["feedSeconds"].to_numpy() > seconds))
+
+    def touch(self, count, now=None):
+        """Update count random ponds as of now: new readings, a day of culture, some harvests"""
+        now_seconds = int(((now or pd.Timestamp.now()) - BASE_DATE).total_seconds())
+        with self._lock:
+            indices = self._rng.choice(self.rows, size=min(count, self.rows), replace=False)
+            # Readers keep using the old frame; the swap below is atomic
+            columns = self.columns.copy()
+            columns.loc[indices, "dataSeconds"] = now_seconds
+            fed = indices[self._rng.random(len(indices)) < 0.5]
+            columns.loc[fed, "feedSeconds"] = now_seconds
+            columns.loc[indices, "DOC"] += 1
+            harvested = indices[self._rng.random(len(indices)) < 0.1]
+            columns.loc[harvested, "harvestDone"] = True
+            self.columns = columns
+            self._matches.clear()
+        return indices
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.path.split("?")[0] != API_PATH:
+            return self._send_json(404, {"error": "not found"})
+
+        if server.latency_ms or server.jitter_ms:
+            time.sleep((server.latency_ms + random.uniform(0, server.jitter_ms)) / 1000)
+        if server.error_rate and random.random() < server.error_rate:
+            return self._send_json(503, {"error": "injected failure"})
+
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": "invalid JSON"})
+
+        applied_filters = payload.get("appliedFilters")
+        if not applied_filters:
+            if server.translate_ms:
+                time.sleep(server.translate_ms / 1000)
+            applied_filters = translate_query(payload.get("query"))
+
+        try:
+            indices = server.dataset.matching(applied_filters)
+        except UnsupportedFilter as e:
+            return self._send_json(400, {"error": str(e)})
+
+        skip = int(payload.get("skip") or 0)
+        limit = int(payload.get("limit") or 100)
+        meta = {
+            "cypher": _cypher(applied_filters),
+            "totalCount": int(payload.get("totalCount") or len(indices)),
+            "totalAcres": payload.get("totalAcres") or server.dataset.acres(indices),
+            "appliedFilters": applied_filters,
+        }
+        rows = indices
+        if payload.get("updatedSince"):
+            # Only the matching ponds changed after updatedSince; changed ponds
+            # that no longer match are listed by id with the first page
+            try:
+                changed = server.dataset.changed_since(payload["updatedSince"])
+            except ValueError:
+                return self._send_json(400, {"error": "invalid updatedSince"})
+            rows = np.intersect1d(indices, changed, assume_unique=True)
+            if not skip:
+                meta["removedIds"] = [f"POND-{i:07d}" for i in np.setdiff1d(changed, indices, assume_unique=True)]
+        page = server.dataset.frame(rows[skip:skip + limit])
+
+        if "arrow" in server.formats and ARROW_STREAM_MIME in self.headers.get("Accept", ""):
+            return self._send(200, encode_arrow(page, meta), ARROW_STREAM_MIME)
+        # Splice the rows in as encoded by pandas rather than via a list of dicts
+        envelope = json.dumps(meta)
+        body = f'{envelope[:-1]}, "data": {page.to_json(orient="records")}}}'.encode("utf-8")
+        self._send(200, body, "application/json")
+
+    def _send_json(self, status, obj):
+        self._send(status, json.dumps(obj).encode("utf-8"), "application/json")
+
+    def _send(self, status, body, content_type):
+        encoding = None
+        if ("gzip" in self.server.formats and content_type == "application/json"
+                and len(body) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", "")):
+            body = gzip.compress(body, compresslevel=6)
+            encoding = "gzip"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def _change_ponds(server, per_second):
+    while True:
+        time.sleep(1)
+        server.dataset.touch(max(1, int(round(per_second))))
+
+
+def make_server(host="127.0.0.1", port=8800, rows=10000, latency_ms=0, jitter_ms=0,
+                translate_ms=0, error_rate=0.0, seed=7, verbose=False, formats=FORMATS,
+                changes_per_second=0):
+    """Build a stub server; call serve_forever() on it, or use start_in_thread()"""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.dataset = PondDataset(rows, seed=seed)
+    server.latency_ms = latency_ms
+    server.jitter_ms = jitter_ms
+    server.translate_ms = translate_ms
+    server.error_rate = error_rate
+    server.verbose = verbose
+    server.formats = set(formats)
+    if changes_per_second:
+        threading.Thread(target=_change_ponds, args=(server, changes_per_second),
+                         name="stub-changes", daemon=True).start()
+    return server
+
+
+def start_in_thread(**kwargs):
+    """Start a stub server on a background thread; returns (server, url)"""
+    kwargs.setdefault("port", 0)
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, name="stub-server", daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}{API_PATH}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--rows", type=int, default=10000, help="ponds in the synthetic dataset")
+    parser.add_argument("--latency-ms", type=float, default=0, help="fixed delay added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="random extra delay up to this much")
+    parser.add_argument("--translate-ms", type=float, default=0,
+                        help="extra delay when no appliedFilters are sent, standing in for the LLM")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--formats", default=",".join(FORMATS),
+                        help="comma-separated response formats to offer, from json,gzip,arrow")
+    parser.add_argument("--changes-per-second", type=float, default=0,
+                        help="ponds updated every second, for auto-refresh")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.rows, args.latency_ms, args.jitter_ms,
+                         args.translate_ms, args.error_rate, args.seed, args.verbose,
+                         formats=[f.strip() for f in args.formats.split(",") if f.strip()],
+                         changes_per_second=args.changes_per_second)
+    print(f"Serving {args.rows:,} synthetic ponds on http://{args.host}:{server.server_address[1]}{API_PATH}",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Before any module under test is imported: the result store, exports,
+# translation cache and feedback spool all live under tempfile.gettempdir()
+tempfile.tempdir = tempfile.mkdtemp(prefix="aqua-tests-")
+os.environ.setdefault("PERF_LOG_LEVEL", "WARNING")
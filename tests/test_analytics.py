@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import QuantileSketch, ResultAggregates
+
+
+@pytest.mark.parametrize("q", [0.01, 0.25, 0.5, 0.9, 0.99])
+def test_sketch_quantiles_are_within_relative_accuracy(q):
+    values = np.random.default_rng(3).lognormal(4, 1, 20000)
+    sketch = QuantileSketch(0.01)
+    sketch.add(values)
+    exact = np.sort(values)[int(q * (len(values) - 1))]
+    assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+
+
+def test_sketch_merge_and_remove_match_a_single_sketch():
+    values = np.array([-5.0, 0, 0, 1, 2, 3, 50, 120, np.nan])
+    whole = QuantileSketch()
+    whole.add(values)
+    merged = QuantileSketch()
+    for part in np.array_split(values, 3):
+        partial = QuantileSketch()
+        partial.add(part)
+        merged.merge(partial)
+    assert merged.to_dict() == whole.to_dict()
+    assert merged.count == 8 and merged.quantile(0) == pytest.approx(-5, rel=0.01)
+
+    tail = QuantileSketch()
+    tail.add(values[-3:])
+    merged.remove(tail)
+    assert merged.quantile(1) == pytest.approx(3, rel=0.01)
+    assert QuantileSketch.from_dict(merged.to_dict()).to_dict() == merged.to_dict()
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(0.05))
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def ponds(docs, regions, updated):
+    return pd.DataFrame({
+        "DOC": docs,
+        "acres": [1.0] * len(docs),
+        "region": regions,
+        "farmName": ["F1"] * len(docs),
+        "datalastupdated": updated,
+    })
+
+
+def test_aggregates_merged_page_by_page_equal_the_whole():
+    first = ponds([5, 15, 25], ["AP", "AP", None], ["2024-01-01", None, "2024-03-01"])
+    second = ponds([35, 95], ["TN", "AP"], ["2024-03-20", "2024-03-25"])
+    merged = ResultAggregates.from_frame(first).merge(ResultAggregates.from_frame(second))
+    whole = ResultAggregates.from_frame(pd.concat([first, second], ignore_index=True))
+    assert merged.to_dict() == whole.to_dict()
+
+    assert merged.rows == 5 and merged.doc_mean() == 35
+    assert merged.doc_histogram()["ponds"].to_dict() == {"0-9": 1, "10-19": 1, "20-29": 1, "30-39": 1, "90-99": 1}
+    assert merged.breakdown("region")["ponds"].to_dict() == {"AP": 3, "(unknown)": 1, "TN": 1}
+    assert merged.stale_counts(now=datetime(2024, 4, 1)) == {7: 3, 30: 2, 90: 1}
+    assert merged.never_updated == 1
+
+
+def test_remove_takes_out_replaced_rows():
+    first = ponds([5, 15], ["AP", "TN"], ["2024-01-01", "2024-01-02"])
+    changed = ponds([15], ["TN"], ["2024-01-02"])
+    agg = ResultAggregates.from_frame(first).remove(ResultAggregates.from_frame(changed))
+    assert agg.to_dict() == ResultAggregates.from_frame(first.iloc[:1]).to_dict()
+    assert ResultAggregates.from_dict(agg.to_dict()).to_dict() == agg.to_dict()
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from assistant import Assistant, ChatHistory, ReplyStream
+from data_answers import answer_from_frame, data_context
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "pondId": [f"P{i}" for i in range(6)],
+        "region": ["Andhra", "Andhra", "Odisha", "Andhra", "Odisha", "Andhra"],
+        "DOC": [30, 60, 85, 95, 120, 150],
+        "acres": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        "harvestDone": [True, False, False, True, False, False],
+    })
+
+
+@pytest.mark.parametrize("question, answer", [
+    ("How many ponds are there?", "There are **6** ponds in the loaded data."),
+    ("how many ponds above 90 DOC", "**3** of the 6 loaded ponds have DOC > 90."),
+    ("Number of ponds with doc greater than 50 and acres under 4", "**2** of the 6 loaded ponds have DOC > 50 and acres < 4."),
+    ("average acres of ponds over 80 doc", "Average acres of the 4 matching ponds (of 6 loaded, DOC > 80): **4.50**."),
+    ("total acres", "Total acres of the 6 matching ponds (of 6 loaded): **21**."),
+    ("what is the highest DOC?", "Highest DOC of the 6 matching ponds (of 6 loaded): **150**."),
+    ("count ponds with doc > 200", "**0** of the 6 loaded ponds have DOC > 200."),
+])
+def test_answers_aggregate_questions(df, question, answer):
+    assert answer_from_frame(question, df) == answer
+
+
+@pytest.mark.parametrize("question", [
+    "how many ponds were harvested?",  # Not a condition it can read
+    "count ponds in Andhra",
+    "how many ponds with doc 90",  # No comparison
+    "average doc by region",
+    "average acres of ponds with doc > 80 and acres",
+    "which pond has the highest doc",  # Asks for a pond, not a number
+    "tell me about pond P3",
+    "average region",
+])
+def test_leaves_questions_it_cannot_fully_read_to_the_backend(df, question):
+    assert answer_from_frame(question, df) is None
+
+
+def test_data_context_lists_columns_and_ranges(df):
+    context = data_context(df)
+    assert context.startswith("The user has 6 ponds loaded with columns: pondId, region, DOC")
+    assert "DOC: min 30" in context and "max 150" in context
+
+
+def test_chat_history_folds_old_messages_into_a_bounded_summary():
+    history = ChatHistory(max_messages=2, max_summary_chars=80)
+    for i in range(4):
+        history.append("user", f"question {i}")
+        history.append("assistant", f"Answer {i}. More detail.")
+    assert [m["content"] for m in history.messages] == ["question 3", "Answer 3. More detail."]
+    assert history.folded == 6 and len(history.summary) <= 80
+    assert history.summary.endswith("User asked: question 2 Assistant answered: Answer 2.")
+    prompt = history.prompt("system", "context")
+    assert prompt[0]["content"].startswith("system\n\ncontext\n\nEarlier in this conversation: ")
+    assert prompt[1:] == history.messages
+
+
+def test_reply_stream_yields_chunks_and_reports_failures():
+    with ThreadPoolExecutor(1) as executor:
+        stream = ReplyStream(lambda: iter(["Hel", "", "lo"]), executor)
+        assert list(stream) == ["Hel", "lo"] and stream.text == "Hello"
+
+        def failing():
+            yield "partial"
+            raise ConnectionError("down")
+
+        stream = ReplyStream(failing, executor)
+        chunks = list(stream)
+        assert chunks[0] == "partial" and "unavailable right now: down" in chunks[1]
+        assert stream.error == "down"
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.messages = None
+
+    def stream(self, messages):
+        self.messages = messages
+        yield "from the backend"
+
+
+def test_assistant_answers_locally_or_asks_the_backend(df):
+    backend = RecordingBackend()
+    with ThreadPoolExecutor(1) as executor:
+        assistant = Assistant(backend, executor)
+        assert "".join(assistant.reply("how many ponds above 90 doc", ChatHistory(), df)).startswith("**3**")
+        assert backend.messages is None
+        assert "".join(assistant.reply("count ponds in Andhra", ChatHistory(), df)) == "from the backend"
+    assert backend.messages[-1] == {"role": "user", "content": "count ponds in Andhra"}
+    assert "6 ponds loaded" in backend.messages[0]["content"]
@@ -0,0 +1,78 @@
+import threading
+from functools import partial
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import stub_server
+from batch_queries import read_queries, run_query
+from http_client import PondsClient
+from ponds_core import iter_result_pages, request_ponds_page
+
+
+def test_read_queries(tmp_path):
+    path = tmp_path / "nightly.txt"
+    path.write_text(
+        "# nightly\n\n"
+        "ponds with > 80 doc\n"
+        '{"name": "Late Harvest", "query": "ponds with > 120 doc", "appliedFilters": [{"field": "DOC"}]}\n'
+        "ponds with > 80 doc\n",
+        encoding="utf-8",
+    )
+    assert read_queries(path) == [
+        {"name": "ponds-with-80-doc", "query": "ponds with > 80 doc", "applied_filters": None},
+        {"name": "late-harvest", "query": "ponds with > 120 doc", "applied_filters": [{"field": "DOC"}]},
+        {"name": "ponds-with-80-doc-2", "query": "ponds with > 80 doc", "applied_filters": None},
+    ]
+
+
+@pytest.mark.parametrize("line, error", [("{not json", "invalid JSON"), ('{"name": "x"}', 'missing "query"')])
+def test_read_queries_reports_the_bad_line(tmp_path, line, error):
+    path = tmp_path / "bad.txt"
+    path.write_text("ponds\n" + line + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match=f":2: {error}"):
+        read_queries(path)
+
+
+def test_iter_result_pages_yields_in_order_with_the_settled_filters():
+    settled = [{"field": "DOC", "operator": ">", "value": 80}]
+    calls = []
+    lock = threading.Lock()
+
+    def fetch_page(query, skip=None, limit=None, applied_filters=None, total_count=None, total_acres=None):
+        with lock:
+            calls.append((skip, applied_filters, total_count))
+        start = skip or 0
+        df = pd.DataFrame({"pondId": range(start, min(start + limit, 23))})
+        return df, "", 23, settled, 1.0
+
+    pages = list(iter_result_pages(fetch_page, "ponds", page_size=5, max_workers=2))
+    assert [total for _, total in pages] == [23] * 5
+    assert pd.concat([df for df, _ in pages])["pondId"].tolist() == list(range(23))
+    assert calls[0] == (None, None, None)
+    assert all(filters == settled and total == 23 for _, filters, total in calls[1:])
+
+
+@pytest.fixture
+def fetch_page():
+    server, url = stub_server.start_in_thread(rows=1200)
+    yield partial(request_ponds_page, PondsClient(), url=url, transport="json")
+    server.shutdown()
+
+
+def test_run_query_writes_every_page(fetch_page, tmp_path):
+    entry = {"name": "all", "query": "all ponds", "applied_filters": None}
+    result = run_query(fetch_page, entry, str(tmp_path), page_size=500, page_workers=2)
+    assert result["error"] is None and result["rows"] == 1200
+    assert pq.read_table(result["path"]).num_rows == 1200
+
+
+def test_run_query_reports_failures(tmp_path):
+    def fetch_page(*args, **kwargs):
+        raise ConnectionError("API down")
+
+    result = run_query(fetch_page, {"name": "x", "query": "x", "applied_filters": None}, str(tmp_path), 500, 2)
+    assert result["error"] == "API down"
+    assert result["rows"] == 0 and result["path"] is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,51 @@
+import pandas as pd
+
+from date_schema import DateSchemaRegistry, parse_mixed
+
+
+def test_infers_day_first_format_once_per_column():
+    registry = DateSchemaRegistry()
+    values = pd.Series(["03-04-2024 10:15:00", "25-12-2023 08:00:00", None])
+    parsed = registry.parse("lastUpdated", values)
+    assert registry.format_for("lastUpdated") == "%d-%m-%Y %H:%M:%S"
+    assert parsed[0] == pd.Timestamp("2024-04-03 10:15:00")
+    assert pd.isna(parsed[2])
+
+
+def test_matches_the_mixed_parser():
+    registry = DateSchemaRegistry()
+    values = pd.Series(["01/02/2024", "13/02/2024", "28/02/2024", ""])
+    expected = parse_mixed(values)
+    pd.testing.assert_series_equal(registry.parse("stocked", values), expected, check_dtype=False)
+
+
+def test_iso_timestamps_keep_their_timezone():
+    registry = DateSchemaRegistry()
+    parsed = registry.parse("updatedAt", pd.Series(["2024-05-01T10:00:00Z", "2024-05-02T11:30:00Z"]))
+    assert registry.format_for("updatedAt") == "ISO8601"
+    assert str(parsed.dt.tz) == "UTC"
+
+
+def test_stray_values_fall_back_without_forgetting_the_format():
+    registry = DateSchemaRegistry()
+    registry.parse("d", pd.Series(["01-02-2024"] * 10))
+    parsed = registry.parse("d", pd.Series(["02-02-2024"] * 9 + ["5 Mar 2024"]))
+    assert parsed.iloc[-1] == pd.Timestamp("2024-03-05")
+    assert registry.format_for("d") == "%d-%m-%Y"
+
+
+def test_format_drift_is_reinferred():
+    registry = DateSchemaRegistry()
+    registry.parse("d", pd.Series(["01-02-2024"] * 10))
+    parsed = registry.parse("d", pd.Series(["2024-02-0%d" % i for i in range(1, 10)]))
+    assert parsed.notna().all()
+    assert "d" not in registry._formats
+    registry.parse("d", pd.Series(["2024-02-01"]))
+    assert registry.format_for("d") == "ISO8601"
+
+
+def test_unparseable_column_uses_the_mixed_parser():
+    registry = DateSchemaRegistry()
+    parsed = registry.parse("notes", pd.Series(["soon", "later", "n/a"]))
+    assert registry.format_for("notes") is None
+    assert parsed.isna().all()
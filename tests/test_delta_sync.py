@@ -0,0 +1,160 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import http_client
+import ponds_core
+from delta_sync import (DeltaSubscription, DeltaSync, DeltaUnsupported, changed_rows, merge_changes,
+                        newest_update, pond_key)
+from page_cache import PageCache, PagePrefetcher
+from result_store import ResultStore
+
+
+def ponds(ids, docs):
+    return pd.DataFrame({"pondId": ids, "DOC": docs})
+
+
+def test_merge_replaces_changed_ponds_in_place_and_drops_removed():
+    df = ponds(["P1", "P2", "P3", "P4"], [1, 2, 3, 4])
+    changes = ponds(["P3", "P9", "P3"], [30, 90, 31])
+    merged = merge_changes(df, changes, ["P2"], "pondId")
+    assert merged.values.tolist() == [["P1", 1], ["P3", 31], ["P4", 4]]
+    assert df["DOC"].tolist() == [1, 2, 3, 4]  # Shared with the page cache, so untouched
+
+
+def test_merge_without_matches_returns_the_same_frame():
+    df = ponds(["P1"], [1])
+    assert merge_changes(df, ponds(["P9"], [9]), ["P8"], "pondId") is df
+    assert merge_changes(df, ponds(["P1"], [2]), [], None) is df
+
+
+def test_newest_update_across_frames_and_formats():
+    frames = [
+        pd.DataFrame({"datalastupdated": pd.to_datetime(["2024-01-01 10:00"])}),
+        pd.DataFrame({"feedLastUpdated": ["2024-01-02T05:00:00+05:30", None]}),
+        None,
+    ]
+    assert newest_update(frames) == pd.Timestamp("2024-01-01 23:30")
+    assert newest_update([ponds(["P1"], [1])]) is None
+    assert pond_key(["farmId", "pondId"]) == "pondId" and pond_key(["x"]) is None
+
+
+def test_result_set_apply_changes(tmp_path):
+    result = ResultStore(root=str(tmp_path)).open("ponds", None)
+    result.append(0, ponds(["P1", "P2"], [1, 2]), total_count=4)
+    result.append(2, ponds(["P3", "P4"], [3, 4]), total_count=4)
+    dropped = result.apply_changes(ponds(["P2", "P5"], [20, 5]), ["P3"], "pondId", total_count=4)
+    assert dropped == 1
+    assert result.frame()["DOC"].tolist() == [1, 20, 4, 5]  # P5 is new to a complete result
+    assert result.complete and result.aggregates().doc_sum == 30
+
+
+def test_update_pages_merges_into_cached_pages():
+    filters = [{"field": "DOC", "operator": ">", "value": 0}]
+    page = (ponds(["P1", "P2"], [1, 2]), "", 2, filters, 0.0)
+    prefetcher = PagePrefetcher(PageCache(), lambda *a, **k: page, executor=ThreadPoolExecutor(1))
+    prefetcher.get("ponds", skip=0, limit=100)
+    replaced = prefetcher.update_pages("Ponds", filters, lambda p: (merge_changes(p[0], ponds(["P2"], [9]), [], "pondId"),) + p[1:])
+    assert replaced == 2  # Cached under the unfiltered and the filtered key
+    assert prefetcher.get("ponds", skip=0, limit=100, applied_filters=filters)[0]["DOC"].tolist() == [1, 9]
+
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        threading.Thread(target=fn, args=args, daemon=True).start()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_polls_merge_changes_and_advance_since():
+    calls = []
+    since = pd.Timestamp("2024-01-01")
+
+    def fetch_changes(query, applied_filters, updated_since):
+        calls.append(updated_since)
+        changes = pd.DataFrame({"pondId": ["P1"], "datalastupdated": [since + pd.Timedelta(days=len(calls))]})
+        return changes, [], 10, 5.0
+
+    applied = []
+    sync = DeltaSync(fetch_changes, lambda *args: applied.append(args) or 0, InlineExecutor(), interval=0.05)
+    subscription = sync.watch("ponds", None, since=since)
+    wait_for(lambda: subscription.version >= 2)
+    assert calls[:2] == ["2024-01-01T00:00:00", "2024-01-02T00:00:00"]
+    assert subscription.total_count == 10 and subscription.rows_changed >= 2
+    assert sync.watch("PONDS", None) is subscription
+
+
+def test_failures_back_off(monkeypatch):
+    monkeypatch.setattr(http_client.random, "uniform", lambda a, b: 1.0)
+    outcomes = [ConnectionError("API down"), ConnectionError("API down"), (pd.DataFrame(), [], 0, 0.0)]
+
+    def fetch_changes(*args):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    sync = DeltaSync(fetch_changes, None, InlineExecutor(), interval=30, max_interval=100)
+    subscription = DeltaSubscription("ponds", None, pd.Timestamp("2024-01-01"), 30)
+    sync._poll(subscription)
+    assert subscription.last_error == "API down" and 59 < subscription.retry_in() <= 60
+    sync._poll(subscription)
+    assert subscription.failures == 2 and 99 < subscription.retry_in() <= 100
+    sync._poll(subscription)
+    assert subscription.failures == 0 and subscription.last_error is None
+    assert 29 < subscription.retry_in() <= 30
+
+
+def test_changed_rows_drops_ponds_updated_at_since():
+    changes = pd.DataFrame({
+        "pondId": ["P1", "P2"],
+        "datalastupdated": ["2024-01-01T10:00:00Z", "2024-01-01T10:00:01Z"],
+        "feedLastUpdated": [None, "2023-01-01T00:00:00Z"],
+    })
+    assert changed_rows(changes, "2024-01-01T15:30:00+05:30")["pondId"].tolist() == ["P2"]
+    assert changed_rows(pd.DataFrame(), "2024-01-01").empty
+
+
+@pytest.mark.parametrize("updated", [["2024-01-02", "2023-12-31"], ["2024-01-02", None]])
+def test_changed_rows_rejects_ponds_not_updated_since(updated):
+    changes = pd.DataFrame({"pondId": ["P1", "P2"], "datalastupdated": updated})
+    with pytest.raises(DeltaUnsupported, match="1 ponds not updated since"):
+        changed_rows(changes, "2024-01-01")
+
+
+def test_a_server_ignoring_updated_since_is_asked_once(monkeypatch):
+    requests = []
+    page = pd.DataFrame({"pondId": [f"P{i}" for i in range(ponds_core.DELTA_PAGE_ROWS)],
+                         "datalastupdated": pd.Timestamp("2023-06-01")})
+
+    def post_ponds_query(client, payload, url, transport):
+        requests.append(payload)
+        return page, {"totalCount": 3 * len(page)}
+
+    monkeypatch.setattr(ponds_core, "post_ponds_query", post_ponds_query)
+    with pytest.raises(DeltaUnsupported):
+        ponds_core.request_ponds_changes(None, "ponds", None, "2024-01-01T00:00:00")
+    assert len(requests) == 1
+
+
+def test_unsupported_deltas_stop_polling():
+    calls = []
+
+    def fetch_changes(*args):
+        calls.append(args)
+        raise DeltaUnsupported("the API ignores updatedSince")
+
+    sync = DeltaSync(fetch_changes, None, InlineExecutor(), interval=0.02)
+    subscription = sync.watch("ponds", None, since=pd.Timestamp("2024-01-01"))
+    wait_for(lambda: subscription.unsupported is not None)
+    time.sleep(0.2)
+    assert len(calls) == 1 and subscription.failures == 0
+    assert subscription.unsupported == "the API ignores updatedSince"
@@ -0,0 +1,119 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from export import export_all, export_result, frame_digest
+from frame_memory import compact_frame
+from result_store import ResultStore
+
+
+def make_fetcher(pages, total=None, barrier=None):
+    """fetch_page over a list of page DataFrames, each page_size rows or fewer"""
+    total = total if total is not None else sum(len(p) for p in pages)
+
+    def fetch_page(query, skip=None, limit=None, applied_filters=None, total_count=None, total_acres=None):
+        if barrier is not None:
+            barrier.wait(5)
+        return pages[(skip or 0) // limit], "MATCH", total, applied_filters, 0.0
+    return fetch_page
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_columns_first_seen_on_later_pages_are_kept(tmp_path, fmt):
+    pages = [
+        pd.DataFrame({"pondId": [1, 2], "DOC": [10, 20]}),
+        pd.DataFrame({"pondId": [3, 4], "DOC": [30, 40], "region": ["AP", "TN"]}),
+        pd.DataFrame({"pondId": [5, 6], "DOC": [50, 60]}),
+    ]
+    path = str(tmp_path / f"out.{fmt}")
+    _, rows = export_all(make_fetcher(pages), "q", path, fmt=fmt, page_size=2, max_workers=1)
+
+    out = pd.read_csv(path) if fmt == "csv" else pd.read_parquet(path)
+    assert rows == 6
+    assert list(out.columns) == ["pondId", "DOC", "region"]
+    assert out["pondId"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert out["region"].isna().tolist() == [True, True, False, False, True, True]
+    assert os.listdir(tmp_path) == [f"out.{fmt}"]
+
+
+def test_parquet_pages_compacted_to_different_widths_keep_their_values(tmp_path):
+    first = pd.DataFrame({"DOC": range(100), "region": ["AP", "TN"] * 50, "acres": [1.5] * 100})
+    second = pd.DataFrame({"DOC": range(100, 600), "region": [f"R{i % 200}" for i in range(500)],
+                           "acres": [2.25] * 500})
+    third = pd.DataFrame({"DOC": ["unknown"] * 2, "region": [None, None], "acres": [None, None]})
+    pages = [compact_frame(first), compact_frame(second), third]
+    assert pages[0]["DOC"].dtype != pages[1]["DOC"].dtype  # int8, then int16
+
+    path = str(tmp_path / "out.parquet")
+    _, rows = export_all(make_fetcher(pages[:2]), "q", path, fmt="parquet", page_size=500, max_workers=1)
+    exported = pd.read_parquet(path)
+    assert rows == 600 and exported["DOC"].tolist() == list(range(600))
+    assert exported["region"].tolist() == first["region"].tolist() + second["region"].tolist()
+
+    # Text in a numeric column widens the column to text instead of failing
+    _, rows = export_all(make_fetcher(pages[1:], total=502), "q", path, fmt="parquet", page_size=500,
+                         max_workers=1)
+    exported = pd.read_parquet(path)
+    assert exported["DOC"].tolist() == [str(i) for i in range(100, 600)] + ["unknown"] * 2
+    assert exported["acres"].isna().sum() == 2
+
+
+def test_concurrent_exports_to_the_same_path_do_not_interleave(tmp_path):
+    page = pd.DataFrame({"pondId": range(50), "DOC": range(50)})
+    barrier = threading.Barrier(2)
+    path = str(tmp_path / "out.csv")
+    errors = []
+
+    def run():
+        try:
+            export_all(make_fetcher([page], barrier=barrier), "q", path, page_size=50, max_workers=1)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert pd.read_csv(path)["pondId"].tolist() == list(range(50))
+    assert os.listdir(tmp_path) == ["out.csv"]
+
+
+def test_failed_export_leaves_no_files(tmp_path):
+    def fetch_page(query, skip=None, **kwargs):
+        if skip:
+            raise RuntimeError("API down")
+        return pd.DataFrame({"pondId": [1, 2]}), "MATCH", 4, None, 0.0
+
+    with pytest.raises(RuntimeError):
+        export_all(fetch_page, "q", str(tmp_path / "out.csv"), page_size=2, max_workers=1)
+    assert os.listdir(tmp_path) == []
+
+
+def test_export_result_writes_the_selected_stored_rows(tmp_path):
+    result = ResultStore(root=str(tmp_path / "results")).open("q", None)
+    result.append(0, pd.DataFrame({"pondId": range(10), "DOC": range(0, 100, 10)}), total_count=10)
+    progress = []
+    path = str(tmp_path / "refined.csv")
+    _, rows = export_result(result, path, where=np.arange(10) >= 3, page_size=3,
+                            progress=lambda rows, total: progress.append((rows, total)))
+    assert rows == 7 and pd.read_csv(path)["DOC"].tolist() == list(range(30, 100, 10))
+    assert progress == [(3, 7), (6, 7), (7, 7)]
+
+
+def test_frame_digest_handles_nested_cells():
+    df = pd.DataFrame({"pondId": [1, 2], "readings": [[1, 2], {"ph": 7.5}]})
+    assert frame_digest(df) == frame_digest(df.copy())
+    changed = pd.DataFrame({"pondId": [1, 2], "readings": [[1, 3], {"ph": 7.5}]})
+    assert frame_digest(df) != frame_digest(changed)
+
+
+def test_frame_digest_ignores_index_but_not_values():
+    df = pd.DataFrame({"doc": [1, 2, 3]})
+    assert frame_digest(df) == frame_digest(df.set_axis([7, 8, 9]))
+    assert frame_digest(df) != frame_digest(df.rename(columns={"doc": "DOC"}))
+    assert frame_digest(df) != frame_digest(pd.DataFrame({"doc": [1, 2, 4]}))
@@ -0,0 +1,133 @@
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import ponds_core
+from export import export_path
+from result_store import ResultStore
+import stub_server
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "farm_ponds_app.py")
+QUERY = "ponds with > 20 doc"
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server, url = stub_server.start_in_thread(rows=2000)
+    yield server, url
+    server.shutdown()
+
+
+@pytest.fixture
+def app(stub, monkeypatch):
+    server, url = stub
+    monkeypatch.setattr(ponds_core, "PONDS_API_URL", url)
+    st.cache_resource.clear()  # Shared clients and caches start empty for every test
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    at.text_area[0].input(QUERY).run()
+    button(at, "Fetch Data").click().run()
+    assert not at.exception
+    return at
+
+
+def button(at, label):
+    return next(b for b in at.button if label in b.label)
+
+
+def captions(at):
+    return [c.value for c in at.caption]
+
+
+def test_fetch_shows_the_first_page(app):
+    total = app.session_state.total_count
+    assert app.metric[0].value == f"{total:,}"
+    page = app.dataframe[0].value
+    assert len(page) == 100 and page.index[0] == 1
+    assert (page["DOC"] > 20).all()
+    assert f"Showing 1 - 100 of {total:,} records" in captions(app)
+
+
+def test_paging_and_page_size(app):
+    button(app, "Next").click().run()
+    assert app.session_state.page == 1
+    assert app.dataframe[0].value.index[0] == 101
+    button(app, "Previous").click().run()
+    assert app.dataframe[0].value.index[0] == 1
+
+    app.selectbox(key="per_page_selector").set_value(500).run()
+    assert app.session_state.page == 0
+    assert len(app.dataframe[0].value) == 500
+
+
+def test_windowed_table_sends_only_a_window(app):
+    app.toggle(key="windowed_table").set_value(True).run()
+    app.selectbox(key="per_page_selector").set_value(1000).run()
+    assert len(app.dataframe[0].value) == 100
+    app.slider(key="page_window_position").set_value(451).run()
+    window = app.dataframe[0].value
+    assert len(window) == 100 and window.index[0] == 451
+    assert "Rows 451 - 550 sent to the browser (1,000 loaded)" in captions(app)
+
+    app.toggle(key="windowed_table").set_value(False).run()
+    assert app.session_state.per_page == 500
+    assert len(app.dataframe[0].value) == 500
+
+
+def fetch_everything(at):
+    """Store every row of the result, which earlier tests may have done already"""
+    if any("Fetch remaining pages in the background" in b.label for b in at.button):
+        button(at, "Fetch remaining pages in the background").click().run()
+    deadline = time.monotonic() + 30
+    while not any("records stored" in e.label and e.label.count(f"{at.session_state.total_count:,}") == 2
+                  for e in at.expander):
+        assert time.monotonic() < deadline, "the remaining pages never arrived"
+        time.sleep(0.1)
+        at.run()
+
+
+def test_export_while_refined_holds_the_refined_rows(app):
+    fetch_everything(app)
+    doc = next(t for t in app.text_input if t.key.startswith("refine_value_") and t.key.endswith("_DOC"))
+    doc.input("100").run()
+    button(app, "Apply filters").click().run()
+    refined = app.session_state.total_count
+    assert app.session_state.local_refinement and 0 < refined < 1709
+
+    button(app, "Prepare export").click().run()
+    assert not app.exception
+    path = export_path(QUERY, app.session_state.local_refinement["filters"], refined, "csv")
+    exported = pd.read_csv(path)
+    assert len(exported) == refined and exported["DOC"].min() > 100
+    assert any(b.label == f"📥 Download all {refined:,} records" for b in app.get("download_button"))
+
+
+def test_fetch_data_replaces_the_stored_result(app):
+    fetch_everything(app)
+    filters = app.session_state.applied_filters
+    assert ResultStore().open(QUERY, filters).complete
+    button(app, "Fetch Data").click().run()
+    stored = ResultStore().open(QUERY, filters)
+    assert not stored.complete and stored.rows_stored <= 300  # The first page and its prefetches
+
+
+FIRST_RUN = """
+import json, sys
+import startup
+startup.Warmup = lambda tasks: None  # Only what the first run itself imports
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+print(json.dumps([m for m in ("pandas", "pyarrow", "requests") if m in sys.modules] + [str(e.value) for e in at.exception]))
+"""
+
+
+def test_first_run_leaves_the_data_layer_to_the_warm_up():
+    out = subprocess.run([sys.executable, "-c", FIRST_RUN, APP], cwd=os.path.dirname(APP),
+                         capture_output=True, text=True, timeout=120, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import feedback
+import http_client
+from feedback import FeedbackSpool
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def close(self):
+        pass
+
+
+class FakeClient:
+    """Answers posts with the queued statuses (exceptions are raised), then 200"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.posts = []  # Accepted batches
+        self.lock = threading.Lock()
+
+    def post(self, url, json=None):
+        with self.lock:
+            status = self.statuses.pop(0) if self.statuses else 200
+            if isinstance(status, Exception):
+                raise status
+            if status < 300:
+                self.posts.append(json["feedback"])
+            return FakeResponse(status)
+
+
+@pytest.fixture
+def no_flusher(monkeypatch):
+    """Spools whose records are only sent by calling flush()"""
+    monkeypatch.setattr(FeedbackSpool, "_start", lambda self: None)
+
+
+def make_spool(tmp_path, client, **kwargs):
+    return FeedbackSpool(directory=str(tmp_path), url="http://feedback.test", client=client, fsync=False, **kwargs)
+
+
+def test_submit_only_spools(tmp_path, no_flusher):
+    client = FakeClient()
+    spool = make_spool(tmp_path, client)
+    record = spool.submit("ponds with > 80 doc", [{"field": "DOC"}], rating=1, comment="good", app="ponds")
+    assert client.posts == [] and spool.pending() == 1
+    with open(tmp_path / feedback.SPOOL_FILE, encoding="utf-8") as f:
+        assert json.loads(f.read()) == record
+    assert record["appliedFilters"] == [{"field": "DOC"}] and record["timestamp"].endswith("+00:00")
+
+
+def test_flush_sends_in_batches(tmp_path, no_flusher):
+    client = FakeClient()
+    spool = make_spool(tmp_path, client, batch_size=2)
+    ids = [spool.submit(f"q{i}")["id"] for i in range(5)]
+    assert spool.flush()
+    assert [len(batch) for batch in client.posts] == [2, 2, 1]
+    assert [r["id"] for batch in client.posts for r in batch] == ids
+    assert spool.pending() == 0 and spool.sent == 5
+    assert os.listdir(tmp_path) == []
+
+
+def test_failed_batches_are_kept_for_the_next_attempt(tmp_path, no_flusher):
+    client = FakeClient(200, 503, ConnectionError("down"))
+    spool = make_spool(tmp_path, client, batch_size=2)
+    for i in range(5):
+        spool.submit(f"q{i}")
+    assert not spool.flush()
+    assert spool.sent == 2 and spool.pending() == 3 and spool.last_error == "HTTP 503"
+    assert not spool.flush()
+    assert spool.last_error == "down"
+    spool.submit("q5")
+    assert spool.flush()
+    assert [r["query"] for batch in client.posts for r in batch] == [f"q{i}" for i in range(6)]
+    assert spool.pending() == 0
+
+
+def test_rejected_records_are_set_aside(tmp_path, no_flusher):
+    client = FakeClient(400, 429)
+    spool = make_spool(tmp_path, client, batch_size=1)
+    spool.submit("bad")
+    spool.submit("throttled")
+    assert not spool.flush()  # 429 is retried
+    assert spool.rejected == 1 and spool.pending() == 1
+    with open(tmp_path / "rejected.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)["query"] for line in f] == ["bad"]
+    assert spool.flush() and spool.sent == 1
+
+
+def test_records_left_by_an_earlier_run_are_sent(tmp_path, no_flusher):
+    make_spool(tmp_path, FakeClient()).submit("before restart")
+    with open(tmp_path / "batch-1-1.jsonl.sending", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "x", "query": "claimed"}) + "\n{corrupt\n")
+    os.utime(tmp_path / "batch-1-1.jsonl.sending", (0, 0))
+    client = FakeClient()
+    spool = make_spool(tmp_path, client)
+    assert spool.pending() == 3  # The corrupt line is counted until it is read
+    spool._release_stale_claims()
+    assert spool.flush()
+    assert sorted(r["query"] for batch in client.posts for r in batch) == ["before restart", "claimed"]
+
+
+def test_background_flusher_delivers_and_backs_off(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_client.random, "uniform", lambda a, b: 0.0)  # Retry at once
+    client = FakeClient(ConnectionError("down"))
+    spool = make_spool(tmp_path, client, flush_interval=0.01)
+    try:
+        spool.submit("q")
+        deadline = time.monotonic() + 5
+        while spool.sent < 1:
+            assert time.monotonic() < deadline, "feedback was never sent"
+            time.sleep(0.01)
+        assert spool.stats()["pending"] == 0
+    finally:
+        spool.close()
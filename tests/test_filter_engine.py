@@ -0,0 +1,117 @@
+import pandas as pd
+import pytest
+
+from filter_engine import (UnsupportedFilter, coerce_value, edited_value, filter_mask, format_value,
+                           is_refinement, parse_filters, refine, with_value)
+from result_store import ResultStore
+
+DOC_OVER_60 = {"field": "p.DOC", "operator": ">", "value": 60}
+NO_HARVEST = {"field": "harvestDone", "operator": "==", "value": False}
+
+
+@pytest.fixture
+def ponds():
+    return pd.DataFrame({
+        "pondId": ["P1", "P2", "P3", "P4"],
+        "DOC": [70, 95, 120, 61],
+        "harvestDone": [False, False, False, False],
+        "region": ["Nellore", "Guntur", None, "Nellore"],
+        "acres": [1.0, 2.0, 4.0, 8.0],
+    })
+
+
+@pytest.fixture
+def stored(tmp_path, ponds):
+    def store(base_filters, frame=None):
+        result = ResultStore(root=str(tmp_path)).open("ponds", base_filters)
+        frame = ponds if frame is None else frame
+        result.append(0, frame, total_count=len(frame))
+        return result
+    return store
+
+
+def test_parse_filters_accepts_lists_and_mappings():
+    assert parse_filters([{"property": "doc", "op": "gte", "threshold": 80}])[0][:3] == ("doc", ">=", 80)
+    assert parse_filters({"DOC": {"$lt": 90}, "region": "AP"}) == [
+        ("DOC", "<", 90, {"DOC": {"$lt": 90}}), ("region", "==", "AP", {"region": "AP"})]
+    assert parse_filters([{"field": "DOC", "min": 10, "max": 20}])[0].value == (10, 20)
+    with pytest.raises(UnsupportedFilter):
+        parse_filters([{"field": "DOC", "operator": "~"}])
+
+
+def test_filter_mask(ponds):
+    assert filter_mask(ponds, [DOC_OVER_60, {"field": "region", "operator": "==", "value": "nellore"}]).tolist() == \
+        [True, False, False, True]
+    assert filter_mask(ponds, [{"field": "region", "operator": "is null"}]).tolist() == [False, False, True, False]
+    assert filter_mask(ponds, [{"field": "DOC", "operator": "between", "value": ["90", 120]}]).tolist() == \
+        [False, True, True, False]
+    assert filter_mask(ponds, [{"field": "pondId", "operator": "in", "value": ["P2", "P4"]}]).tolist() == \
+        [False, True, False, True]
+    with pytest.raises(UnsupportedFilter):
+        filter_mask(ponds, [{"field": "harvest.date", "operator": "is null"}])
+
+
+@pytest.mark.parametrize("new, refines", [
+    ([{**DOC_OVER_60, "value": 100}], True),
+    ([{**DOC_OVER_60, "operator": ">="}], False),
+    ([{**DOC_OVER_60, "value": 50}], False),
+    ([{**DOC_OVER_60, "operator": "between", "value": [70, 90]}], True),
+    ([DOC_OVER_60, {"field": "region", "operator": "==", "value": "Guntur"}], True),
+    ([], False),
+])
+def test_is_refinement(new, refines):
+    assert is_refinement([DOC_OVER_60], new) is refines
+
+
+def test_refine_evaluates_tighter_filters_locally(stored):
+    result = stored([DOC_OVER_60])
+    page, total_count, total_acres = refine(result, [DOC_OVER_60], [{**DOC_OVER_60, "value": 90}])
+    assert page["pondId"].tolist() == ["P2", "P3"]
+    assert (total_count, total_acres) == (2, 6.0)
+
+
+def test_refine_refuses_broader_filters(stored):
+    result = stored([DOC_OVER_60])
+    with pytest.raises(UnsupportedFilter):
+        refine(result, [DOC_OVER_60], [{**DOC_OVER_60, "value": 30}])
+
+
+def test_refine_skips_unchanged_base_conditions_without_a_column(stored, ponds):
+    relationship = {"field": "h.harvestId", "operator": "is null"}
+    base = [DOC_OVER_60, relationship]
+    result = stored(base, ponds.drop(columns=["harvestDone"]))
+    page, total_count, _ = refine(result, base, [{**DOC_OVER_60, "value": 100}, relationship])
+    assert page["pondId"].tolist() == ["P3"] and total_count == 1
+
+
+def test_value_text_round_trip():
+    assert coerce_value(" 100 ") == 100
+    assert coerce_value("2.5") == 2.5
+    assert coerce_value("False") is False
+    assert coerce_value("TRUE") is True
+    assert coerce_value("null") is None
+    assert coerce_value(" Nellore ") == "Nellore"
+    condition = parse_filters([{"field": "DOC", "operator": "between", "value": [80, None]}])[0]
+    assert format_value(condition.value) == "80, "
+
+
+def test_unchanged_text_keeps_the_typed_value():
+    harvest, doc_as_text = parse_filters([NO_HARVEST, {"field": "DOC", "operator": ">", "value": "60"}])
+    assert edited_value(harvest, "==", format_value(harvest.value)) is False
+    assert edited_value(harvest, "!=", format_value(harvest.value)) is False
+    assert edited_value(doc_as_text, ">", "60") == "60"
+    assert edited_value(doc_as_text, ">", "100") == 100
+    assert edited_value(doc_as_text, "in", "60, 70") == [60, 70]
+
+
+def test_editing_one_field_keeps_the_others_a_refinement(stored):
+    """Raising DOC while the harvest condition is left alone stays local"""
+    base = [DOC_OVER_60, NO_HARVEST]
+    edited = []
+    for condition in parse_filters(base):
+        text = "100" if condition.field == "p.DOC" else format_value(condition.value)
+        edited.append(with_value(condition, condition.op, edited_value(condition, condition.op, text)))
+    assert edited == [{**DOC_OVER_60, "value": 100}, NO_HARVEST]
+    assert is_refinement(base, edited)
+    _, total_count, _ = refine(stored(base), base, edited)
+    assert total_count == 1
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from frame_memory import compact_frame, frame_nbytes, process_rss_bytes
+
+
+def test_compact_frame_shrinks_typical_columns():
+    df = pd.DataFrame({
+        "region": ["Andhra", "Odisha"] * 500,
+        "pondId": [f"P{i}" for i in range(1000)],
+        "DOC": np.arange(1000, dtype=np.int64) % 150,
+        "acres": np.full(1000, 2.5),
+        "harvestDone": [True, False] * 500,
+    })
+    compact = compact_frame(df)
+    assert compact is not df
+    assert isinstance(compact["region"].dtype, pd.CategoricalDtype)
+    assert compact["pondId"].dtype.storage == "pyarrow"
+    assert compact["DOC"].dtype == np.int16
+    assert compact["acres"].dtype == np.float32
+    assert compact["harvestDone"].dtype == bool
+    assert frame_nbytes(compact) < frame_nbytes(df)
+    # The original is left alone and the values are unchanged
+    assert df["DOC"].dtype == np.int64
+    pd.testing.assert_frame_equal(compact.astype(df.dtypes.to_dict()), df)
+
+
+def test_compact_frame_keeps_lossy_and_mixed_columns():
+    df = pd.DataFrame({
+        "acres": [1.1, 2.37],
+        "mixed": pd.Series(["a", 1], dtype=object),
+        "when": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+    })
+    assert compact_frame(df) is df
+
+
+def test_frame_nbytes_and_rss():
+    assert frame_nbytes(None) == 0
+    assert frame_nbytes(pd.DataFrame({"a": [1, 2]})) > 0
+    rss = process_rss_bytes()
+    assert rss is None or rss > 0
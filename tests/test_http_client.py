@@ -0,0 +1,68 @@
+import pytest
+import requests
+
+from http_client import PondsClient
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None):
+        self.status_code = status
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def post(self, url, json=None, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def client_with(outcomes, **kwargs):
+    client = PondsClient(backoff_base=0, **kwargs)
+    client.session = FakeSession(outcomes)
+    return client
+
+
+def test_retries_connection_errors_and_5xx():
+    client = client_with([requests.ConnectionError("reset"), FakeResponse(503), FakeResponse(200)])
+    response = client.post("http://api")
+    assert response.status_code == 200
+    assert response.attempts == 3
+    stats = client.stats.snapshot()
+    assert (stats["requests"], stats["retries"], stats["failures"]) == (1, 2, 0)
+
+
+def test_gives_up_after_max_retries():
+    client = client_with([FakeResponse(500)] * 3, max_retries=2)
+    assert client.post("http://api").status_code == 500
+    assert client.session.calls == 3
+    assert client.stats.snapshot()["failures"] == 1
+
+
+def test_raises_connection_error_after_max_retries():
+    client = client_with([requests.Timeout("slow")] * 2, max_retries=1)
+    with pytest.raises(requests.Timeout):
+        client.post("http://api")
+    assert client.stats.snapshot()["last"]["error"] == "slow"
+
+
+def test_client_errors_are_not_retried():
+    client = client_with([FakeResponse(400)])
+    assert client.post("http://api").status_code == 400
+    assert client.session.calls == 1
+
+
+def test_retry_after_is_capped():
+    client = PondsClient(backoff_max=2.0)
+    assert client._retry_after(FakeResponse(429, {"Retry-After": "30"})) == 2.0
+    assert client._retry_after(FakeResponse(429, {"Retry-After": "soon"})) is None
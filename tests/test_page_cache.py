@@ -0,0 +1,154 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import page_cache
+from page_cache import PageCache, PagePrefetcher, page_key
+
+
+def frame(rows):
+    return pd.DataFrame({"doc": range(rows)})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(page_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_page_key_normalizes_query_and_filters():
+    assert page_key("Ponds  with DOC", [{"b": 1, "a": 2}], None, None) == \
+        page_key("ponds with doc", [{"a": 2, "b": 1}], 0, 100)
+
+
+def test_lru_evicts_least_recently_used_page():
+    cache = PageCache(max_pages=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+
+def test_ttl_expires_pages(clock):
+    cache = PageCache(ttl_seconds=10)
+    cache.put("a", 1)
+    clock[0] += 10
+    assert cache.get("a") == 1
+    clock[0] += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_byte_budget_keeps_newest_pages():
+    size = page_cache.value_nbytes(frame(100))
+    cache = PageCache(max_pages=10, max_bytes=int(size * 2.5))
+    for key in "abc":
+        cache.put(key, frame(100))
+    assert len(cache) == 2 and "a" not in cache
+    assert cache.nbytes == 2 * size
+
+
+def test_owner_budget_drops_only_pages_no_one_else_holds():
+    size = page_cache.value_nbytes((frame(100),))
+    cache = PageCache(max_pages=10, max_owner_bytes=int(size * 1.5))
+    cache.put("shared", (frame(100),), owner="s1")
+    cache.get("shared", owner="s2")
+    cache.put("own", (frame(100),), owner="s1")
+    assert cache.owner_stats("s1") == (1, size)
+    assert "shared" in cache  # Still held by s2
+    cache.put("other", (frame(100),), owner="s2")
+    assert "shared" not in cache
+
+
+def test_discard_drops_matching_pages():
+    cache = PageCache()
+    cache.put(("q1", "[]", 0, 100), 1, owner="s")
+    cache.put(("q2", "[]", 0, 100), 2, owner="s")
+    assert cache.discard(lambda key: key[0] == "q1") == 1
+    assert len(cache) == 1 and cache.owner_stats("s")[0] == 1
+
+
+class SlowFetcher:
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self, query, skip=None, limit=None, applied_filters=None, total_count=None, total_acres=None):
+        self.calls += 1
+        self.release.wait(5)
+        return frame(1), "MATCH", 10, None, 0.0
+
+
+def test_concurrent_requests_share_one_fetch():
+    fetch = SlowFetcher()
+    prefetcher = PagePrefetcher(PageCache(), fetch, executor=ThreadPoolExecutor(2))
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(prefetcher.get, "ponds", skip=0, limit=100) for _ in range(4)]
+        while prefetcher.coalesced < 3:
+            threading.Event().wait(0.01)
+        fetch.release.set()
+        results = [f.result() for f in futures]
+    assert fetch.calls == 1
+    assert all(r is results[0] for r in results)
+    prefetcher.get("ponds", skip=0, limit=100)
+    assert prefetcher.hits == 1
+
+
+def test_prefetch_after_fetches_following_pages():
+    fetch = SlowFetcher()
+    fetch.release.set()
+    executor = ThreadPoolExecutor(2)
+    prefetcher = PagePrefetcher(PageCache(), fetch, executor=executor, depth=2)
+    prefetcher.prefetch_after("ponds", 0, 100, total_count=250)
+    executor.shutdown(wait=True)
+    assert page_key("ponds", None, 100, 100) in prefetcher.cache
+    assert page_key("ponds", None, 200, 100) in prefetcher.cache
+    assert fetch.calls == 2
+
+
+def test_invalidate_fetches_fresh_pages():
+    fetch = SlowFetcher()
+    fetch.release.set()
+    prefetcher = PagePrefetcher(PageCache(), fetch, executor=ThreadPoolExecutor(1))
+    prefetcher.get("ponds", skip=0, limit=100)
+    prefetcher.get("Ponds", skip=0, limit=100)
+    assert fetch.calls == 1
+    assert prefetcher.invalidate("PONDS") == 1
+    prefetcher.get("ponds", skip=0, limit=100)
+    assert fetch.calls == 2
+
+
+def test_fetch_in_flight_during_invalidate_is_not_cached():
+    fetch = SlowFetcher()
+    prefetcher = PagePrefetcher(PageCache(), fetch, executor=ThreadPoolExecutor(1))
+    with ThreadPoolExecutor(1) as pool:
+        stale = pool.submit(prefetcher.get, "ponds", skip=0, limit=100)
+        while not fetch.calls:
+            threading.Event().wait(0.01)
+        prefetcher.invalidate("ponds")
+        fetch.release.set()
+        stale.result()
+    assert len(prefetcher.cache) == 0
+
+
+def test_get_does_not_wait_for_a_queued_prefetch():
+    fetch = SlowFetcher()
+    fetch.release.set()
+    blocker = threading.Event()
+    executor = ThreadPoolExecutor(1)
+    executor.submit(blocker.wait, 5)  # Other work holding the only worker
+    prefetcher = PagePrefetcher(PageCache(), fetch, executor=executor, depth=2)
+    prefetcher.prefetch_after("ponds", 0, 100, total_count=300)
+    try:
+        with ThreadPoolExecutor(1) as pool:
+            page = pool.submit(prefetcher.get, "ponds", skip=100, limit=100).result(timeout=2)
+        assert len(page[0]) == 1 and fetch.calls == 1
+        assert page_key("ponds", None, 100, 100) in prefetcher.cache
+    finally:
+        blocker.set()
+        executor.shutdown(wait=True)
+    assert fetch.calls == 2  # The page at 200 was still prefetched; the one at 100 not again
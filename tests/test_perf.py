@@ -0,0 +1,26 @@
+import pytest
+
+from perf import PerfRecorder
+
+
+def test_summary_reports_percentiles_and_last_fields():
+    recorder = PerfRecorder(window=10)
+    for ms in range(1, 21):
+        recorder.record("decode", ms / 1000, rows=ms, bytes=ms * 10)
+    (row,) = recorder.summary()
+    assert row["count"] == 10  # Only the window is kept
+    assert (row["p50_ms"], row["p95_ms"]) == (16.0, 20.0)
+    assert (row["last_rows"], row["last_bytes"], row["last_wire_bytes"]) == (20, 200, None)
+
+
+def test_span_records_fields_added_inside_and_errors():
+    recorder = PerfRecorder()
+    with recorder.span("fetch", skip=0) as span:
+        span["status"] = 200
+    with pytest.raises(KeyError):
+        with recorder.span("fetch", skip=100):
+            raise KeyError("x")
+    assert recorder._last["fetch"] == {"skip": 100, "error": "KeyError"}
+    assert recorder.summary()[0]["count"] == 2
+    recorder.reset()
+    assert recorder.summary() == []
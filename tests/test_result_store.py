@@ -0,0 +1,126 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from frame_memory import compact_frame
+from result_store import ResultStore, recording_fetcher
+
+
+def ponds(start, stop):
+    return pd.DataFrame({
+        "pondId": [f"P{i}" for i in range(start, stop)],
+        "DOC": list(range(start, stop)),
+        "region": ["AP" if i % 2 else "TN" for i in range(start, stop)],
+    })
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(root=str(tmp_path), max_results=3)
+
+
+def test_pages_fill_the_result_and_gaps_are_reported(store):
+    result = store.open("ponds", None)
+    result.append(0, ponds(0, 10), total_count=30)
+    result.append(20, ponds(20, 30), total_count=30)
+    assert result.rows_stored == 20 and not result.complete
+    assert result.missing_ranges(4) == [(10, 4), (14, 4), (18, 2)]
+    result.append(5, ponds(5, 20), total_count=30)  # Overlaps the first page
+    assert result.rows_stored == 30 and result.complete
+    assert result.frame(["DOC"])["DOC"].tolist() == list(range(30))
+
+
+def test_select_filters_sorts_and_pages(store):
+    result = store.open("ponds", None)
+    result.append(0, ponds(0, 20), total_count=20)
+    page, matching = result.select([("region", "contains", "ap"), ("DOC", ">=", 5)],
+                                   sort_by="DOC", ascending=False, skip=1, limit=3)
+    assert matching == 8
+    assert page["DOC"].tolist() == [17, 15, 13]
+    assert page.index.tolist() == [2, 3, 4]
+
+
+def test_select_with_a_boolean_mask(store):
+    result = store.open("ponds", None)
+    result.append(0, ponds(0, 5), total_count=5)
+    page, matching = result.select(np.array([True, False, True, False, False]))
+    assert matching == 2 and page["pondId"].tolist() == ["P0", "P2"]
+
+
+def test_a_new_total_count_starts_the_result_over(store):
+    result = store.open("ponds", None)
+    result.append(0, ponds(0, 10), total_count=20)
+    result.append(0, ponds(0, 5), total_count=25)
+    assert result.rows_stored == 5 and result.total_count == 25
+
+
+def test_results_persist_and_are_evicted(store, tmp_path):
+    store.open("ponds", None).append(0, ponds(0, 3), total_count=3)
+    assert ResultStore(root=str(tmp_path)).open("PONDS ", None).rows_stored == 3
+    for query in ("a", "b", "c"):
+        store.open(query, None)
+    assert store.open("ponds", None).rows_stored == 0
+
+
+def test_recording_fetcher_stores_pages_under_the_response_filters(store):
+    filters = [{"field": "DOC", "operator": ">", "value": 80}]
+
+    def fetch_page(query, skip=None, limit=None, **kwargs):
+        return ponds(0, 4), "MATCH", 4, filters, 10.0
+
+    recording_fetcher(fetch_page, store)("ponds", skip=None, limit=100)
+    result = store.open("ponds", filters)
+    assert result.complete and result.total_acres == 10.0
+
+
+def test_compacted_and_plain_pages_share_one_result(store):
+    result = store.open("ponds", None)
+    result.append(0, compact_frame(ponds(0, 10)), total_count=20)
+    result.append(10, ponds(10, 20), total_count=20)
+    frame = result.frame()
+    assert frame["region"].tolist() == ["AP" if i % 2 else "TN" for i in range(20)]
+    assert frame["DOC"].tolist() == list(range(20))
+
+
+def test_fetch_missing_queues_each_range_once(store):
+    result = store.open("ponds", None)
+    result.append(0, ponds(0, 10), total_count=35)
+    release = threading.Event()
+    fetched = []
+
+    def fetch_range(skip, limit):
+        release.wait(5)
+        fetched.append((skip, limit))
+        result.append(skip, ponds(skip, skip + limit), total_count=35)
+
+    with ThreadPoolExecutor(2) as executor:
+        assert result.fetch_missing(fetch_range, executor, 10) == 3
+        assert result.fetch_missing(fetch_range, executor, 10) == 0  # Still queued
+        release.set()
+    assert sorted(fetched) == [(10, 10), (20, 10), (30, 5)]
+    assert result.complete and result.fetch_missing(fetch_range, ThreadPoolExecutor(1), 10) == 0
+
+
+def test_failed_ranges_can_be_queued_again(store):
+    result = store.open("ponds", None)
+    result.append(0, ponds(0, 10), total_count=20)
+
+    def fetch_range(skip, limit):
+        raise ConnectionError("API down")
+
+    with ThreadPoolExecutor(1) as executor:
+        assert result.fetch_missing(fetch_range, executor, 10) == 1
+    with ThreadPoolExecutor(1) as executor:
+        assert result.fetch_missing(fetch_range, executor, 10) == 1
+
+
+def test_discard_drops_every_result_of_a_query(store, tmp_path):
+    store.open("ponds", None).append(0, ponds(0, 3), total_count=3)
+    store.open("Ponds ", [{"field": "DOC"}]).append(0, ponds(0, 2), total_count=2)
+    store.open("farms", None).append(0, ponds(0, 1), total_count=1)
+    assert store.discard("PONDS") == 2
+    assert store.open("ponds", None).rows_stored == 0
+    assert store.open("farms", None).rows_stored == 1
@@ -0,0 +1,63 @@
+import io
+import threading
+
+import pytest
+
+import startup
+from startup import StartupReport, StaticAssets, Warmup, png_thumbnail, process_age
+
+
+def test_each_stage_is_recorded_once():
+    report = StartupReport()
+    report.record("boot", 0.5, entries=3)
+    report.record("boot", 9.0)
+    with pytest.raises(ValueError):
+        with report.stage("cache") as fields:
+            fields["entries"] = 1
+            raise ValueError("corrupt")
+    report.record_elapsed("first_run")
+    rows = report.rows()
+    assert [row["stage"] for row in rows] == ["boot", "cache", "first_run"]
+    assert rows[0]["ms"] == 500 and rows[0]["entries"] == 3
+    assert rows[1]["error"] == "ValueError" and rows[1]["entries"] == 1
+    assert rows[0]["thread"] == threading.current_thread().name
+
+
+def test_warmup_runs_every_task_in_order(monkeypatch):
+    monkeypatch.setattr(startup, "STARTUP", StartupReport())
+    ran = []
+
+    def failing():
+        raise OSError("no network")
+
+    warmup = Warmup([("one", lambda: ran.append(1)), ("broken", failing), ("two", lambda: ran.append(2) or "warm")])
+    assert warmup.wait(5) and warmup.done()
+    assert ran == [1, 2]
+    assert warmup.result("two") == "warm" and warmup.result("broken") is None
+    rows = {row["stage"]: row for row in startup.STARTUP.rows()}
+    assert list(rows) == ["warm:one", "warm:broken", "warm:two"]
+    assert rows["warm:broken"]["error"] == "OSError" and rows["warm:one"]["thread"] == "startup-warmup"
+
+
+def test_static_assets(tmp_path):
+    path = tmp_path / "logo.png"
+    path.write_bytes(b"png")
+    assets = StaticAssets()
+    assert assets.load("logo", str(path)) == b"png"
+    assert assets.load("missing", str(tmp_path / "missing.png")) is None
+    assets.put("logo", b"small")
+    assert assets.get("logo") == b"small" and assets.get("missing") is None
+
+
+def test_png_thumbnail_scales_down_only(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    path = tmp_path / "logo.png"
+    Image.new("RGB", (400, 200)).save(path)
+    with Image.open(io.BytesIO(png_thumbnail(str(path), 100))) as thumbnail:
+        assert thumbnail.size == (100, 50)
+    assert png_thumbnail(str(path), 800) == path.read_bytes()
+
+
+def test_process_age():
+    age = process_age()
+    assert age is None or age >= 0
@@ -0,0 +1,75 @@
+import json
+
+import pandas as pd
+import pytest
+
+import stream_decode
+from stream_decode import PondsStreamDecoder, iter_chunks
+
+
+def body_of(rows, **meta):
+    return json.dumps({"data": rows, **meta}).encode("utf-8")
+
+
+def decode(body, read_bytes, chunk_rows=5000):
+    decoder = PondsStreamDecoder(chunk_rows=chunk_rows)
+    pieces = [body[i:i + read_bytes] for i in range(0, len(body), read_bytes)]
+    chunks = list(iter_chunks(pieces, decoder))
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    return df, decoder
+
+
+ROWS = [{"pondId": f"P{i}", "DOC": i, "acres": i / 4, "name": "Pond ü ✓ \"q\"", "done": i % 2 == 0}
+        for i in range(40)]
+NESTED = [dict(row, reading={"ph": 7.5, "tags": [{"k": i}]}) for i, row in enumerate(ROWS)]
+
+
+@pytest.mark.parametrize("rows", [ROWS, NESTED], ids=["flat", "nested"])
+@pytest.mark.parametrize("read_bytes", [1, 7, 100, 1 << 16])
+def test_matches_json_loads_for_any_read_size(rows, read_bytes):
+    df, decoder = decode(body_of(rows, totalCount=40), read_bytes)
+    pd.testing.assert_frame_equal(df, pd.DataFrame(rows))
+    assert decoder.rows == 40 and decoder.meta() == {"totalCount": 40}
+
+
+def test_chunks_have_chunk_rows_rows():
+    decoder = PondsStreamDecoder(chunk_rows=16)
+    chunks = decoder.feed(body_of(ROWS)) + decoder.close()
+    assert [len(c) for c in chunks] == [16, 16, 8]
+
+
+def test_metadata_under_response_and_top_level_wins():
+    body = json.dumps({
+        "response": {"data": ROWS[:2], "totalCount": 2, "cypher": "inner", "removedIds": ["P9"]},
+        "cypher": "outer",
+        "data": ROWS,  # A second data array is skipped
+    }).encode("utf-8")
+    df, decoder = decode(body, 50)
+    assert len(df) == 2
+    assert decoder.meta() == {"totalCount": 2, "cypher": "outer", "removedIds": ["P9"]}
+
+
+def test_numbers_split_across_reads_are_not_cut_short():
+    df, _ = decode(b'{"totalAcres": 1234.5, "data": [{"DOC": 123456}]}', 3)
+    assert df["DOC"].tolist() == [123456]
+
+
+def test_non_object_body_and_truncated_body():
+    assert decode(b"[1, 2]", 4)[0].empty
+    with pytest.raises(ValueError):
+        decode(body_of(ROWS)[:-5], 64)
+
+
+@pytest.mark.parametrize("rows", [ROWS, NESTED], ids=["flat", "nested"])
+def test_each_read_is_bulk_parsed_at_most_twice(monkeypatch, rows):
+    calls = []
+    loads = json.loads
+    monkeypatch.setattr(stream_decode.json, "loads", lambda s, *a, **k: calls.append(len(s)) or loads(s, *a, **k))
+    body = body_of(rows * 10)
+    reads = len(body) // 512 + 1
+    decode(body, 512)
+    assert len(calls) <= 2 * reads
+    # A single read holding the whole body takes one bulk parse, not one per row
+    calls.clear()
+    decode(body, len(body))
+    assert len(calls) == 1
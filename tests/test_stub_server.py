@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import stub_server
+from http_client import PondsClient
+from ponds_core import request_ponds_page
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server, url = stub_server.start_in_thread(rows=250)
+    yield url
+    server.shutdown()
+
+
+@pytest.mark.parametrize("transport", ["json", "gzip", "arrow"])
+def test_pages_honour_skip_limit_and_filters(stub, transport):
+    client = PondsClient(max_retries=0)
+    df, cypher, total_count, filters, total_acres = request_ponds_page(
+        client, "ponds with > 80 doc", skip=None, limit=50, url=stub, transport=transport)
+    assert filters == [{"field": "DOC", "operator": ">", "value": 80}]
+    assert len(df) == 50 and (df["DOC"] > 80).all()
+    assert cypher and total_acres > 0
+
+    last, _, _, _, _ = request_ponds_page(client, "ponds with > 80 doc", skip=total_count - 10, limit=50,
+                                          applied_filters=filters, total_count=total_count, url=stub,
+                                          transport=transport)
+    assert len(last) == 10
+
+
+def test_ready_line_reaches_a_pipe_without_unbuffered_output():
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONUNBUFFERED"}
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "stub_server.py"), "--port", "0", "--rows", "10"],
+                            stdout=subprocess.PIPE, text=True, env=env)
+    pool = ThreadPoolExecutor(1)
+    try:
+        # A line left in the child's buffer would never arrive
+        line = pool.submit(proc.stdout.readline).result(timeout=10)
+        assert line.startswith("Serving 10 synthetic ponds on http://127.0.0.1:")
+    finally:
+        proc.kill()
+        proc.wait()
+        pool.shutdown()
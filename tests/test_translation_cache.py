@@ -0,0 +1,57 @@
+import pytest
+
+import translation_cache
+from translation_cache import TranslationCache, canonical_query
+
+FILTERS = [{"field": "DOC", "operator": ">", "value": 80}]
+
+
+@pytest.mark.parametrize("a, b", [
+    ("ponds with >80 doc but not done any harvest", "Ponds with > 80 DOC, not done any harvest"),
+    ("ponds with doc greater than 80", "ponds with doc > 80"),
+    ("ponds with doc at least 80.0", "Show me ponds with DOC >= 80"),
+    ("farms above 1,000 acres", "farms > 1000 acres"),
+])
+def test_equivalent_queries_share_a_canonical_form(a, b):
+    assert canonical_query(a) == canonical_query(b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("ponds with doc > 80", "ponds with doc >= 80"),
+    ("ponds with doc > 80", "ponds with doc > 8"),
+    ("ponds with doc > 80", "ponds with doc < 80"),
+    ("ponds in nellore", "ponds not in nellore"),
+])
+def test_different_queries_stay_apart(a, b):
+    assert canonical_query(a) != canonical_query(b)
+
+
+def test_canonical_form_details():
+    assert canonical_query("ponds with DOC > 80.50, but  harvested;") == "ponds doc > 80.5 and harvested"
+
+
+def test_get_counts_hits_and_misses(tmp_path):
+    cache = TranslationCache(path=str(tmp_path / "t.json"))
+    assert cache.get("ponds > 80 doc") is None
+    cache.put("ponds > 80 doc", "MATCH (p)", FILTERS)
+    assert cache.get("Ponds with >80 DOC")["applied_filters"] == FILTERS
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_translations_without_filters_are_not_cached(tmp_path):
+    cache = TranslationCache(path=str(tmp_path / "t.json"))
+    cache.put("hello", "MATCH (p)", [])
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_persistence_and_ttl(tmp_path, monkeypatch):
+    path = str(tmp_path / "t.json")
+    cache = TranslationCache(path=path, max_entries=2)
+    for query in ("a 1", "b 2", "c 3"):
+        cache.put(query, "", FILTERS)
+    reloaded = TranslationCache(path=path, max_entries=2, ttl_seconds=60)
+    assert reloaded.get("a 1") is None and reloaded.get("c 3") is not None
+
+    now = translation_cache.time.time()
+    monkeypatch.setattr(translation_cache.time, "time", lambda: now + 61)
+    assert reloaded.get("c 3") is None
@@ -0,0 +1,43 @@
+import io
+
+import pandas as pd
+import pytest
+
+import stub_server
+from http_client import PondsClient
+from ponds_core import request_ponds_page
+from transport import encode_arrow, is_arrow, read_arrow
+
+
+class Headers:
+    def __init__(self, content_type):
+        self.headers = {"Content-Type": content_type}
+
+
+def test_arrow_round_trip_keeps_dtypes_and_metadata():
+    df = pd.DataFrame({"pondId": ["P1", "P2"], "DOC": [10, 20], "updated": pd.to_datetime(["2024-01-01", None])})
+    meta = {"cypher": "MATCH (p)", "totalCount": 2, "appliedFilters": [{"field": "DOC", "operator": ">", "value": 5}]}
+    decoded, decoded_meta = read_arrow(io.BytesIO(encode_arrow(df, meta)))
+    pd.testing.assert_frame_equal(decoded, df, check_dtype=False)
+    assert decoded["updated"].dtype.kind == "M"
+    assert decoded_meta == meta
+
+
+def test_is_arrow():
+    assert is_arrow(Headers("application/vnd.apache.arrow.stream; charset=binary"))
+    assert not is_arrow(Headers("application/json"))
+
+
+@pytest.fixture(scope="module")
+def json_only_stub():
+    server, url = stub_server.start_in_thread(rows=300, formats=["json"])
+    yield url
+    server.shutdown()
+
+
+def test_arrow_transport_falls_back_to_json(json_only_stub):
+    client = PondsClient(max_retries=0)
+    arrow_page = request_ponds_page(client, "ponds with > 50 doc", limit=40, url=json_only_stub, transport="arrow")
+    json_page = request_ponds_page(client, "ponds with > 50 doc", limit=40, url=json_only_stub, transport="json")
+    pd.testing.assert_frame_equal(arrow_page[0], json_page[0])
+    assert arrow_page[1:] == json_page[1:]
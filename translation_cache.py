@@ -0,0 +1,133 @@
+"""Client-side cache of natural-language query translations
+
+Maps a canonical form of the query text to the cypher and appliedFilters the
+API produced for it, so repeated questions can send the filters directly
+instead of paying for another LLM translation on the server.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+TRANSLATION_CACHE_PATH = os.path.join(tempfile.gettempdir(), "aqua_translations.json")
+
+STOPWORDS = {
+    "a", "an", "the", "any", "all", "with", "which", "that", "who", "have", "has", "had",
+    "is", "are", "was", "were", "there", "of", "for", "in", "show", "me", "list", "get",
+    "find", "give", "please", "what", "whose",
+}
+
+# Longest phrases first so "greater than or equal to" wins over "greater than"
+COMPARISON_PHRASES = [
+    ("greater than or equal to", ">="), ("more than or equal to", ">="), ("at least", ">="),
+    ("less than or equal to", "<="), ("at most", "<="),
+    ("greater than", ">"), ("more than", ">"), ("above", ">"),
+    ("less than", "<"), ("fewer than", "<"), ("below", "<"),
+    ("equal to", "="), ("equals", "="),
+]
+
+
+def canonical_query(query):
+    """Reduce a query to a canonical token string
+
+    Folds case, whitespace and punctuation, spells comparisons as symbols,
+    normalizes numbers (80.0 -> 80, 1,000 -> 1000), treats ',' and 'but' as
+    'and', and drops stopwords, so "ponds with >80 doc but not done any
+    harvest" and "Ponds with > 80 DOC, not done any harvest" match.
+    """
+    text = str(query or "").lower()
+    text = re.sub(r"(?<=\d),(?=\d{3}\b)", "", text)
+    for phrase, symbol in COMPARISON_PHRASES:
+        text = re.sub(rf"\b{phrase}\b", f" {symbol} ", text)
+    text = re.sub(r"(>=|<=|!=|[<>=])", r" \1 ", text)
+    text = re.sub(r"[,;]|\bbut\b", " and ", text)
+    text = re.sub(r"[^\w\s<>=!.]|(?<!\d)\.|\.(?!\d)", " ", text)
+
+    tokens = []
+    for token in text.split():
+        if re.fullmatch(r"\d+(\.\d+)?", token):
+            number = float(token)
+            token = str(int(number)) if number.is_integer() else repr(number)
+        elif token in STOPWORDS:
+            continue
+        if token == "and" and (not tokens or tokens[-1] == "and"):
+            continue
+        tokens.append(token)
+    while tokens and tokens[-1] == "and":
+        tokens.pop()
+    return " ".join(tokens)
+
+
+class TranslationCache:
+    """Persistent LRU of canonical query -> {cypher, applied_filters}"""
+
+    def __init__(self, path=TRANSLATION_CACHE_PATH, max_entries=500, ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def get(self, query):
+        """Cached {cypher, applied_filters} for a query, counting hits and misses"""
+        key = canonical_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["stored_at"] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, query, cypher, applied_filters):
+        if not applied_filters:
+            return
+        key = canonical_query(query)
+        with self._lock:
+            self._entries[key] = {
+                "cypher": cypher or "",
+                "applied_filters": applied_filters,
+                "stored_at": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Saved oldest first, so insertion order restores the LRU order
+        for key, entry in entries:
+            self._entries[key] = entry
+
+    def _save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(list(self._entries.items()), f, default=str)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # Persisting is best effort; the in-memory cache still works
@@ -0,0 +1,53 @@
+"""Wire formats for /api/getFarmPonds pages
+
+Clients advertise what they can read in the Accept and Accept-Encoding
+headers; a server that knows Arrow answers with an Arrow IPC stream whose
+schema metadata carries the page metadata (cypher, totalCount, totalAcres,
+appliedFilters), and anything else answers with JSON, gzipped if allowed.
+"""
+import json
+
+import pyarrow as pa
+
+ARROW_STREAM_MIME = "application/vnd.apache.arrow.stream"
+META_KEY = b"ponds"
+
+# Request headers per transport; "arrow" still accepts (gzipped) JSON so it
+# degrades gracefully against servers that only speak JSON
+TRANSPORT_HEADERS = {
+    "arrow": {"Accept": f"{ARROW_STREAM_MIME}, application/json;q=0.9", "Accept-Encoding": "gzip"},
+    "gzip": {"Accept": "application/json", "Accept-Encoding": "gzip"},
+    "json": {"Accept": "application/json", "Accept-Encoding": "identity"},
+}
+
+
+def is_arrow(response):
+    return response.headers.get("Content-Type", "").split(";")[0].strip() == ARROW_STREAM_MIME
+
+
+def encode_arrow(df, meta, compression="zstd"):
+    """Arrow IPC stream bytes for a page, with meta in the schema metadata"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({META_KEY: json.dumps(meta, default=str).encode("utf-8")})
+    if compression and not pa.Codec.is_available(compression):
+        compression = None
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=compression)) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def read_arrow(source):
+    """(DataFrame, meta dict) from an Arrow IPC stream (a file-like or bytes)
+
+    split_blocks and self_destruct let pandas adopt the Arrow buffers column
+    by column instead of consolidating them into fresh 2-D blocks, so
+    null-free numeric columns and strings are not copied again.
+    """
+    reader = pa.ipc.open_stream(source)
+    table = reader.read_all()
+    metadata = reader.schema.metadata or {}
+    meta = json.loads(metadata[META_KEY]) if META_KEY in metadata else {}
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    del table
+    return df, meta